@@ -1,9 +1,37 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Request
-from fastapi.responses import RedirectResponse, JSONResponse
-from pydantic import BaseModel
-from app.core.auth import get_flow, save_token
+from fastapi.responses import RedirectResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from app.core.async_calendar_client import get_async_calendar_client
+from app.core.auth import get_flow, asave_token, aget_token
+from app.core.errors import CalendarAPIError
+from app.core.event_mirror import event_bounds
+from app.core.google_calendar_crud import (
+    get_calendar_service,
+    create_events_bulk,
+    update_events_bulk,
+    delete_events_bulk,
+)
+from app.core.ics import ICS_FOOTER, ICS_HEADER, event_to_vevent
+from app.core.read_coalescer import calendar_reads
+from app.core.watch_channels import ensure_channel, handle_notification, verify_notification, watch_enabled, watch_stats
+from app.langgraph.model_router import model_stats
+from app.langgraph.router import route_stats
+from app.langgraph.tools.agenda_tool import get_agenda
+from app.langgraph.tools.free_slots_tool import MAX_SLOT_MINUTES, search_free_slots
+from app.langgraph.utils import parse_natural_datetime
+from app.services.import_service import import_ics
 from app.services.schedule_service import ScheduleService
 
+USER_ID = "user123"
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 schedule_service = ScheduleService()
 
@@ -17,16 +45,36 @@ async def login():
 async def callback(request: Request):
     flow = get_flow()
     flow.fetch_token(authorization_response=str(request.url))
-    save_token("user123", flow.credentials)
+    await asave_token(USER_ID, flow.credentials)
+    if watch_enabled():
+        # Push notifications keep the cached calendar current from now on
+        try:
+            await ensure_channel(USER_ID)
+        except CalendarAPIError as error:
+            logger.warning("Could not open a watch channel: %s", error)
     return {"message": "Authorization successful! You can now close this tab."}
 
+
+@router.post("/calendar/notifications")
+async def calendar_notification(request: Request):
+    """
+    Webhook for events.watch channels. Google only needs a 2xx; the body is empty.
+    """
+    channel = await verify_notification(request.headers)
+    if "error" in channel:
+        return JSONResponse(status_code=channel["status"], content={"error": channel["error"]})
+    await handle_notification(channel, request.headers.get("X-Goog-Resource-State", ""))
+    return Response(status_code=204)
+
 class QueryInput(BaseModel):
     query: str
+    # Separate conversations of the user run concurrently; the default is one thread per user
+    conversation_id: Optional[str] = None
 
 
 @router.post("/schedule/query")
 async def schedule_query(data: QueryInput):
-    result = await schedule_service.handle_query(data.query)
+    result = await schedule_service.handle_query(data.query, USER_ID, data.conversation_id)
 
     if isinstance(result, dict) and "messages" in result:
         messages = result["messages"]
@@ -46,3 +94,311 @@ async def schedule_query(data: QueryInput):
         response_text = str(result)
 
     return JSONResponse(content={"response": response_text})
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/schedule/query/stream")
+async def schedule_query_stream(data: QueryInput):
+    async def event_stream():
+        try:
+            async for event, payload in schedule_service.stream_query(data.query, USER_ID, data.conversation_id):
+                yield format_sse(event, payload)
+        except Exception as e:
+            yield format_sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    event_id: Optional[str] = None
+    event: Optional[dict] = None
+
+class BatchInput(BaseModel):
+    operations: List[BatchOperation]
+    check_conflicts: bool = True
+
+
+def validate_operation(op: BatchOperation):
+    """
+    Why an operation can't be sent, or None. Checked up front so a bad body only fails its own op.
+    """
+    if op.op in ("update", "delete") and not op.event_id:
+        return f"'{op.op}' requires event_id"
+    if op.op in ("create", "update"):
+        if not op.event:
+            return f"'{op.op}' requires event"
+        try:
+            event_bounds(op.event)
+        except (ValueError, TypeError, AttributeError) as e:
+            return f"Invalid event start/end: {e}"
+    return None
+
+
+def batch_runs(operations: List[BatchOperation], indexes: List[int]) -> List[List[int]]:
+    """
+    Split op indexes into consecutive runs that can share Calendar batch requests.
+    Calls in one batch request may execute in any order, so a run only holds ops of one
+    type on distinct events; runs execute in input order, so dependent ops (a create then
+    a delete of the same event) behave as written.
+    """
+    runs = []
+    touched = set()
+    for i in indexes:
+        op = operations[i]
+        event_id = op.event_id or (op.event or {}).get("id")
+        if not runs or operations[runs[-1][0]].op != op.op or (event_id and event_id in touched):
+            runs.append([])
+            touched = set()
+        runs[-1].append(i)
+        if event_id:
+            touched.add(event_id)
+    return runs
+
+
+def run_batch(credentials, operations: List[BatchOperation], check_conflicts: bool):
+    # Runs on an executor thread; the service is that thread's own
+    service = get_calendar_service(credentials, USER_ID)
+    results = [None] * len(operations)
+
+    valid = []
+    for i, op in enumerate(operations):
+        error = validate_operation(op)
+        if error:
+            results[i] = {"error": error, "status": 400}
+        else:
+            valid.append(i)
+
+    for run in batch_runs(operations, valid):
+        kind = operations[run[0]].op
+        if kind == "create":
+            done = create_events_bulk(
+                service, [operations[i].event for i in run], user_id=USER_ID, check_conflicts=check_conflicts
+            )
+        elif kind == "update":
+            done = update_events_bulk(
+                service, [(operations[i].event_id, operations[i].event) for i in run], user_id=USER_ID
+            )
+        else:
+            done = delete_events_bulk(service, [operations[i].event_id for i in run], user_id=USER_ID)
+        for i, result in zip(run, done):
+            results[i] = result
+    return results
+
+
+@router.post("/schedule/batch")
+async def schedule_batch(data: BatchInput):
+    credentials = await aget_token(USER_ID)
+    if not credentials:
+        return JSONResponse(status_code=401, content={"error": "User not authenticated."})
+
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        None, lambda: run_batch(credentials, data.operations, data.check_conflicts)
+    )
+    return JSONResponse(content={
+        "results": [
+            {"index": i, "op": op.op, "ok": "error" not in result, "result": result}
+            for i, (op, result) in enumerate(zip(data.operations, results))
+        ]
+    })
+
+
+class FreeSlotsInput(BaseModel):
+    duration_minutes: int = Field(30, gt=0, le=MAX_SLOT_MINUTES)
+    start: Optional[str] = None
+    end: Optional[str] = None
+    attendees: Optional[List[str]] = None
+    work_start_hour: int = Field(9, ge=0, le=24)
+    work_end_hour: int = Field(17, ge=0, le=24)
+    include_weekends: bool = False
+    buffer_minutes: int = Field(0, ge=0, le=MAX_SLOT_MINUTES)
+    max_results: int = Field(10, ge=1, le=100)
+
+    @model_validator(mode="after")
+    def check_working_hours(self):
+        if self.work_start_hour >= self.work_end_hour:
+            raise ValueError("work_start_hour must be before work_end_hour")
+        return self
+
+
+@router.post("/schedule/free-slots")
+async def schedule_free_slots(data: FreeSlotsInput):
+    slots = await search_free_slots(user_id=USER_ID, **data.model_dump())
+    if isinstance(slots, dict) and "error" in slots:
+        return JSONResponse(status_code=400, content=slots)
+    return JSONResponse(content={"slots": slots})
+
+
+@router.get("/schedule/agenda")
+async def schedule_agenda(view: Literal["today", "tomorrow", "week", "next"] = "today"):
+    agenda = await get_agenda(view, user_id=USER_ID)
+    if "error" in agenda:
+        status = 401 if agenda["error"] == "User not authenticated." else 502
+        return JSONResponse(status_code=status, content=agenda)
+    return JSONResponse(content=agenda)
+
+
+@router.get("/schedule/stats")
+async def schedule_stats():
+    return {
+        "calendar_reads": calendar_reads.stats(),
+        "routes": route_stats(),
+        "models": model_stats(),
+        "watch": watch_stats(),
+    }
+
+
+# Partial response used for ICS and as the NDJSON default
+EXPORT_FIELDS = "id,summary,start,end,location,description,status,recurrence,recurringEventId,originalStartTime"
+EXPORT_PAGE_SIZE = 2500
+# Events per chunk written to the response
+EXPORT_CHUNK_EVENTS = 200
+
+
+@router.get("/schedule/events/export")
+async def export_events(
+    format: Literal["ndjson", "ics"] = "ndjson",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Stream the whole calendar (or the events between start and end) as NDJSON or ICS.
+    Events are fetched and written page by page, so memory use does not grow with the calendar.
+    Recurring events are exported once, with their recurrence rules; changed and
+    cancelled instances follow as exceptions that point at their series
+    (recurringEventId and originalStartTime, or UID and RECURRENCE-ID in ICS).
+    """
+    credentials = await aget_token(USER_ID)
+    if not credentials:
+        return JSONResponse(status_code=401, content={"error": "User not authenticated."})
+
+    params = {}
+    try:
+        if start:
+            params["timeMin"] = parse_natural_datetime(start).isoformat()
+        if end:
+            params["timeMax"] = parse_natural_datetime(end).isoformat()
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    client = get_async_calendar_client(credentials, USER_ID)
+    events = client.iter_events(
+        params,
+        fields=fields if fields and format == "ndjson" else EXPORT_FIELDS,
+        page_size=EXPORT_PAGE_SIZE,
+    )
+    # Fetch the first page up front so auth and API errors still get a proper status code
+    try:
+        first = await anext(events, None)
+    except CalendarAPIError as error:
+        return JSONResponse(status_code=502, content={"error": str(error)})
+
+    def render(event) -> str:
+        if format == "ndjson":
+            return json.dumps(event) + "\n"
+        if event.get("status") == "cancelled":
+            # Only cancelled instances of a series are listed; they cancel that occurrence
+            return event_to_vevent(event) if event.get("originalStartTime") else ""
+        if not event.get("start") or not event.get("end"):
+            return ""
+        return event_to_vevent(event)
+
+    async def body():
+        if format == "ics":
+            yield ICS_HEADER
+        chunk = []
+        event = first
+        try:
+            while event is not None:
+                chunk.append(render(event))
+                if len(chunk) >= EXPORT_CHUNK_EVENTS:
+                    yield "".join(chunk)
+                    chunk = []
+                event = await anext(events, None)
+        except CalendarAPIError as error:
+            # Headers are already sent; end the export early and make the truncation visible
+            logger.warning("Event export stopped: %s", error)
+            if format == "ndjson":
+                chunk.append(json.dumps({"error": str(error)}) + "\n")
+            yield "".join(chunk)
+            return
+        if chunk:
+            yield "".join(chunk)
+        if format == "ics":
+            yield ICS_FOOTER
+
+    if format == "ics":
+        return StreamingResponse(
+            body(), media_type="text/calendar; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="calendar.ics"'},
+        )
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+# Uploads up to this size stay in memory while spooled, larger ones go to a temp file
+IMPORT_SPOOL_BYTES = 1024 * 1024
+IMPORT_READ_BYTES = 64 * 1024
+# Larger uploads, or files with more VEVENTs, are refused with 413
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+IMPORT_MAX_EVENTS = int(os.getenv("IMPORT_MAX_EVENTS", "10000"))
+VEVENT_MARKER = b"BEGIN:VEVENT"
+
+
+@router.post("/schedule/import")
+async def import_events(request: Request, check_conflicts: bool = True):
+    """
+    Import an iCalendar file sent as the raw request body (Content-Type: text/calendar).
+    Streams one NDJSON line per VEVENT as it is created, skipped or rejected, then the totals.
+    Files over IMPORT_MAX_BYTES or IMPORT_MAX_EVENTS are refused with 413 before anything is created.
+    """
+    credentials = await aget_token(USER_ID)
+    if not credentials:
+        return JSONResponse(status_code=401, content={"error": "User not authenticated."})
+
+    too_large = JSONResponse(
+        status_code=413,
+        content={"error": f"Imports are limited to {IMPORT_MAX_BYTES} bytes and {IMPORT_MAX_EVENTS} events."},
+    )
+    try:
+        declared = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        declared = 0
+    if declared > IMPORT_MAX_BYTES:
+        return too_large
+
+    # The body can't be read once the response starts streaming, so spool it first,
+    # counting bytes and VEVENTs so oversized files are refused before the first create
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    size = vevents = 0
+    tail = b""  # end of the previous chunk, in case a marker straddles two
+    async for data in request.stream():
+        size += len(data)
+        vevents += (tail + data).count(VEVENT_MARKER)
+        tail = (tail + data)[-(len(VEVENT_MARKER) - 1):]
+        if size > IMPORT_MAX_BYTES or vevents > IMPORT_MAX_EVENTS:
+            spool.close()
+            return too_large
+        spool.write(data)
+    spool.seek(0)
+
+    async def chunks():
+        while data := spool.read(IMPORT_READ_BYTES):
+            yield data
+
+    async def body():
+        try:
+            async for outcome in import_ics(chunks(), credentials, USER_ID, check_conflicts):
+                yield json.dumps(outcome) + "\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
@@ -0,0 +1,191 @@
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from app.core.event_mirror import event_bounds
+
+AGENDA_VIEWS = ("today", "tomorrow", "week", "next")
+WEEK_DAYS = 7
+# Events longer than this are only filed under their first days
+MAX_SPAN_DAYS = 31
+
+# user_id -> AgendaViews
+_agendas = {}
+_agendas_lock = threading.Lock()
+
+
+def event_days(start: datetime, end: datetime, time_zone) -> list:
+    """
+    Local dates an event occupies; an event ending at midnight does not touch the next day.
+    """
+    first = start.astimezone(time_zone).date()
+    last = (end - timedelta(microseconds=1)).astimezone(time_zone).date() if end > start else first
+    span = min((last - first).days, MAX_SPAN_DAYS - 1)
+    return [first + timedelta(days=offset) for offset in range(span + 1)]
+
+
+def agenda_entry(event: dict, start: datetime, end: datetime) -> dict:
+    return {
+        "id": event.get("id"),
+        "summary": event.get("summary", "No Title"),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "all_day": "date" in event.get("start", {}),
+        "location": event.get("location"),
+    }
+
+
+def format_entry(entry: dict, day: date, time_zone) -> str:
+    if entry["all_day"]:
+        return f"- All day: {entry['summary']}"
+    start = datetime.fromisoformat(entry["start"]).astimezone(time_zone)
+    end = datetime.fromisoformat(entry["end"]).astimezone(time_zone)
+    # Multi-day events show where they begin or end relative to this day
+    start_text = start.strftime("%H:%M") if start.date() == day else start.strftime("%a %H:%M")
+    end_text = end.strftime("%H:%M") if end.date() == day else end.strftime("%a %H:%M")
+    line = f"- {start_text}-{end_text} {entry['summary']}"
+    return f"{line} ({entry['location']})" if entry["location"] else line
+
+
+class AgendaViews:
+    """
+    One user's mirrored events filed by local day, and the today/tomorrow/week views
+    rendered from them. Syncing with the mirror only re-files events that changed
+    and only re-sorts the days they touch; views are cached until the next change
+    or until the day rolls over in the calendar's time zone.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.version = None
+        self.time_zone = None
+        self._filed = {}  # event id -> (event object, days it is filed under)
+        self._days = defaultdict(dict)  # local date -> {event id: (start, end, event)}
+        self._sorted = {}  # local date -> entries sorted by start
+        self._views = {}  # (view, local today) -> rendered view
+        self._lock = threading.Lock()
+
+    def sync(self, mirror):
+        """
+        Catch up with the mirror; a no-op while its version is unchanged.
+        """
+        if mirror.version == self.version and mirror.time_zone == self.time_zone:
+            return
+        version, events = mirror.versioned_events()
+        with self._lock:
+            if mirror.time_zone != self.time_zone:
+                # Day boundaries moved: file everything again
+                self.time_zone = mirror.time_zone
+                self._filed, self._days, self._sorted = {}, defaultdict(dict), {}
+            time_zone = pytz.timezone(self.time_zone)
+            touched = set()
+            for event_id, event in events.items():
+                filed = self._filed.get(event_id)
+                # The mirror replaces an event's dict when it changes
+                if filed is not None and filed[0] is event:
+                    continue
+                if filed is not None:
+                    touched.update(self._unfile(event_id, filed[1]))
+                touched.update(self._file(event_id, event, time_zone))
+            for event_id in [event_id for event_id in self._filed if event_id not in events]:
+                touched.update(self._unfile(event_id, self._filed[event_id][1]))
+            for day in touched:
+                self._sorted.pop(day, None)
+            if touched:
+                self._views.clear()
+            self.version = version
+
+    def _file(self, event_id: str, event: dict, time_zone) -> list:
+        start, end = event_bounds(event, self.time_zone)
+        days = event_days(start, end, time_zone) if start is not None else []
+        for day in days:
+            self._days[day][event_id] = (start, end, event)
+        self._filed[event_id] = (event, days)
+        return days
+
+    def _unfile(self, event_id: str, days: list) -> list:
+        for day in days:
+            self._days[day].pop(event_id, None)
+            if not self._days[day]:
+                del self._days[day]
+        del self._filed[event_id]
+        return days
+
+    def _day_entries(self, day: date) -> list:
+        entries = self._sorted.get(day)
+        if entries is None:
+            filed = sorted(self._days.get(day, {}).values(), key=lambda item: (item[0], item[1]))
+            entries = self._sorted[day] = [agenda_entry(event, start, end) for start, end, event in filed]
+        return entries
+
+    def _day_view(self, view: str, day: date, time_zone) -> dict:
+        entries = self._day_entries(day)
+        heading = f"{view.capitalize()} ({day.strftime('%a %Y-%m-%d')})"
+        lines = [format_entry(entry, day, time_zone) for entry in entries] or ["Nothing scheduled."]
+        return {"view": view, "date": day.isoformat(), "time_zone": self.time_zone,
+                "events": entries, "text": "\n".join([f"{heading}:", *lines])}
+
+    def _week_view(self, today: date, time_zone) -> dict:
+        days, sections = [], []
+        for offset in range(WEEK_DAYS):
+            day = today + timedelta(days=offset)
+            entries = self._day_entries(day)
+            days.append({"date": day.isoformat(), "events": entries})
+            if entries:
+                sections.append(day.strftime("%a %Y-%m-%d") + ":")
+                sections.extend(format_entry(entry, day, time_zone) for entry in entries)
+        end = today + timedelta(days=WEEK_DAYS - 1)
+        return {"view": "week", "start": today.isoformat(), "end": end.isoformat(), "time_zone": self.time_zone,
+                "days": days, "text": "\n".join(sections) or "Nothing scheduled this week."}
+
+    def _next_view(self, now: datetime, time_zone) -> dict:
+        today = now.astimezone(time_zone).date()
+        for offset in range(WEEK_DAYS):
+            day = today + timedelta(days=offset)
+            for entry in self._day_entries(day):
+                if entry["all_day"] or datetime.fromisoformat(entry["end"]) <= now:
+                    continue
+                started = datetime.fromisoformat(entry["start"]) <= now
+                text = ("Now: " if started else "Next: ") + format_entry(entry, day, time_zone)[2:]
+                return {"view": "next", "time_zone": self.time_zone, "event": entry,
+                        "in_progress": started, "text": text}
+        return {"view": "next", "time_zone": self.time_zone, "event": None,
+                "in_progress": False, "text": "Nothing scheduled in the next week."}
+
+    def view(self, mirror, name: str, now: datetime = None) -> dict:
+        """
+        The named view (see AGENDA_VIEWS) as of now, synced with the mirror first.
+        """
+        if name not in AGENDA_VIEWS:
+            return {"error": f"Unknown agenda view '{name}'. Use one of: {', '.join(AGENDA_VIEWS)}."}
+        self.sync(mirror)
+        now = now or datetime.now(pytz.utc)
+        with self._lock:
+            time_zone = pytz.timezone(self.time_zone)
+            # "next" depends on the current minute, so it is not cached
+            if name == "next":
+                return self._next_view(now, time_zone)
+            today = now.astimezone(time_zone).date()
+            key = (name, today)
+            cached = self._views.get(key)
+            if cached is None:
+                if any(cached_today != today for _, cached_today in self._views):
+                    # The day rolled over; yesterday's views are no longer needed
+                    self._views.clear()
+                if name == "week":
+                    cached = self._week_view(today, time_zone)
+                else:
+                    day = today + timedelta(days=1 if name == "tomorrow" else 0)
+                    cached = self._day_view(name, day, time_zone)
+                self._views[key] = cached
+            return cached
+
+
+def get_agenda_views(user_id: str) -> AgendaViews:
+    with _agendas_lock:
+        agenda = _agendas.get(user_id)
+        if agenda is None:
+            agenda = _agendas[user_id] = AgendaViews(user_id)
+        return agenda
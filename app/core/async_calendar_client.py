@@ -0,0 +1,327 @@
+import asyncio
+import os
+from datetime import datetime
+
+import httpx
+from google.auth.transport.requests import Request as GoogleAuthRequest
+
+from app.core.conflicts import aget_conflict_index
+from app.core.errors import CalendarAPIError
+from app.core.event_mirror import aget_event_mirror
+from app.core.metrics import calendar_api_seconds
+from app.core.outbound import GONE_STATUSES, google_retry_info, outbound
+from app.core.read_coalescer import calendar_reads, read_key
+from app.core.token_refresher import refresh_credentials
+
+CALENDAR_BASE_URL = os.getenv("GOOGLE_CALENDAR_BASE_URL", "https://www.googleapis.com/calendar/v3")
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("CALENDAR_HTTP_TIMEOUT", "30"))
+MAX_CONNECTIONS = int(os.getenv("CALENDAR_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("CALENDAR_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Shared across all users so keep-alive connections (and HTTP/2 streams) are reused.
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=5.0),
+            # Google only compresses responses for user agents that mention gzip
+            headers={"Accept-Encoding": "gzip", "User-Agent": "make-my-schedule (gzip)"},
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _error_from_response(response: httpx.Response) -> CalendarAPIError:
+    message = response.reason_phrase
+    reason = None
+    try:
+        error = response.json().get("error", {})
+        message = error.get("message", message)
+        errors = error.get("errors") or [{}]
+        reason = errors[0].get("reason")
+    except ValueError:
+        pass
+    retry_after = response.headers.get("Retry-After")
+    return CalendarAPIError(
+        response.status_code,
+        message,
+        reason=reason,
+        retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+    )
+
+
+class AsyncCalendarClient:
+    """
+    Non-blocking counterpart of google_calendar_crud for a user's primary calendar.
+    With a user_id, reads are served from the user's event mirror and writes go through to it.
+    """
+
+    def __init__(self, credentials, user_id: str = None, http_client: httpx.AsyncClient = None):
+        self.credentials = credentials
+        self.user_id = user_id
+        self.http = http_client or get_http_client()
+
+    async def _auth_headers(self) -> dict:
+        if not self.credentials.valid:
+            # Normally the background refresher got here first; this is the fallback
+            if self.user_id:
+                # The stored credentials, which another worker may have refreshed, replace ours
+                credentials = await refresh_credentials(self.user_id)
+                if credentials is not None:
+                    self.credentials = credentials
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, lambda: self.credentials.refresh(GoogleAuthRequest()))
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    async def request(self, method: str, path: str, params=None, json=None, timeout: float = None,
+                      operation: str = None):
+        """
+        Send one Calendar API request and return the decoded JSON body (None for empty bodies).
+        Calls are paced by the outbound scheduler and throttled ones are retried.
+        Raises CalendarAPIError on non-2xx responses.
+        """
+        idempotent = method != "POST"
+        attempts = 0
+
+        async def send():
+            nonlocal attempts
+            attempts += 1
+            try:
+                return await self._send(method, path, params, json, timeout)
+            except CalendarAPIError as error:
+                # The failed attempt before this one may already have deleted the event
+                if method == "DELETE" and attempts > 1 and error.status in GONE_STATUSES:
+                    return None
+                raise
+
+        with calendar_api_seconds.time(operation=operation or f"{method} {path}", client="async"):
+            return await outbound.run(
+                "google_calendar",
+                send,
+                lambda error: google_retry_info(error, idempotent),
+                user_id=self.user_id,
+            )
+
+    async def _send(self, method: str, path: str, params=None, json=None, timeout: float = None):
+        try:
+            response = await self.http.request(
+                method,
+                f"{CALENDAR_BASE_URL}{path}",
+                params=params,
+                json=json,
+                headers=await self._auth_headers(),
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.TimeoutException as error:
+            raise CalendarAPIError(504, f"Request timed out: {error!r}", reason="timeout")
+        except httpx.TransportError as error:
+            raise CalendarAPIError(503, f"Transport error: {error!r}", reason="transport")
+        if response.status_code >= 400:
+            raise _error_from_response(response)
+        if not response.content:
+            return None
+        return response.json()
+
+    async def _read(self, operation: str, params: dict, fetch):
+        # Identical concurrent reads for the same user share one request
+        if not self.user_id:
+            return await fetch()
+        return await calendar_reads.aread(read_key(self.user_id, operation, params), fetch)
+
+    def _wrote(self):
+        if self.user_id:
+            calendar_reads.invalidate(self.user_id)
+
+    async def list_events_page(self, params: dict, calendar_id: str = "primary"):
+        return await self._read(
+            f"events.list:{calendar_id}",
+            params,
+            lambda: self.request(
+                "GET", f"/calendars/{calendar_id}/events", params=params, operation="calendar.events.list"
+            ),
+        )
+
+    async def iter_events(self, params: dict = None, fields: str = None, page_size: int = 250,
+                          calendar_id: str = "primary", coalesce: bool = False):
+        """
+        Yield events one at a time, following nextPageToken, so only one page is held in memory.
+        `fields` asks for a partial response with just those event fields, e.g. "id,summary,start,end".
+        With coalesce, pages go through the shared read cache like list_events_page.
+        """
+        request_params = {"maxResults": page_size, **(params or {})}
+        if fields:
+            request_params["fields"] = f"nextPageToken,items({fields})"
+        while True:
+            if coalesce:
+                page = await self.list_events_page(dict(request_params), calendar_id)
+            else:
+                page = await self.request(
+                    "GET", f"/calendars/{calendar_id}/events", params=request_params,
+                    operation="calendar.events.list",
+                )
+            for event in page.get("items", []):
+                yield event
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return
+            request_params["pageToken"] = page_token
+
+    async def freebusy(self, calendar_ids, time_min: datetime, time_max: datetime):
+        """
+        Busy periods for the given calendars (e.g. attendee emails) between time_min and time_max.
+        """
+        body = {
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "items": [{"id": calendar_id} for calendar_id in calendar_ids],
+        }
+        return await self._read("freeBusy", body, lambda: self.request(
+            "POST", "/freeBusy", json=body, operation="calendar.freebusy.query"
+        ))
+
+    # --- Push notification channels ---
+    async def watch_events(self, channel_id: str, address: str, token: str, ttl_seconds: int,
+                           calendar_id: str = "primary"):
+        """
+        Open an events.watch channel; Google POSTs a notification to address on every change.
+        Returns the channel resource (id, resourceId, expiration in ms).
+        """
+        body = {
+            "id": channel_id,
+            "type": "web_hook",
+            "address": address,
+            "token": token,
+            "params": {"ttl": str(ttl_seconds)},
+        }
+        return await self.request(
+            "POST", f"/calendars/{calendar_id}/events/watch", json=body, operation="calendar.events.watch"
+        )
+
+    async def stop_channel(self, channel_id: str, resource_id: str):
+        await self.request(
+            "POST", "/channels/stop", json={"id": channel_id, "resourceId": resource_id},
+            operation="calendar.channels.stop",
+        )
+
+    # --- Same surface as app.core.google_calendar_crud ---
+    async def create_event(self, event_body):
+        try:
+            event = await self.request(
+                "POST", "/calendars/primary/events", json=event_body, operation="calendar.events.insert"
+            )
+        except CalendarAPIError as error:
+            return {"error": str(error)}
+        self._wrote()
+        if self.user_id:
+            mirror = await aget_event_mirror(self.user_id)
+            await mirror.aupsert(event)
+        return event
+
+    async def list_events(self, max_results=10, time_min=None):
+        try:
+            if self.user_id:
+                mirror = await aget_event_mirror(self.user_id)
+                await mirror.aensure_fresh(self)
+                time_min_dt = datetime.fromisoformat(time_min.replace("Z", "+00:00")) if time_min else None
+                if mirror.covers(time_min_dt):
+                    return mirror.upcoming(time_min_dt, max_results)
+            params = {"singleEvents": "true", "orderBy": "startTime"}
+            if time_min:
+                params["timeMin"] = time_min
+            events = []
+            async for event in self.iter_events(params, page_size=max_results, coalesce=True):
+                events.append(event)
+                if len(events) >= max_results:
+                    break
+            return events
+        except CalendarAPIError as error:
+            return {"error": str(error)}
+
+    async def update_event(self, event_id, updated_event_body):
+        try:
+            event = await self.request(
+                "PUT", f"/calendars/primary/events/{event_id}", json=updated_event_body,
+                operation="calendar.events.update",
+            )
+        except CalendarAPIError as error:
+            return {"error": str(error)}
+        self._wrote()
+        if self.user_id:
+            mirror = await aget_event_mirror(self.user_id)
+            await mirror.aupsert(event)
+        return event
+
+    async def delete_event(self, event_id):
+        try:
+            await self.request(
+                "DELETE", f"/calendars/primary/events/{event_id}", operation="calendar.events.delete"
+            )
+        except CalendarAPIError as error:
+            return {"error": str(error)}
+        self._wrote()
+        if self.user_id:
+            mirror = await aget_event_mirror(self.user_id)
+            await mirror.aremove(event_id)
+        return {"status": "deleted"}
+
+    async def find_events_by_title(self, title: str, limit=5):
+        """
+        Ranked exact, prefix and fuzzy title matches over the user's whole mirrored calendar.
+        """
+        mirror = await aget_event_mirror(self.user_id)
+        try:
+            await mirror.aensure_fresh(self)
+        except CalendarAPIError as error:
+            return {"error": str(error)}
+        return mirror.search_titles(title, limit)
+
+    async def find_event_by_title(self, title: str, max_results=10):
+        """
+        Search for an event with exact title match (case insensitive).
+        With a user_id this is an index lookup over the mirrored calendar; otherwise
+        only the next max_results upcoming events are scanned.
+        """
+        if self.user_id:
+            candidates = await self.find_events_by_title(title)
+            if isinstance(candidates, dict) and "error" in candidates:
+                return None
+            exact = [c for c in candidates if c["match"] == "exact"]
+            return exact[0]["event"] if exact else None
+
+        now = datetime.utcnow().isoformat() + "Z"
+        events = await self.list_events(max_results=max_results, time_min=now)
+        if isinstance(events, dict) and "error" in events:
+            return None
+        for event in events:
+            summary = event.get("summary", "")
+            if summary.strip().lower() == title.strip().lower():
+                return event
+        return None
+
+    async def check_conflicts(self, intervals):
+        try:
+            mirror = await aget_event_mirror(self.user_id)
+            await mirror.aensure_fresh(self)
+        except CalendarAPIError as error:
+            return {"error": str(error)}
+        index = await aget_conflict_index(self.user_id)
+        return index.find_conflicts_many(intervals)
+
+
+def get_async_calendar_client(credentials, user_id: str = None) -> AsyncCalendarClient:
+    return AsyncCalendarClient(credentials, user_id=user_id)
@@ -2,6 +2,9 @@ import os
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from dotenv import load_dotenv
+from app.core.credential_store import create_credential_store
+from app.core.google_api import invalidate_calendar_service
+from app.core.state_backend import state_backend
 
 load_dotenv()
 
@@ -9,7 +12,7 @@ CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 
-token_storage = {}
+credential_store = create_credential_store(state_backend)
 
 def get_flow():
     return Flow.from_client_config(
@@ -27,7 +30,19 @@ def get_flow():
     )
 
 def save_token(user_id: str, credentials: Credentials):
-    token_storage[user_id] = credentials
+    credential_store.save(user_id, credentials)
+    invalidate_calendar_service(user_id)
 
 def get_token(user_id: str):
-    return token_storage.get(user_id)
+    return credential_store.get(user_id)
+
+# Async variants: with a shared backend the store reads and writes SQLite, so keep it off the loop
+async def asave_token(user_id: str, credentials: Credentials):
+    await state_backend.arun(credential_store.save, user_id, credentials)
+    invalidate_calendar_service(user_id)
+
+async def aget_token(user_id: str):
+    return await state_backend.arun(credential_store.get, user_id)
+
+async def auser_ids():
+    return await state_backend.arun(credential_store.user_ids)
@@ -0,0 +1,177 @@
+import asyncio
+import copy
+import os
+import threading
+from datetime import datetime
+
+from app.core.event_mirror import aget_event_mirror, event_bounds, get_event_mirror
+
+# Changed events kept on top of the sorted arrays before the index is rebuilt
+OVERLAY_LIMIT = int(os.getenv("CONFLICT_INDEX_OVERLAY_LIMIT", "256"))
+
+# user_id -> (mirror version, ConflictIndex)
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class ConflictIndex:
+    """
+    Static interval tree over a calendar's busy events.
+
+    Events are kept in arrays sorted by start time; the array doubles as an implicit
+    balanced tree (the middle of every range is its root) where each root also stores
+    the latest end time in its subtree. An overlap query only descends into subtrees
+    that can still contain an overlapping event, so it costs O(log n + k).
+    Events changed since the build sit in a small overlay that is scanned linearly.
+    """
+
+    def __init__(self, events, time_zone: str):
+        self.time_zone = time_zone
+        intervals = [interval for interval in map(self._interval, events) if interval is not None]
+        intervals.sort(key=lambda item: item[0])
+
+        self.starts = [item[0] for item in intervals]
+        self.ends = [item[1] for item in intervals]
+        self.events = [item[2] for item in intervals]
+        self.max_end = list(self.ends)
+        self._build(0, len(intervals))
+        self.ids = {event.get("id") for event in self.events}
+        # event id -> interval of events added or changed since the build; ids hidden from the arrays
+        self.overlay = {}
+        self.hidden = set()
+
+    def __len__(self):
+        return len(self.starts) - len(self.hidden) + len(self.overlay)
+
+    def _interval(self, event):
+        if event.get("transparency") == "transparent":
+            return None
+        start, end = event_bounds(event, self.time_zone)
+        if start is None:
+            return None
+        return start.timestamp(), end.timestamp(), event
+
+    def with_changes(self, changes: dict) -> "ConflictIndex":
+        """
+        A copy with {event id: event, or None if removed} applied to the overlay;
+        the sorted arrays are shared, so this costs O(overlay + changes).
+        """
+        index = copy.copy(self)
+        index.overlay, index.hidden = dict(self.overlay), set(self.hidden)
+        for event_id, event in changes.items():
+            index.overlay.pop(event_id, None)
+            if event_id in self.ids:
+                index.hidden.add(event_id)
+            interval = self._interval(event) if event is not None else None
+            if interval is not None:
+                index.overlay[event_id] = interval
+        return index
+
+    def _build(self, lo: int, hi: int) -> float:
+        if lo >= hi:
+            return float("-inf")
+        mid = (lo + hi) // 2
+        self.max_end[mid] = max(self.ends[mid], self._build(lo, mid), self._build(mid + 1, hi))
+        return self.max_end[mid]
+
+    def _query(self, lo: int, hi: int, start: float, end: float, found: list):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self.max_end[mid] <= start:
+            return
+        self._query(lo, mid, start, end, found)
+        if self.starts[mid] >= end:
+            return
+        if self.ends[mid] > start:
+            found.append(mid)
+        self._query(mid + 1, hi, start, end, found)
+
+    def find_conflicts(self, start: datetime, end: datetime):
+        """
+        Return the events overlapping [start, end), ordered by start time.
+        """
+        start, end = start.timestamp(), end.timestamp()
+        found = []
+        self._query(0, len(self.starts), start, end, found)
+        if not self.overlay and not self.hidden:
+            return [self.events[i] for i in found]
+        matches = [
+            (self.starts[i], self.events[i]) for i in found if self.events[i].get("id") not in self.hidden
+        ]
+        matches += [
+            (event_start, event) for event_start, event_end, event in self.overlay.values()
+            if event_start < end and event_end > start
+        ]
+        matches.sort(key=lambda item: item[0])
+        return [event for _, event in matches]
+
+    def find_conflicts_many(self, intervals):
+        """
+        Check many candidate (start, end) intervals at once.
+        Returns one list of conflicting events per candidate, in input order.
+        """
+        return [self.find_conflicts(start, end) for start, end in intervals]
+
+
+def _store(user_id: str, version: int, index: ConflictIndex):
+    with _indexes_lock:
+        cached = _indexes.get(user_id)
+        if cached is None or cached[0] <= version:
+            _indexes[user_id] = (version, index)
+
+
+def _updated_index(user_id: str, mirror):
+    """
+    The cached index brought up to the mirror's version from its change log,
+    or None if it has to be rebuilt.
+    """
+    with _indexes_lock:
+        cached = _indexes.get(user_id)
+    if cached is None or cached[1].time_zone != mirror.time_zone:
+        return None
+    version, index = cached
+    if version == mirror.version:
+        return index
+    delta = mirror.changes_since(version)
+    if delta is None or len(index.overlay) + len(delta[1]) > OVERLAY_LIMIT:
+        return None
+    version, changes = delta
+    index = index.with_changes(changes)
+    _store(user_id, version, index)
+    return index
+
+
+def _rebuild(user_id: str, mirror) -> ConflictIndex:
+    version, events = mirror.versioned_events()
+    index = ConflictIndex(events.values(), mirror.time_zone)
+    _store(user_id, version, index)
+    return index
+
+
+def get_conflict_index(user_id: str) -> ConflictIndex:
+    """
+    Return the conflict index for a user's mirrored calendar, applying the mirror's
+    changes since the last build and only rebuilding once they pile up.
+    """
+    mirror = get_event_mirror(user_id)
+    return _updated_index(user_id, mirror) or _rebuild(user_id, mirror)
+
+
+async def aget_conflict_index(user_id: str) -> ConflictIndex:
+    """
+    get_conflict_index for the event loop; a rebuild runs in a worker thread.
+    """
+    mirror = await aget_event_mirror(user_id)
+    index = _updated_index(user_id, mirror)
+    if index is None:
+        index = await asyncio.to_thread(_rebuild, user_id, mirror)
+    return index
+
+
+def format_conflict(event: dict, time_zone: str) -> str:
+    start, end = event_bounds(event, time_zone)
+    return (
+        f"⚠️ Conflict with existing event '{event.get('summary', 'Untitled event')}' "
+        f"from {start.isoformat()} to {end.isoformat()}. Please choose another time."
+    )
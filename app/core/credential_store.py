@@ -0,0 +1,72 @@
+import json
+import threading
+
+from google.oauth2.credentials import Credentials
+
+
+class InMemoryCredentialStore:
+    """
+    Credentials kept in process memory; lost on restart.
+    """
+
+    def __init__(self):
+        self._credentials = {}
+
+    def get(self, user_id: str):
+        return self._credentials.get(user_id)
+
+    def save(self, user_id: str, credentials: Credentials):
+        self._credentials[user_id] = credentials
+
+    def delete(self, user_id: str):
+        self._credentials.pop(user_id, None)
+
+    def user_ids(self):
+        return list(self._credentials)
+
+
+class SharedCredentialStore:
+    """
+    Credentials kept in a shared state backend as authorized-user JSON, so every worker sees them.
+    Parsed objects are cached per process and reused until the stored JSON changes.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._loaded = {}  # user_id -> (stored JSON, Credentials)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str):
+        data = self.backend.get("credentials", user_id)
+        if data is None:
+            self._loaded.pop(user_id, None)
+            return None
+        loaded = self._loaded.get(user_id)
+        if loaded is not None and loaded[0] == data:
+            return loaded[1]
+        credentials = Credentials.from_authorized_user_info(json.loads(data))
+        with self._lock:
+            self._loaded[user_id] = (data, credentials)
+        return credentials
+
+    def save(self, user_id: str, credentials: Credentials):
+        data = credentials.to_json()
+        self.backend.put("credentials", user_id, data)
+        with self._lock:
+            self._loaded[user_id] = (data, credentials)
+
+    def delete(self, user_id: str):
+        self.backend.delete("credentials", user_id)
+        self._loaded.pop(user_id, None)
+
+    def user_ids(self):
+        return self.backend.keys("credentials")
+
+
+def create_credential_store(backend):
+    """
+    Shared store for backends visible to other workers, plain in-memory store otherwise.
+    """
+    if backend.shared:
+        return SharedCredentialStore(backend)
+    return InMemoryCredentialStore()
@@ -0,0 +1,11 @@
+class CalendarAPIError(Exception):
+    """
+    Non-2xx response from the Google Calendar REST API.
+    """
+
+    def __init__(self, status: int, message: str, reason: str = None, retry_after: float = None):
+        super().__init__(f"<CalendarAPIError {status}: {message}>")
+        self.status = status
+        self.message = message
+        self.reason = reason
+        self.retry_after = retry_after
@@ -0,0 +1,543 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from googleapiclient.errors import HttpError
+
+from app.core.errors import CalendarAPIError
+from app.core.metrics import calendar_api_seconds
+from app.core.outbound import google_retry_info, outbound
+from app.core.read_coalescer import calendar_reads, read_key
+from app.core.state_backend import state_backend
+from app.core.title_index import TitleIndex
+
+MIRROR_REFRESH_SECONDS = float(os.getenv("EVENT_MIRROR_REFRESH_SECONDS", "30"))
+# With a live watch channel, changes arrive as push notifications; poll only as a safety net
+MIRROR_WATCHED_REFRESH_SECONDS = float(os.getenv("EVENT_MIRROR_WATCHED_REFRESH_SECONDS", "900"))
+MIRROR_LOOKBACK_DAYS = int(os.getenv("EVENT_MIRROR_LOOKBACK_DAYS", "30"))
+DEFAULT_TIMEZONE = "Asia/Dhaka"
+# Changed event ids remembered for incremental consumers (the conflict index) between full syncs
+CHANGE_LOG_LIMIT = int(os.getenv("EVENT_MIRROR_CHANGE_LOG_LIMIT", "1024"))
+
+# user_id -> EventMirror
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def parse_event_time(value: dict, time_zone: str = DEFAULT_TIMEZONE):
+    """
+    Convert an event start/end object into a timezone-aware datetime.
+    All-day events only carry a `date`, which starts at midnight in the calendar's time zone.
+    """
+    if not value:
+        return None
+    if value.get("dateTime"):
+        dt = datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = pytz.timezone(value.get("timeZone") or time_zone).localize(dt)
+        return dt
+    if value.get("date"):
+        day = datetime.strptime(value["date"], "%Y-%m-%d")
+        return pytz.timezone(value.get("timeZone") or time_zone).localize(day)
+    return None
+
+
+def event_bounds(event: dict, time_zone: str = DEFAULT_TIMEZONE):
+    """
+    Return (start, end) of an event as aware datetimes, or (None, None) if it has no usable times.
+    """
+    start = parse_event_time(event.get("start"), time_zone)
+    end = parse_event_time(event.get("end"), time_zone)
+    if start is None or end is None:
+        return None, None
+    return start, end
+
+
+class EventMirror:
+    """
+    Local copy of one user's primary calendar, kept current with sync-token deltas.
+    With a shared state backend, the last synced state is stored there so new workers
+    start from a sync token, and a per-user write generation tells each worker's
+    mirror when another worker has written to the calendar.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.events = {}
+        self.titles = TitleIndex()
+        self.sync_token = None
+        self.time_zone = DEFAULT_TIMEZONE
+        self.window_start = None
+        self.last_refresh = 0.0
+        # Set when a change is known to be missing; the next read refreshes regardless of age
+        self.dirty = False
+        self.version = 0
+        # event id -> version it last changed at, for changes made after version _replaced_version
+        # (when the events were last replaced wholesale); consumers behind that rebuild from scratch
+        self._changed = {}
+        self._replaced_version = 0
+        # Shared write generation this mirror has caught up with
+        self.generation = None
+        # Event ids changed since the state was last saved, and whether a full sync replaced it
+        self._unsaved = set()
+        self._unsaved_reset = False
+        # Guards the events and sync state; only held for in-memory work, never across a Google call
+        self._lock = threading.RLock()
+        # One listing at a time per mirror: worker threads take _sync_lock, the event loop _async_lock
+        self._sync_lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        return self._is_stale(*self._shared_freshness())
+
+    async def ais_stale(self) -> bool:
+        return self._is_stale(*await state_backend.arun(self._shared_freshness))
+
+    def _is_stale(self, watched: bool, shared_generation) -> bool:
+        if self.sync_token is None or self.dirty:
+            return True
+        age = time.monotonic() - self.last_refresh
+        if age >= MIRROR_REFRESH_SECONDS and (age >= MIRROR_WATCHED_REFRESH_SECONDS or not watched):
+            return True
+        return state_backend.shared and shared_generation != self.generation
+
+    def _shared_freshness(self):
+        """
+        (watched, shared write generation) from the state backend.
+        """
+        # Expiry (epoch seconds) of the user's watch channel, kept by app.core.watch_channels
+        watched = float(state_backend.get("watch_expiry", self.user_id) or 0) > time.time()
+        return watched, self._shared_generation()
+
+    def invalidate(self, all_workers: bool = True):
+        """
+        Mark the mirror stale after a change notification, here and (with a shared
+        backend) on every other worker, so the next read pulls the delta.
+        """
+        with self._lock:
+            self.dirty = True
+            if all_workers and state_backend.shared:
+                state_backend.incr("mirror_generation", self.user_id)
+
+    def _shared_generation(self):
+        if not state_backend.shared:
+            return None
+        return int(state_backend.get("mirror_generation", self.user_id) or 0)
+
+    def ensure_fresh(self, service):
+        """
+        Refresh from Google if the mirror has never synced or the refresh interval has passed.
+        """
+        with self._sync_lock:
+            if self.is_stale():
+                self.refresh(service)
+
+    def refresh(self, service):
+        """
+        Pull changes since the last sync token, or do a full sync if there is none.
+        A 410 Gone means the token expired and the mirror is rebuilt from scratch.
+        The listing runs without holding the mirror lock; see _begin_sync.
+        """
+        if self.sync_token is None:
+            self.full_sync(service)
+            return
+        generation = self._shared_generation()
+        seen_version = self._begin_sync()
+        try:
+            items, next_token, time_zone = self._fetch_all(service, {"syncToken": self.sync_token})
+        except HttpError as error:
+            if error.resp.status == 410:
+                self.full_sync(service)
+                return
+            self.dirty = True
+            raise
+        except Exception:
+            self.dirty = True
+            raise
+        self._commit_delta(items, next_token, time_zone, generation, seen_version)
+        if items and state_backend.shared:
+            self.save_state()
+
+    def full_sync(self, service):
+        generation = self._shared_generation()
+        seen_version = self._begin_sync()
+        window_start = datetime.now(pytz.utc) - timedelta(days=MIRROR_LOOKBACK_DAYS)
+        try:
+            items, next_token, time_zone = self._fetch_all(service, {"timeMin": window_start.isoformat()})
+        except Exception:
+            self.dirty = True
+            raise
+        self._commit_full(window_start, items, next_token, time_zone, generation, seen_version)
+        if state_backend.shared:
+            self.save_state()
+
+    def _fetch_all(self, service, params):
+        items = []
+        page_token = None
+        time_zone = None
+        while True:
+            request_params = {
+                "calendarId": "primary",
+                "singleEvents": True,
+                "maxResults": 2500,
+                **params,
+            }
+            if page_token:
+                request_params["pageToken"] = page_token
+            response = calendar_reads.read(
+                read_key(self.user_id, "events.list", request_params),
+                lambda: self._list_page(service, request_params),
+            )
+            items.extend(response.get("items", []))
+            time_zone = response.get("timeZone") or time_zone
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return items, response.get("nextSyncToken"), time_zone
+
+    def _list_page(self, service, request_params):
+        with calendar_api_seconds.time(operation="calendar.events.list", client="sync"):
+            return outbound.run_sync(
+                "google_calendar",
+                service.events().list(**request_params).execute,
+                google_retry_info,
+                user_id=self.user_id,
+            )
+
+    # --- Async variants used with AsyncCalendarClient ---
+    async def aensure_fresh(self, client):
+        """
+        Async ensure_fresh; concurrent callers share a single refresh.
+        """
+        if not await self.ais_stale():
+            return
+        async with self._async_lock:
+            if await self.ais_stale():
+                await self.arefresh(client)
+
+    async def arefresh(self, client):
+        if self.sync_token is None:
+            await self.afull_sync(client)
+            return
+        generation = await state_backend.arun(self._shared_generation)
+        seen_version = self._begin_sync()
+        try:
+            items, next_token, time_zone = await self._afetch_all(client, {"syncToken": self.sync_token})
+        except CalendarAPIError as error:
+            if error.status == 410:
+                await self.afull_sync(client)
+                return
+            self.dirty = True
+            raise
+        except BaseException:
+            self.dirty = True
+            raise
+        # Applied on a worker thread, so the loop never waits on the mirror lock
+        await asyncio.to_thread(self._commit_delta, items, next_token, time_zone, generation, seen_version)
+        if items and state_backend.shared:
+            await state_backend.arun(self.save_state)
+
+    async def afull_sync(self, client):
+        generation = await state_backend.arun(self._shared_generation)
+        seen_version = self._begin_sync()
+        window_start = datetime.now(pytz.utc) - timedelta(days=MIRROR_LOOKBACK_DAYS)
+        try:
+            items, next_token, time_zone = await self._afetch_all(
+                client, {"timeMin": window_start.isoformat()}
+            )
+        except BaseException:
+            self.dirty = True
+            raise
+        await asyncio.to_thread(
+            self._commit_full, window_start, items, next_token, time_zone, generation, seen_version
+        )
+        if state_backend.shared:
+            await state_backend.arun(self.save_state)
+
+    async def _afetch_all(self, client, params):
+        items = []
+        page_token = None
+        time_zone = None
+        while True:
+            request_params = {"singleEvents": True, "maxResults": 2500, **params}
+            if page_token:
+                request_params["pageToken"] = page_token
+            response = await client.list_events_page(request_params)
+            items.extend(response.get("items", []))
+            time_zone = response.get("timeZone") or time_zone
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return items, response.get("nextSyncToken"), time_zone
+
+    def _begin_sync(self) -> int:
+        """
+        Start a listing that runs without the mirror lock. Returns the version it is
+        based on; a change made or notified while it is in flight leaves the mirror
+        dirty, so the next read pulls another delta.
+        """
+        with self._lock:
+            self.dirty = False
+            return self.version
+
+    def _commit_delta(self, items, sync_token, time_zone, generation, seen_version):
+        with self._lock:
+            written = self.version != seen_version
+            self._apply(items)
+            self._mark_synced(sync_token, time_zone, generation)
+            # The listing may predate a write-through made meanwhile; pull the next delta too
+            self.dirty = self.dirty or written
+
+    def _commit_full(self, window_start, items, sync_token, time_zone, generation, seen_version):
+        # Build the new events and title index first, so the lock only covers the swap
+        events, titles = self._index(items)
+        with self._lock:
+            written = self.version != seen_version
+            self.events, self.titles, self.window_start = events, titles, window_start
+            self._unsaved, self._unsaved_reset = set(events) if state_backend.shared else set(), True
+            self.version += 1
+            self._replaced()
+            self._mark_synced(sync_token, time_zone, generation)
+            # Writes made during the listing may be missing from it
+            self.dirty = self.dirty or written
+
+    @staticmethod
+    def _index(items):
+        events, titles = {}, TitleIndex()
+        for event in items:
+            if event.get("status") != "cancelled" and event.get("id"):
+                events[event["id"]] = event
+                titles.add(event["id"], event.get("summary", ""))
+        return events, titles
+
+    def _apply(self, items):
+        for event in items:
+            if event.get("status") == "cancelled":
+                self.events.pop(event.get("id"), None)
+                self.titles.remove(event.get("id"))
+            elif event.get("id"):
+                self.events[event["id"]] = event
+                self.titles.add(event["id"], event.get("summary", ""))
+            if state_backend.shared and event.get("id"):
+                self._unsaved.add(event["id"])
+        if items:
+            self.version += 1
+            self._note_changes(event.get("id") for event in items)
+
+    def _note_changes(self, event_ids):
+        for event_id in event_ids:
+            if event_id:
+                self._changed[event_id] = self.version
+        if len(self._changed) > CHANGE_LOG_LIMIT:
+            self._replaced()
+
+    def _replaced(self):
+        self._changed = {}
+        self._replaced_version = self.version
+
+    def _mark_synced(self, sync_token, time_zone, generation=None):
+        self.sync_token = sync_token
+        if time_zone:
+            self.time_zone = time_zone
+        self.last_refresh = time.monotonic()
+        self.generation = generation
+
+    # --- Shared state ---
+    def _events_namespace(self) -> str:
+        return f"mirror_events:{self.user_id}"
+
+    def save_state(self):
+        """
+        Write the events changed since the last save (all of them after a full sync)
+        together with the sync token they are current to. Blocks on the backend; from
+        async code run it through state_backend.arun.
+        """
+        namespace = self._events_namespace()
+        with self._lock:
+            changed, reset = self._unsaved, self._unsaved_reset
+            self._unsaved, self._unsaved_reset = set(), False
+            # Event dicts are replaced, never mutated, so they can be serialized after the lock
+            current = {event_id: self.events.get(event_id) for event_id in changed}
+            state = {
+                "sync_token": self.sync_token,
+                "time_zone": self.time_zone,
+                "window_start": self.window_start.isoformat() if self.window_start else None,
+            }
+        writes = [
+            (namespace, event_id, json.dumps(event) if event is not None else None)
+            for event_id, event in current.items()
+        ]
+        writes.append(("mirrors", self.user_id, json.dumps(state)))
+        try:
+            state_backend.write_many(writes, clear=namespace if reset else None)
+        except Exception:
+            with self._lock:
+                self._unsaved |= changed
+                self._unsaved_reset = self._unsaved_reset or reset
+            raise
+
+    def load_state(self):
+        """
+        Start from the state another worker saved; the next read catches up with a delta sync.
+        """
+        # Read the sync token before the events: events saved in between are newer than the
+        # token, and the delta from it re-applies them, whereas the reverse would skip changes
+        data = state_backend.get("mirrors", self.user_id)
+        if data is None:
+            return
+        state = json.loads(data)
+        events, titles = self._index(json.loads(value) for _, value in state_backend.items(self._events_namespace()))
+        with self._lock:
+            self.events, self.titles = events, titles
+            self.version += 1
+            self._replaced()
+            self.sync_token = state["sync_token"]
+            self.time_zone = state["time_zone"]
+            self.window_start = datetime.fromisoformat(state["window_start"]) if state["window_start"] else None
+            self.dirty = True
+
+    def _note_write(self):
+        if not state_backend.shared:
+            return
+        generation = state_backend.incr("mirror_generation", self.user_id)
+        # Only skip the refresh if no other worker wrote in between
+        with self._lock:
+            if self.generation is not None and generation == self.generation + 1:
+                self.generation = generation
+
+    # --- Write-through from the CRUD helpers ---
+    def _store(self, event: dict):
+        with self._lock:
+            if event.get("recurrence"):
+                # Recurring masters are stored as expanded instances; let the next delta bring them in.
+                self.dirty = True
+            else:
+                self._apply([event])
+
+    def _drop(self, event_id: str):
+        with self._lock:
+            if self.events.pop(event_id, None) is not None:
+                self.titles.remove(event_id)
+                self.version += 1
+                self._note_changes([event_id])
+                if state_backend.shared:
+                    self._unsaved.add(event_id)
+
+    def upsert(self, event: dict):
+        self._store(event)
+        self._note_write()
+
+    def remove(self, event_id: str):
+        self._drop(event_id)
+        self._note_write()
+
+    async def aupsert(self, event: dict):
+        self._store(event)
+        await state_backend.arun(self._note_write)
+
+    async def aremove(self, event_id: str):
+        self._drop(event_id)
+        await state_backend.arun(self._note_write)
+
+    # --- Read paths ---
+    def covers(self, time_min: datetime = None) -> bool:
+        """
+        Whether reads starting at time_min can be answered from the mirror.
+        """
+        if self.sync_token is None:
+            return False
+        return time_min is None or (self.window_start is not None and time_min >= self.window_start)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.events.values())
+
+    def versioned_events(self):
+        """
+        (version, {event id: event}) taken together, for consumers that diff against the last version.
+        """
+        with self._lock:
+            return self.version, dict(self.events)
+
+    def changes_since(self, version: int):
+        """
+        (version, {event id: event, or None if removed}) of the events changed after version,
+        or None when the change log does not reach back that far.
+        """
+        with self._lock:
+            if version < self._replaced_version:
+                return None
+            changed = {
+                event_id: self.events.get(event_id)
+                for event_id, changed_at in self._changed.items() if changed_at > version
+            }
+            return self.version, changed
+
+    def upcoming(self, time_min: datetime = None, max_results: int = 10):
+        """
+        Events ending after time_min ordered by start time, like events.list with orderBy=startTime.
+        """
+        selected = []
+        for event in self.snapshot():
+            start, end = event_bounds(event, self.time_zone)
+            if start is None or (time_min is not None and end <= time_min):
+                continue
+            selected.append((start, event))
+        selected.sort(key=lambda pair: pair[0])
+        return [event for _, event in selected[:max_results]]
+
+
+    def search_titles(self, title: str, limit: int = 5):
+        """
+        Ranked title matches as dicts with id, summary, start, score and match type.
+        Equal scores prefer the next upcoming event, then the most recent past one.
+        """
+        now = datetime.now(pytz.utc)
+        with self._lock:
+            matches = [
+                (self.events[event_id], score, match)
+                for event_id, score, match in self.titles.search(title, limit=limit * 4)
+            ]
+
+        def rank(item):
+            event, score, _ = item
+            start, _ = event_bounds(event, self.time_zone)
+            if start is None:
+                return (-score, 2, 0.0)
+            distance = (start - now).total_seconds()
+            return (-score, 0 if distance >= 0 else 1, abs(distance))
+
+        matches.sort(key=rank)
+        return [
+            {
+                "id": event["id"],
+                "summary": event.get("summary", ""),
+                "start": event.get("start", {}),
+                "score": round(score, 3),
+                "match": match,
+                "event": event,
+            }
+            for event, score, match in matches[:limit]
+        ]
+
+
+async def aget_event_mirror(user_id: str) -> EventMirror:
+    """
+    get_event_mirror for async code: a new mirror loads its shared state through state_backend.arun.
+    """
+    mirror = _mirrors.get(user_id)
+    if mirror is not None:
+        return mirror
+    return await state_backend.arun(get_event_mirror, user_id)
+
+
+def get_event_mirror(user_id: str) -> EventMirror:
+    with _mirrors_lock:
+        mirror = _mirrors.get(user_id)
+        if mirror is None:
+            mirror = _mirrors[user_id] = EventMirror(user_id)
+            if state_backend.shared:
+                mirror.load_state()
+        return mirror
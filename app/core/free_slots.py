@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from app.core.errors import CalendarAPIError
+from app.core.event_mirror import aget_event_mirror, event_bounds
+
+MINUTE = timedelta(minutes=1)
+
+
+def busy_bitmap(busy_intervals, window_start: datetime, minutes: int, buffer_minutes: int = 0) -> np.ndarray:
+    """
+    Rasterize (start, end) intervals into a minute-resolution boolean array starting at window_start.
+    Each interval is widened by buffer_minutes on both sides.
+    """
+    if not busy_intervals:
+        return np.zeros(minutes, dtype=bool)
+    base = window_start.timestamp()
+    bounds = np.array([(start.timestamp(), end.timestamp()) for start, end in busy_intervals])
+    starts = np.floor((bounds[:, 0] - base) / 60).astype(np.int64) - buffer_minutes
+    ends = np.ceil((bounds[:, 1] - base) / 60).astype(np.int64) + buffer_minutes
+    starts = np.clip(starts, 0, minutes)
+    ends = np.clip(ends, 0, minutes)
+    keep = ends > starts
+
+    # +1 where a busy interval opens, -1 where it closes; a positive running sum means busy
+    delta = np.zeros(minutes + 1, dtype=np.int32)
+    np.add.at(delta, starts[keep], 1)
+    np.add.at(delta, ends[keep], -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def working_hours_mask(window_start: datetime, minutes: int, time_zone: str,
+                       work_start_hour: int = 9, work_end_hour: int = 17, weekdays=(0, 1, 2, 3, 4)) -> np.ndarray:
+    """
+    Boolean array marking the minutes that fall inside working hours in the given time zone.
+    Each local day's hours are localized on their own, so they stay put across DST changes.
+    """
+    tz = pytz.timezone(time_zone)
+    mask = np.zeros(minutes, dtype=bool)
+    base = window_start.timestamp()
+    first = window_start.astimezone(tz).date()
+    last = (window_start + minutes * MINUTE).astimezone(tz).date()
+    for offset in range((last - first).days + 1):
+        day = first + timedelta(days=offset)
+        if day.weekday() not in weekdays:
+            continue
+        midnight = datetime.combine(day, datetime.min.time())
+        start = tz.localize(midnight + timedelta(hours=work_start_hour))
+        end = tz.localize(midnight + timedelta(hours=work_end_hour))
+        lo = max(0, int(np.ceil((start.timestamp() - base) / 60)))
+        hi = min(minutes, int(np.floor((end.timestamp() - base) / 60)))
+        if hi > lo:
+            mask[lo:hi] = True
+    return mask
+
+
+def free_runs(free: np.ndarray, min_length: int):
+    """
+    Start and end indexes of the runs of True in `free` that are at least min_length long.
+    """
+    edges = np.diff(np.concatenate(([0], free.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    long_enough = (ends - starts) >= min_length
+    return starts[long_enough], ends[long_enough]
+
+
+def find_free_slots(busy_intervals, window_start: datetime, window_end: datetime, duration_minutes: int,
+                    time_zone: str, work_start_hour: int = 9, work_end_hour: int = 17,
+                    weekdays=(0, 1, 2, 3, 4), buffer_minutes: int = 0, max_results: int = 10):
+    """
+    Find free windows of at least duration_minutes between window_start and window_end.
+    Returns dicts with the earliest slot start/end in each window and the window's end.
+    """
+    window_start = window_start.replace(second=0, microsecond=0) + (
+        MINUTE if window_start.second or window_start.microsecond else timedelta()
+    )
+    minutes = int((window_end - window_start).total_seconds() // 60)
+    if minutes <= 0:
+        return []
+    free = ~busy_bitmap(busy_intervals, window_start, minutes, buffer_minutes)
+    free &= working_hours_mask(window_start, minutes, time_zone, work_start_hour, work_end_hour, weekdays)
+    starts, ends = free_runs(free, duration_minutes)
+
+    tz = pytz.timezone(time_zone)
+    slots = []
+    for start, end in zip(starts[:max_results].tolist(), ends[:max_results].tolist()):
+        slot_start = (window_start + start * MINUTE).astimezone(tz)
+        slots.append({
+            "start": slot_start.isoformat(),
+            "end": (slot_start + duration_minutes * MINUTE).isoformat(),
+            "window_end": (window_start + end * MINUTE).astimezone(tz).isoformat(),
+        })
+    return slots
+
+
+async def collect_busy_intervals(client, time_min: datetime, time_max: datetime, attendees=None):
+    """
+    Busy intervals for the user's primary calendar (from the event mirror) plus any
+    attendee calendars (via freeBusy). Raises CalendarAPIError if Google fails.
+    """
+    mirror = await aget_event_mirror(client.user_id)
+    await mirror.aensure_fresh(client)
+    busy = []
+    for event in mirror.snapshot():
+        if event.get("transparency") == "transparent":
+            continue
+        start, end = event_bounds(event, mirror.time_zone)
+        if start is not None and start < time_max and end > time_min:
+            busy.append((start, end))
+
+    if attendees:
+        response = await client.freebusy(attendees, time_min, time_max)
+        for calendar_id, calendar in response.get("calendars", {}).items():
+            if calendar.get("errors"):
+                raise CalendarAPIError(400, f"freeBusy failed for {calendar_id}: {calendar['errors']}")
+            for period in calendar.get("busy", []):
+                busy.append((
+                    datetime.fromisoformat(period["start"].replace("Z", "+00:00")),
+                    datetime.fromisoformat(period["end"].replace("Z", "+00:00")),
+                ))
+    return busy, mirror.time_zone
@@ -1,4 +1,84 @@
-from googleapiclient.discovery import build
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
-def get_calendar_service(credentials):
-    return build("calendar", "v3", credentials=credentials)
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+
+# Calendar v3 discovery document shipped with the app, so building a service
+# never goes to the network for it.
+DISCOVERY_DOC_PATH = os.path.join(os.path.dirname(__file__), "discovery", "calendar.v3.json")
+
+# Services (and their keep-alive transports) kept per user on each thread
+SERVICE_CACHE_SIZE = int(os.getenv("CALENDAR_SERVICE_CACHE_SIZE", "64"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("CALENDAR_HTTP_TIMEOUT", "30"))
+# Point the client at another Calendar v3 server, e.g. benchmarks/fake_calendar.py
+CALENDAR_BASE_URL = os.getenv("GOOGLE_CALENDAR_BASE_URL")
+
+# httplib2 transports are not thread-safe, so each thread keeps its own
+# user_id -> (credentials, generation, service) LRU, most recently used last
+_thread_services = threading.local()
+# user_id -> generation, bumped when the user's credentials change so every thread rebuilds
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def load_discovery_document() -> dict:
+    """
+    Load and parse the bundled Calendar discovery document once per process.
+    """
+    with open(DISCOVERY_DOC_PATH, encoding="utf-8") as f:
+        document = json.load(f)
+    if CALENDAR_BASE_URL:
+        base_url = CALENDAR_BASE_URL.rstrip("/") + "/"
+        document["baseUrl"] = base_url
+        document["rootUrl"] = base_url[: -len(document["servicePath"])]
+    return document
+
+
+def build_calendar_service(credentials):
+    """
+    Build a Calendar service from the bundled discovery document with its own
+    keep-alive HTTP transport.
+    """
+    http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+    return build_from_document(load_discovery_document(), http=http)
+
+
+def get_calendar_service(credentials, user_id: str = None):
+    """
+    Return a Calendar service for the given credentials.
+    With a user_id the service and its pooled transport are reused on the calling
+    thread (bounded LRU) until the user's credentials are replaced or invalidated.
+    A service must only be used on the thread that got it.
+    """
+    if user_id is None:
+        return build_calendar_service(credentials)
+
+    cache = getattr(_thread_services, "cache", None)
+    if cache is None:
+        cache = _thread_services.cache = OrderedDict()
+    generation = _generations.get(user_id, 0)
+    cached = cache.get(user_id)
+    if cached is not None and cached[0] is credentials and cached[1] == generation:
+        cache.move_to_end(user_id)
+        return cached[2]
+
+    service = build_calendar_service(credentials)
+    cache[user_id] = (credentials, generation, service)
+    cache.move_to_end(user_id)
+    while len(cache) > SERVICE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return service
+
+
+def invalidate_calendar_service(user_id: str):
+    """
+    Make every thread rebuild the user's service, e.g. after their credentials were refreshed or replaced.
+    """
+    with _generations_lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
@@ -1,51 +1,149 @@
+import time
 from datetime import datetime
-from googleapiclient.discovery import build
+from itertools import islice
+import httplib2
+from google.auth.exceptions import GoogleAuthError
 from googleapiclient.errors import HttpError
+from app.core.google_api import get_calendar_service
+from app.core.event_mirror import event_bounds, get_event_mirror
+from app.core.conflicts import ConflictIndex, get_conflict_index
+from app.core.outbound import GONE_STATUSES, MAX_RETRIES, google_retry_info, outbound, retry_delay
+from app.core.metrics import calendar_api_seconds
+from app.core.read_coalescer import calendar_reads, read_key
 
-def get_calendar_service(credentials):
-    return build("calendar", "v3", credentials=credentials)
+# Google Calendar accepts at most 50 calls per batch HTTP request.
+BATCH_SIZE = 50
+# Failures of the round trip itself (network, TLS, token refresh) rather than an API error response
+TRANSPORT_ERRORS = (httplib2.HttpLib2Error, OSError, GoogleAuthError)
 
-def create_event(service, event_body):
+def _parse_time_min(time_min):
+    if not time_min:
+        return None
+    return datetime.fromisoformat(time_min.replace("Z", "+00:00"))
+
+def _execute(request, user_id=None, idempotent=True, delete=False):
+    # Paced by the outbound scheduler; rate-limited (and, if idempotent, 5xx) calls are retried
+    attempts = 0
+
+    def call():
+        nonlocal attempts
+        attempts += 1
+        try:
+            return request.execute()
+        except HttpError as error:
+            # The failed attempt before this one may already have deleted the event
+            if delete and attempts > 1 and error.resp.status in GONE_STATUSES:
+                return None
+            raise
+
+    with calendar_api_seconds.time(operation=request.methodId, client="sync"):
+        return outbound.run_sync(
+            "google_calendar",
+            call,
+            lambda error: google_retry_info(error, idempotent),
+            user_id=user_id,
+        )
+
+def create_event(service, event_body, user_id=None):
     try:
-        event = service.events().insert(calendarId='primary', body=event_body).execute()
+        event = _execute(service.events().insert(calendarId='primary', body=event_body), user_id, idempotent=False)
+        if user_id:
+            calendar_reads.invalidate(user_id)
+            get_event_mirror(user_id).upsert(event)
         return event
     except HttpError as error:
         return {"error": str(error)}
 
-def list_events(service, max_results=10, time_min=None):
+def list_events(service, max_results=10, time_min=None, user_id=None):
+    """
+    List upcoming events. With a user_id the events are served from the user's
+    local mirror, which only asks Google for changes once per refresh interval.
+    """
     try:
+        if user_id:
+            mirror = get_event_mirror(user_id)
+            mirror.ensure_fresh(service)
+            time_min_dt = _parse_time_min(time_min)
+            if mirror.covers(time_min_dt):
+                return mirror.upcoming(time_min_dt, max_results)
         params = {
-            'calendarId': 'primary',
-            'maxResults': max_results,
             'singleEvents': True,
             'orderBy': 'startTime'
         }
         if time_min:
             params['timeMin'] = time_min
-        events_result = service.events().list(**params).execute()
-        return events_result.get('items', [])
+        return list(islice(iter_events(service, params, page_size=max_results, user_id=user_id), max_results))
     except HttpError as error:
         return {"error": str(error)}
 
-def update_event(service, event_id, updated_event_body):
+def iter_events(service, params=None, fields=None, page_size=250, user_id=None, calendar_id='primary'):
+    """
+    Yield events one at a time, following nextPageToken, so only one page is held in memory.
+    `fields` asks for a partial response with just those event fields, e.g. "id,summary,start,end".
+    With a user_id, pages go through the shared read cache.
+    """
+    request_params = {'calendarId': calendar_id, 'maxResults': page_size, **(params or {})}
+    if fields:
+        request_params['fields'] = f"nextPageToken,items({fields})"
+    while True:
+        if user_id:
+            page = calendar_reads.read(
+                read_key(user_id, "events.list", request_params),
+                lambda: _execute(service.events().list(**request_params), user_id),
+            )
+        else:
+            page = _execute(service.events().list(**request_params))
+        yield from page.get('items', [])
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            return
+        request_params = {**request_params, 'pageToken': page_token}
+
+def update_event(service, event_id, updated_event_body, user_id=None):
     try:
-        event = service.events().update(
-            calendarId='primary', eventId=event_id, body=updated_event_body).execute()
+        event = _execute(service.events().update(
+            calendarId='primary', eventId=event_id, body=updated_event_body), user_id)
+        if user_id:
+            calendar_reads.invalidate(user_id)
+            get_event_mirror(user_id).upsert(event)
         return event
     except HttpError as error:
         return {"error": str(error)}
 
-def delete_event(service, event_id):
+def delete_event(service, event_id, user_id=None):
     try:
-        service.events().delete(calendarId='primary', eventId=event_id).execute()
+        _execute(service.events().delete(calendarId='primary', eventId=event_id), user_id, delete=True)
+        if user_id:
+            calendar_reads.invalidate(user_id)
+            get_event_mirror(user_id).remove(event_id)
         return {"status": "deleted"}
     except HttpError as error:
         return {"error": str(error)}
 
-def find_event_by_title(service, title: str, max_results=10):
+def find_events_by_title(service, title: str, user_id, limit=5):
     """
-    Search for an upcoming event with exact title match (case insensitive).
+    Ranked exact, prefix and fuzzy title matches over the user's whole mirrored calendar.
     """
+    mirror = get_event_mirror(user_id)
+    try:
+        mirror.ensure_fresh(service)
+    except HttpError as error:
+        return {"error": str(error)}
+    return mirror.search_titles(title, limit)
+
+def find_event_by_title(service, title: str, max_results=10, user_id=None):
+    """
+    Search for an event with exact title match (case insensitive).
+    With a user_id this is an index lookup over the mirrored calendar; otherwise
+    only the next max_results upcoming events are scanned.
+    """
+    if user_id:
+        candidates = find_events_by_title(service, title, user_id)
+        if isinstance(candidates, dict) and "error" in candidates:
+            return None
+        exact = [c for c in candidates if c["match"] == "exact"]
+        return exact[0]["event"] if exact else None
+
     now = datetime.utcnow().isoformat() + "Z"
     events = list_events(service, max_results=max_results, time_min=now)
     if isinstance(events, dict) and "error" in events:
@@ -55,3 +153,157 @@ def find_event_by_title(service, title: str, max_results=10):
         if summary.strip().lower() == title.strip().lower():
             return event
     return None
+
+def check_conflicts(service, intervals, user_id):
+    """
+    Return the existing events overlapping each (start, end) interval, in input order.
+    Uses the user's mirrored calendar, so long events that started earlier are caught too.
+    """
+    try:
+        get_event_mirror(user_id).ensure_fresh(service)
+    except HttpError as error:
+        return {"error": str(error)}
+    return get_conflict_index(user_id).find_conflicts_many(intervals)
+
+# --- Bulk operations packed into Calendar batch HTTP requests ---
+def _execute_batches(service, requests, user_id=None):
+    """
+    Run (request_id, HttpRequest) pairs in batches of BATCH_SIZE.
+    Calls rejected by rate limits are resubmitted in a later batch with backoff.
+    Returns a dict of request_id -> response, or {"error": ...} for failed calls.
+    """
+    results = {}
+    if user_id:
+        calendar_reads.invalidate(user_id)
+
+    pending = list(requests)
+    attempt = 0
+    while pending:
+        throttled = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None and google_retry_info(exception, idempotent=False)[0]:
+                throttled[request_id] = exception
+                return
+            results[request_id] = {"error": str(exception)} if exception else (response or {})
+
+        for offset in range(0, len(pending), BATCH_SIZE):
+            chunk = pending[offset:offset + BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, request in chunk:
+                batch.add(request, request_id=request_id)
+            try:
+                # Each call in the batch counts against the quota
+                with calendar_api_seconds.time(operation="batch", client="sync"):
+                    outbound.run_sync(
+                        "google_calendar",
+                        batch.execute,
+                        lambda error: google_retry_info(error, idempotent=False),
+                        user_id=user_id,
+                        cost=len(chunk),
+                    )
+            except (HttpError, *TRANSPORT_ERRORS) as error:
+                for request_id, _ in chunk:
+                    results.setdefault(request_id, {"error": str(error)})
+
+        if not throttled:
+            break
+        if attempt >= MAX_RETRIES:
+            for request_id, exception in throttled.items():
+                results[request_id] = {"error": str(exception)}
+            break
+        time.sleep(retry_delay(attempt))
+        attempt += 1
+        pending = [(request_id, request) for request_id, request in pending if request_id in throttled]
+    return results
+
+def _bulk_conflicts(service, event_bodies, user_id):
+    """
+    Conflict-check a whole set of new events in one pass: against the user's calendar,
+    and against earlier events of the same set. Returns one list of conflicts per body.
+    """
+    mirror = get_event_mirror(user_id)
+    mirror.ensure_fresh(service)
+    intervals = [event_bounds(body, mirror.time_zone) for body in event_bodies]
+    checkable = [(i, interval) for i, interval in enumerate(intervals) if interval[0] is not None]
+    existing = get_conflict_index(user_id).find_conflicts_many([interval for _, interval in checkable])
+
+    conflicts = [[] for _ in event_bodies]
+    for (i, _), found in zip(checkable, existing):
+        conflicts[i] = found
+
+    proposed = ConflictIndex(
+        [dict(body, id=str(i)) for i, body in enumerate(event_bodies)], mirror.time_zone
+    )
+    for i, (start, end) in checkable:
+        for other in proposed.find_conflicts(start, end):
+            j = int(other["id"])
+            if j < i and not conflicts[j]:
+                conflicts[i].append(event_bodies[j])
+    return conflicts
+
+def create_events_bulk(service, event_bodies, user_id=None, check_conflicts=True):
+    """
+    Insert many events with as few HTTP round trips as possible.
+    Returns one result per body, in order: the created event, or {"error": ...}.
+    Conflicting events (with the calendar or an earlier event in the set) are skipped
+    when check_conflicts is set; that needs a user_id.
+    """
+    results = [None] * len(event_bodies)
+    if check_conflicts and user_id:
+        try:
+            conflicts = _bulk_conflicts(service, event_bodies, user_id)
+        except (HttpError, *TRANSPORT_ERRORS) as error:
+            return [{"error": str(error)} for _ in event_bodies]
+        for i, found in enumerate(conflicts):
+            if found:
+                results[i] = {
+                    "error": "conflict",
+                    "conflicts": [
+                        {"id": event.get("id"), "summary": event.get("summary", "Untitled event")}
+                        for event in found
+                    ],
+                }
+
+    requests = [
+        (str(i), service.events().insert(calendarId='primary', body=body))
+        for i, body in enumerate(event_bodies) if results[i] is None
+    ]
+    for request_id, response in _execute_batches(service, requests, user_id).items():
+        results[int(request_id)] = response
+        if user_id and "error" not in response:
+            get_event_mirror(user_id).upsert(response)
+    return results
+
+def update_events_bulk(service, updates, user_id=None):
+    """
+    Apply many (event_id, updated_event_body) pairs. Returns one result per pair, in order.
+    """
+    requests = [
+        (str(i), service.events().update(calendarId='primary', eventId=event_id, body=body))
+        for i, (event_id, body) in enumerate(updates)
+    ]
+    results = [None] * len(updates)
+    for request_id, response in _execute_batches(service, requests, user_id).items():
+        results[int(request_id)] = response
+        if user_id and "error" not in response:
+            get_event_mirror(user_id).upsert(response)
+    return results
+
+def delete_events_bulk(service, event_ids, user_id=None):
+    """
+    Delete many events. Returns {"status": "deleted"} or {"error": ...} per id, in order.
+    """
+    requests = [
+        (str(i), service.events().delete(calendarId='primary', eventId=event_id))
+        for i, event_id in enumerate(event_ids)
+    ]
+    results = [None] * len(event_ids)
+    for request_id, response in _execute_batches(service, requests, user_id).items():
+        if "error" in response:
+            results[int(request_id)] = response
+            continue
+        results[int(request_id)] = {"status": "deleted"}
+        if user_id:
+            get_event_mirror(user_id).remove(event_ids[int(request_id)])
+    return results
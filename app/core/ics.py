@@ -0,0 +1,299 @@
+import codecs
+import re
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.core.event_mirror import parse_event_time
+
+ICS_HEADER = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Make My Schedule//Calendar Export//EN\r\nCALSCALE:GREGORIAN\r\n"
+ICS_FOOTER = "END:VCALENDAR\r\n"
+
+ICS_STATUS = {"confirmed": "CONFIRMED", "tentative": "TENTATIVE", "cancelled": "CANCELLED"}
+
+DURATION_PATTERN = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+# Properties passed to Google as raw content lines
+RECURRENCE_PROPERTIES = ("RRULE", "EXRULE", "RDATE", "EXDATE")
+# Google accepts at most five reminder overrides
+MAX_REMINDERS = 5
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """
+    Fold a content line at 75 octets as RFC 5545 requires, without splitting UTF-8 characters.
+    """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Back off to a character boundary
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_ics_time(name: str, value: dict) -> str:
+    if value.get("date"):
+        return f"{name};VALUE=DATE:{value['date'].replace('-', '')}"
+    dt = parse_event_time(value)
+    return f"{name}:{dt.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')}"
+
+
+def event_to_vevent(event: dict, stamp: datetime = None) -> str:
+    """
+    One Calendar event resource as a VEVENT block. Only summary, start, end, location,
+    description, status and recurrence are carried over.
+    A changed or cancelled instance of a recurring event becomes an override of its
+    series: the series' UID plus a RECURRENCE-ID, and only STATUS:CANCELLED if cancelled.
+    """
+    stamp = stamp or datetime.now(pytz.utc)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.get('recurringEventId') or event['id']}@google.com",
+        f"DTSTAMP:{stamp.strftime('%Y%m%dT%H%M%SZ')}",
+    ]
+    if event.get("originalStartTime"):
+        lines.append(format_ics_time("RECURRENCE-ID", event["originalStartTime"]))
+        if event.get("status") == "cancelled":
+            # Cancelled instances carry no times or details of their own
+            lines += [
+                format_ics_time("DTSTART", event["originalStartTime"]),
+                "STATUS:CANCELLED",
+                "END:VEVENT",
+            ]
+            return "".join(fold_line(line) for line in lines)
+    lines += [
+        format_ics_time("DTSTART", event["start"]),
+        format_ics_time("DTEND", event["end"]),
+        f"SUMMARY:{escape_text(event.get('summary', ''))}",
+    ]
+    if event.get("location"):
+        lines.append(f"LOCATION:{escape_text(event['location'])}")
+    if event.get("description"):
+        lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+    if event.get("status") in ICS_STATUS:
+        lines.append(f"STATUS:{ICS_STATUS[event['status']]}")
+    # Google already stores recurrence as RRULE/EXDATE/RDATE content lines
+    lines.extend(event.get("recurrence", []))
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+# --- Parsing ---
+def unescape_text(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+async def _iter_raw_lines(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ics_lines(chunks):
+    """
+    Unfolded content lines from an async iterable of byte chunks, decoded incrementally.
+    """
+    current = None
+    async for line in _iter_raw_lines(chunks):
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_content_line(line: str):
+    """
+    Split "NAME;PARAM=value:VALUE" into (NAME, {PARAM: value}, VALUE).
+    """
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        raise ValueError(f"Malformed content line: {line[:80]!r}")
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+async def iter_vevents(chunks):
+    """
+    Yield each VEVENT of an iCalendar stream as soon as its END line is read, as
+    {"props": {NAME: [(params, value, line), ...]}, "alarms": [props, ...]}.
+    Only the event being parsed is held in memory.
+    """
+    event = None
+    alarm = None
+    depth = 0  # nesting inside the current VEVENT
+    async for line in iter_ics_lines(chunks):
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError:
+            continue
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event, depth = {"props": {}, "alarms": []}, 0
+            elif event is not None:
+                depth += 1
+                if value.upper() == "VALARM" and depth == 1:
+                    alarm = {}
+            continue
+        if name == "END" and event is not None:
+            if depth == 0:
+                yield event
+                event = None
+            else:
+                if value.upper() == "VALARM" and depth == 1 and alarm is not None:
+                    event["alarms"].append(alarm)
+                    alarm = None
+                depth -= 1
+            continue
+        if event is None:
+            continue
+        target = alarm if alarm is not None and depth == 1 else event["props"] if depth == 0 else None
+        if target is not None:
+            target.setdefault(name, []).append((params, value, line))
+
+
+def parse_ics_duration(value: str) -> timedelta:
+    match = DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    parts = {name: int(amount or 0) for name, amount in match.groupdict().items() if name != "sign"}
+    duration = timedelta(
+        weeks=parts["weeks"], days=parts["days"],
+        hours=parts["hours"], minutes=parts["minutes"], seconds=parts["seconds"],
+    )
+    return -duration if match.group("sign") == "-" else duration
+
+
+def ics_time_zone(params: dict, default_tz: str) -> str:
+    tzid = params.get("TZID", "").lstrip("/")
+    if tzid in pytz.all_timezones_set:
+        return tzid
+    return default_tz
+
+
+def parse_ics_time(value: str, params: dict, default_tz: str):
+    """
+    A DATE value as a date, a DATE-TIME value as an aware datetime (UTC, TZID or default_tz).
+    """
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d").date()
+    if value.endswith("Z"):
+        return pytz.utc.localize(datetime.strptime(value[:-1], "%Y%m%dT%H%M%S"))
+    naive = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    return pytz.timezone(ics_time_zone(params, default_tz)).localize(naive)
+
+
+def _first(props: dict, name: str):
+    values = props.get(name)
+    return values[0] if values else None
+
+
+def recurrence_stamp(value) -> str:
+    """
+    A RECURRENCE-ID as it appears in EXDATE values and Calendar instance ids:
+    YYYYMMDD for all-day series, the UTC YYYYMMDDTHHMMSSZ otherwise.
+    """
+    if not isinstance(value, datetime):
+        return value.strftime("%Y%m%d")
+    return value.astimezone(pytz.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def exdate_line(recurrence_id) -> str:
+    if not isinstance(recurrence_id, datetime):
+        return f"EXDATE;VALUE=DATE:{recurrence_stamp(recurrence_id)}"
+    return f"EXDATE:{recurrence_stamp(recurrence_id)}"
+
+
+def vevent_fields(event: dict, default_tz: str) -> dict:
+    """
+    The fields of a parsed VEVENT needed to build a Calendar event body.
+    recurrence_id is set for overrides of one instance of a recurring series.
+    Raises ValueError for events without a usable start.
+    """
+    props = event["props"]
+    dtstart = _first(props, "DTSTART")
+    if dtstart is None:
+        raise ValueError("VEVENT has no DTSTART")
+    start = parse_ics_time(dtstart[1], dtstart[0], default_tz)
+    all_day = not isinstance(start, datetime)
+
+    dtend, duration = _first(props, "DTEND"), _first(props, "DURATION")
+    if dtend is not None:
+        end = parse_ics_time(dtend[1], dtend[0], default_tz)
+    elif duration is not None:
+        end = start + parse_ics_duration(duration[1])
+    else:
+        end = start + (timedelta(days=1) if all_day else timedelta(minutes=30))
+
+    reminders = []
+    for alarm in event["alarms"]:
+        trigger, action = _first(alarm, "TRIGGER"), _first(alarm, "ACTION")
+        if trigger is None or trigger[0].get("VALUE") == "DATE-TIME":
+            continue
+        try:
+            offset = parse_ics_duration(trigger[1])
+        except ValueError:
+            continue
+        if offset <= timedelta(0) and len(reminders) < MAX_REMINDERS:
+            reminders.append({
+                "method": "email" if action and action[1].upper() == "EMAIL" else "popup",
+                "minutes": int(-offset.total_seconds() // 60),
+            })
+
+    text = {name: unescape_text(_first(props, name)[1]) if _first(props, name) else None
+            for name in ("UID", "SUMMARY", "LOCATION", "DESCRIPTION")}
+    status = _first(props, "STATUS")
+    recurrence_id = _first(props, "RECURRENCE-ID")
+    transparency = _first(props, "TRANSP")
+    return {
+        "uid": text["UID"],
+        "summary": text["SUMMARY"] or "Untitled event",
+        "start": start,
+        "end": end,
+        "location": text["LOCATION"],
+        "description": text["DESCRIPTION"],
+        "status": status[1].lower() if status else None,
+        "transparent": bool(transparency and transparency[1].upper() == "TRANSPARENT"),
+        "reminders": reminders,
+        "time_zone": ics_time_zone(dtstart[0], default_tz),
+        "recurrence": [line for name in RECURRENCE_PROPERTIES for _, _, line in props.get(name, [])],
+        "recurrence_id": parse_ics_time(recurrence_id[1], recurrence_id[0], default_tz) if recurrence_id else None,
+    }
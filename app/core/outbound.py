@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from googleapiclient.errors import HttpError
+
+from app.core.errors import CalendarAPIError
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+# A retried delete answered with one of these was applied by an attempt whose response got lost
+GONE_STATUSES = {404, 410}
+
+MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "5"))
+BASE_DELAY_SECONDS = float(os.getenv("OUTBOUND_BASE_DELAY_SECONDS", "0.5"))
+MAX_DELAY_SECONDS = float(os.getenv("OUTBOUND_MAX_DELAY_SECONDS", "32"))
+
+# upstream -> (requests per second, burst) for the upstream as a whole and for each user.
+# Defaults follow Calendar's default quotas (10k/min per project, 600/min per user) and Groq's 30 RPM tier.
+UPSTREAM_LIMITS = {
+    "google_calendar": (
+        float(os.getenv("GOOGLE_RATE_PER_SECOND", "150")),
+        float(os.getenv("GOOGLE_RATE_BURST", "300")),
+    ),
+    "groq": (
+        float(os.getenv("GROQ_RATE_PER_SECOND", "0.5")),
+        float(os.getenv("GROQ_RATE_BURST", "5")),
+    ),
+}
+USER_LIMITS = {
+    "google_calendar": (
+        float(os.getenv("GOOGLE_USER_RATE_PER_SECOND", "10")),
+        float(os.getenv("GOOGLE_USER_RATE_BURST", "100")),
+    ),
+}
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# The UpstreamClock of the call being timed in this context, if any
+_upstream_clock = ContextVar("upstream_clock", default=None)
+
+
+class TokenBucket:
+    """
+    Classic token bucket; callers wait until enough tokens have accumulated.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, cost: float) -> float:
+        """
+        Take `cost` tokens, possibly going into debt; return how long the caller must wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= cost
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    async def acquire(self, cost: float = 1.0):
+        wait = self._reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, cost: float = 1.0):
+        wait = self._reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+
+
+def retry_delay(attempt: int, retry_after: float = None) -> float:
+    """
+    Exponential backoff with full jitter, unless the server told us how long to wait.
+    """
+    if retry_after is not None:
+        return min(retry_after, MAX_DELAY_SECONDS)
+    return random.uniform(0, min(MAX_DELAY_SECONDS, BASE_DELAY_SECONDS * 2 ** attempt))
+
+
+def google_retry_info(error, idempotent: bool = True):
+    """
+    (retryable, retry_after) for a Calendar API error.
+    Rate limits are always retried; server errors and timeouts only for idempotent calls.
+    """
+    if isinstance(error, CalendarAPIError):
+        status, reason, retry_after = error.status, error.reason, error.retry_after
+    elif isinstance(error, HttpError):
+        status = error.resp.status
+        details = error.error_details if isinstance(error.error_details, list) else []
+        reason = next((d.get("reason") for d in details if isinstance(d, dict) and d.get("reason")), None)
+        header = error.resp.get("retry-after")
+        retry_after = float(header) if header and header.isdigit() else None
+    else:
+        return False, None
+
+    if status == 429 or (status == 403 and reason in RATE_LIMIT_REASONS):
+        return True, retry_after
+    if idempotent and status >= 500:
+        return True, retry_after
+    return False, None
+
+
+class UpstreamClock:
+    """
+    The asyncio.Timeout of a call, and how long the call waited in queued() so far.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.queued = 0.0
+
+
+@asynccontextmanager
+async def upstream_timeout(seconds: float):
+    """
+    asyncio.timeout(seconds) that only counts time spent upstream: waiting for an LLM slot,
+    a rate-limit token or a backoff inside it is left out. Yields the UpstreamClock.
+    """
+    async with asyncio.timeout(seconds) as timeout:
+        clock = UpstreamClock(timeout)
+        token = _upstream_clock.set(clock)
+        try:
+            yield clock
+        finally:
+            _upstream_clock.reset(token)
+
+
+@asynccontextmanager
+async def queued():
+    """
+    Pause the surrounding upstream_timeout while waiting on our own limits.
+    """
+    clock = _upstream_clock.get()
+    if clock is None:
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = clock.timeout.when()
+    if clock.timeout.expired():
+        deadline = None
+    if deadline is not None:
+        clock.timeout.reschedule(None)
+    try:
+        yield
+    finally:
+        waited = loop.time() - started
+        clock.queued += waited
+        if deadline is not None:
+            clock.timeout.reschedule(deadline + waited)
+
+
+class OutboundScheduler:
+    """
+    Paces outbound calls with per-upstream and per-user token buckets and retries
+    throttled calls with backoff. LLM calls also share a global concurrency cap.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._llm_slots = None
+
+    def bucket(self, upstream: str, user_id: str = None):
+        limits = USER_LIMITS.get(upstream) if user_id else UPSTREAM_LIMITS.get(upstream)
+        if limits is None:
+            return None
+        key = (upstream, user_id)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(*limits)
+            return bucket
+
+    def _buckets_for(self, upstream: str, user_id: str = None):
+        buckets = [self.bucket(upstream)]
+        if user_id:
+            buckets.append(self.bucket(upstream, user_id))
+        return [bucket for bucket in buckets if bucket is not None]
+
+    async def run(self, upstream: str, call, retry_info, user_id: str = None, cost: float = 1.0):
+        """
+        Await call() under the rate limits, retrying while retry_info(error) says so.
+        """
+        attempt = 0
+        while True:
+            async with queued():
+                for bucket in self._buckets_for(upstream, user_id):
+                    await bucket.acquire(cost)
+            try:
+                return await call()
+            except Exception as error:
+                retryable, retry_after = retry_info(error)
+                if not retryable or attempt >= MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt, retry_after)
+                logger.warning("%s throttled (%s); retry %d in %.2fs", upstream, error, attempt + 1, delay)
+                async with queued():
+                    await asyncio.sleep(delay)
+                attempt += 1
+
+    def run_sync(self, upstream: str, call, retry_info, user_id: str = None, cost: float = 1.0):
+        """
+        Blocking run() for code that already runs in executor threads.
+        """
+        attempt = 0
+        while True:
+            for bucket in self._buckets_for(upstream, user_id):
+                bucket.acquire_sync(cost)
+            try:
+                return call()
+            except Exception as error:
+                retryable, retry_after = retry_info(error)
+                if not retryable or attempt >= MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt, retry_after)
+                logger.warning("%s throttled (%s); retry %d in %.2fs", upstream, error, attempt + 1, delay)
+                time.sleep(delay)
+                attempt += 1
+
+    @asynccontextmanager
+    async def llm_slot(self):
+        """
+        Hold one of the LLM_MAX_CONCURRENCY global LLM call slots.
+        """
+        if self._llm_slots is None:
+            self._llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        async with queued():
+            await self._llm_slots.acquire()
+        try:
+            yield
+        finally:
+            self._llm_slots.release()
+
+
+outbound = OutboundScheduler()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
+
+READ_CACHE_TTL_SECONDS = float(os.getenv("CALENDAR_READ_CACHE_TTL_SECONDS", "2"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReadCoalescer:
+    """
+    Single-flight + short TTL cache for idempotent reads.
+
+    Keys are tuples whose first element is the user id. Concurrent reads of the same
+    key share one in-flight call, completed results are reused for ttl_seconds, and
+    invalidate(user_id) drops everything for a user after a write.
+    """
+
+    def __init__(self, ttl_seconds: float = READ_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.counters = Counter(hits=0, misses=0, coalesced=0)
+        self._cache = {}          # key -> (expires_at, value)
+        self._inflight = {}       # key -> _Call (threads)
+        self._ainflight = {}      # key -> asyncio.Future (event loop)
+        self._generations = Counter()  # user_id -> write generation
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.counters["hits"] += 1
+            return True, cached[1]
+        return False, None
+
+    def _store(self, key, generation, value):
+        # A write that landed while this read was in flight makes the result stale; don't cache it
+        if self._generations[key[0]] == generation:
+            self._cache[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def read(self, key, fetch):
+        """
+        Return fetch() for key, sharing the call with concurrent threads reading the same key.
+        """
+        with self._lock:
+            hit, value = self._cached(key)
+            if hit:
+                return value
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                generation = self._generations[key[0]]
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fetch()
+        except Exception as error:
+            call.error = error
+            raise
+        else:
+            with self._lock:
+                self._store(key, generation, call.value)
+            return call.value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is call:
+                    del self._inflight[key]
+            call.done.set()
+
+    async def aread(self, key, fetch):
+        """
+        Async read(): fetch is a coroutine function; concurrent tasks share one await.
+        """
+        with self._lock:
+            hit, value = self._cached(key)
+            if hit:
+                return value
+            future = self._ainflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._ainflight[key] = asyncio.get_running_loop().create_future()
+                generation = self._generations[key[0]]
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                self._store(key, generation, value)
+            return value
+        finally:
+            with self._lock:
+                if self._ainflight.get(key) is future:
+                    del self._ainflight[key]
+
+    def invalidate(self, user_id: str):
+        """
+        Forget cached and in-flight reads for a user, so reads after a write go to Google.
+        """
+        with self._lock:
+            self._generations[user_id] += 1
+            for entries in (self._cache, self._inflight, self._ainflight):
+                for key in [key for key in entries if key[0] == user_id]:
+                    del entries[key]
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+
+def read_key(user_id: str, operation: str, params: dict) -> tuple:
+    return (user_id, operation, repr(sorted(params.items())))
+
+
+# Shared by the sync CRUD helpers, the event mirror and the async client
+calendar_reads = ReadCoalescer()
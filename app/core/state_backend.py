@@ -0,0 +1,238 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+
+# Identifies this process when several workers share one state backend
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+CHECKPOINT_DB_PATH = os.getenv("SCHEDULE_CHECKPOINT_DB", "checkpoints.sqlite")
+# How often a lease that is waited for is tried again
+LEASE_POLL_SECONDS = 0.05
+
+
+class MemoryStateBackend:
+    """
+    Process-local state: credentials, conversation threads and mirrors are lost on
+    restart and are not visible to other workers.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._data = {}  # namespace -> {key: value}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str):
+        return self._data.get(namespace, {}).get(key)
+
+    def put(self, namespace: str, key: str, value: str):
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = value
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+
+    def keys(self, namespace: str):
+        return list(self._data.get(namespace, {}))
+
+    def items(self, namespace: str):
+        return list(self._data.get(namespace, {}).items())
+
+    def write_many(self, writes, clear: str = None):
+        """
+        Apply (namespace, key, value) writes together, deleting keys whose value is None.
+        clear empties that namespace first.
+        """
+        with self._lock:
+            if clear is not None:
+                self._data.pop(clear, None)
+            for namespace, key, value in writes:
+                if value is None:
+                    self._data.get(namespace, {}).pop(key, None)
+                else:
+                    self._data.setdefault(namespace, {})[key] = value
+
+    def incr(self, namespace: str, key: str) -> int:
+        with self._lock:
+            values = self._data.setdefault(namespace, {})
+            values[key] = str(int(values.get(key) or 0) + 1)
+            return int(values[key])
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> bool:
+        # A single process always holds every lease
+        return True
+
+    def release_lease(self, name: str):
+        pass
+
+    async def arun(self, fn, *args):
+        # Nothing here blocks, so there is no need to leave the event loop
+        return fn(*args)
+
+    async def create_checkpointer(self):
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        return InMemorySaver()
+
+
+class SqliteStateBackend:
+    """
+    State in SQLite files in WAL mode, safe to share between worker processes on one host.
+    Key-value state lives in `path`; conversation threads use a LangGraph checkpointer on `checkpoint_path`.
+    OAuth refresh tokens are stored in `path` unencrypted, so the file is created readable by its owner only.
+    Calls block on disk and on other workers' write locks: from async code, go through arun().
+    """
+
+    shared = True
+
+    def __init__(self, path: str, checkpoint_path: str = CHECKPOINT_DB_PATH):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self._local = threading.local()
+        # Create the file private before SQLite opens it (its -wal and -shm files copy the mode)
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, namespace: str, key: str, value: str):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)", (namespace, key, value)
+        )
+
+    def delete(self, namespace: str, key: str):
+        self._conn().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def keys(self, namespace: str):
+        return [row[0] for row in self._conn().execute("SELECT key FROM kv WHERE namespace = ?", (namespace,))]
+
+    def items(self, namespace: str):
+        return self._conn().execute("SELECT key, value FROM kv WHERE namespace = ?", (namespace,)).fetchall()
+
+    def write_many(self, writes, clear: str = None):
+        """
+        Apply (namespace, key, value) writes in one transaction, deleting keys whose value is None.
+        clear empties that namespace first.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if clear is not None:
+                conn.execute("DELETE FROM kv WHERE namespace = ?", (clear,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)",
+                [write for write in writes if write[2] is not None],
+            )
+            conn.executemany(
+                "DELETE FROM kv WHERE namespace = ? AND key = ?",
+                [(namespace, key) for namespace, key, value in writes if value is None],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def incr(self, namespace: str, key: str) -> int:
+        row = self._conn().execute(
+            "INSERT INTO kv (namespace, key, value) VALUES (?, ?, '1') "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 "
+            "RETURNING value",
+            (namespace, key),
+        ).fetchone()
+        return int(row[0])
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> bool:
+        """
+        Take or renew a named lease for this worker; False while another worker holds it.
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+            "WHERE leases.owner = excluded.owner OR leases.expires < ?",
+            (name, WORKER_ID, now + ttl_seconds, now),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str):
+        self._conn().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, WORKER_ID))
+
+    async def arun(self, fn, *args):
+        """
+        Run fn(*args) on a worker thread, so SQLite I/O and lock waits stay off the event loop.
+        """
+        return await asyncio.to_thread(fn, *args)
+
+    async def create_checkpointer(self):
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        conn = await aiosqlite.connect(self.checkpoint_path)
+        checkpointer = AsyncSqliteSaver(conn)
+        # Also switches the checkpoint database to WAL
+        await checkpointer.setup()
+        return checkpointer
+
+
+def create_state_backend():
+    """
+    Pick the backend from STATE_BACKEND: "memory" (default) or "sqlite" (STATE_DB_PATH).
+    Multiple workers need "sqlite", which keeps credentials on disk, so it is opt-in.
+    """
+    backend = os.getenv("STATE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SqliteStateBackend(os.getenv("STATE_DB_PATH", "state.sqlite"))
+    if backend == "memory":
+        return MemoryStateBackend()
+    raise ValueError(f"Unknown STATE_BACKEND: {backend}")
+
+
+state_backend = create_state_backend()
+
+
+@asynccontextmanager
+async def held_lease(name: str, ttl_seconds: float):
+    """
+    Wait for a named lease and hold it for the block, renewing it every third of its ttl,
+    so it only expires under a worker that died while holding it.
+    """
+    while not await state_backend.arun(state_backend.acquire_lease, name, ttl_seconds):
+        await asyncio.sleep(LEASE_POLL_SECONDS)
+
+    async def renew():
+        while True:
+            await asyncio.sleep(ttl_seconds / 3)
+            await state_backend.arun(state_backend.acquire_lease, name, ttl_seconds)
+
+    renewer = asyncio.ensure_future(renew())
+    try:
+        yield
+    finally:
+        renewer.cancel()
+        await state_backend.arun(state_backend.release_lease, name)
@@ -0,0 +1,107 @@
+import bisect
+import re
+import unicodedata
+from collections import Counter
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+MIN_FUZZY_SCORE = 0.3
+
+
+def normalize_title(title: str) -> str:
+    """
+    Case-fold, drop punctuation and collapse whitespace, so "Team Sync!" matches "team  sync".
+    """
+    text = unicodedata.normalize("NFKC", title or "").casefold()
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def trigrams(normalized: str):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """
+    Normalized title index over one calendar's events with exact, prefix and trigram-fuzzy lookup.
+    """
+
+    def __init__(self):
+        self.titles = {}       # event_id -> normalized title
+        self.exact = {}        # normalized title -> set of event_ids
+        self.sorted_titles = []  # distinct normalized titles, for prefix range scans
+        self.grams = {}        # trigram -> set of event_ids
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, event_id: str, title: str):
+        self.remove(event_id)
+        normalized = normalize_title(title)
+        if not normalized:
+            return
+        self.titles[event_id] = normalized
+        ids = self.exact.get(normalized)
+        if ids is None:
+            ids = self.exact[normalized] = set()
+            bisect.insort(self.sorted_titles, normalized)
+        ids.add(event_id)
+        for gram in trigrams(normalized):
+            self.grams.setdefault(gram, set()).add(event_id)
+
+    def remove(self, event_id: str):
+        normalized = self.titles.pop(event_id, None)
+        if normalized is None:
+            return
+        ids = self.exact[normalized]
+        ids.discard(event_id)
+        if not ids:
+            del self.exact[normalized]
+            del self.sorted_titles[bisect.bisect_left(self.sorted_titles, normalized)]
+        for gram in trigrams(normalized):
+            gram_ids = self.grams[gram]
+            gram_ids.discard(event_id)
+            if not gram_ids:
+                del self.grams[gram]
+
+    def search(self, query: str, limit: int = 5):
+        """
+        Return up to `limit` (event_id, score, match) tuples, best first.
+        match is "exact", "prefix" or "fuzzy"; fuzzy scores are trigram Jaccard similarity.
+        """
+        normalized = normalize_title(query)
+        if not normalized:
+            return []
+
+        results = {}
+        for event_id in self.exact.get(normalized, ()):
+            results[event_id] = (EXACT_SCORE, "exact")
+
+        position = bisect.bisect_left(self.sorted_titles, normalized)
+        while position < len(self.sorted_titles) and len(results) < limit:
+            title = self.sorted_titles[position]
+            if not title.startswith(normalized):
+                break
+            for event_id in self.exact[title]:
+                results.setdefault(event_id, (PREFIX_SCORE, "prefix"))
+            position += 1
+
+        if len(results) < limit:
+            query_grams = trigrams(normalized)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.grams.get(gram, ()))
+            for event_id, count in shared.items():
+                if event_id in results:
+                    continue
+                title_grams = len(trigrams(self.titles[event_id]))
+                score = count / (len(query_grams) + title_grams - count)
+                if score >= MIN_FUZZY_SCORE:
+                    results[event_id] = (score, "fuzzy")
+
+        ranked = sorted(results.items(), key=lambda item: -item[1][0])
+        return [(event_id, score, match) for event_id, (score, match) in ranked[:limit]]
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from google.auth.transport.requests import Request as GoogleAuthRequest
+
+from app.core.auth import aget_token, asave_token, auser_ids
+from app.core.state_backend import state_backend
+
+logger = logging.getLogger(__name__)
+
+# Renew access tokens this long before they expire
+REFRESH_MARGIN = timedelta(seconds=int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300")))
+CHECK_INTERVAL_SECONDS = float(os.getenv("TOKEN_REFRESH_CHECK_SECONDS", "60"))
+
+# user_id -> in-flight refresh task, so concurrent callers share one token request
+_inflight = {}
+_refresher_task = None
+
+
+def needs_refresh(credentials) -> bool:
+    if not credentials.refresh_token:
+        return False
+    if credentials.expiry is None or not credentials.token:
+        return True
+    # google-auth keeps expiry as naive UTC
+    return credentials.expiry - datetime.utcnow() <= REFRESH_MARGIN
+
+
+async def _refresh(user_id: str):
+    credentials = await aget_token(user_id)
+    if credentials is None:
+        return None
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, lambda: credentials.refresh(GoogleAuthRequest()))
+    await asave_token(user_id, credentials)
+    return credentials
+
+
+async def refresh_credentials(user_id: str):
+    """
+    Refresh a user's access token; concurrent calls for the same user share one refresh.
+    Returns the refreshed credentials, or None for an unknown user.
+    """
+    task = _inflight.get(user_id)
+    if task is None:
+        task = asyncio.ensure_future(_refresh(user_id))
+        _inflight[user_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(user_id, None))
+    return await asyncio.shield(task)
+
+
+async def refresh_due_tokens():
+    for user_id in await auser_ids():
+        credentials = await aget_token(user_id)
+        if credentials is None or not needs_refresh(credentials):
+            continue
+        try:
+            await refresh_credentials(user_id)
+        except Exception:
+            logger.exception("Proactive token refresh failed for %s", user_id)
+
+
+async def _refresh_loop():
+    while True:
+        # With several workers only the lease holder refreshes proactively
+        if await state_backend.arun(state_backend.acquire_lease, "token_refresher", CHECK_INTERVAL_SECONDS * 2):
+            await refresh_due_tokens()
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+
+
+def start_token_refresher():
+    global _refresher_task
+    if _refresher_task is None or _refresher_task.done():
+        _refresher_task = asyncio.ensure_future(_refresh_loop())
+
+
+async def stop_token_refresher():
+    global _refresher_task
+    if _refresher_task is not None:
+        _refresher_task.cancel()
+        try:
+            await _refresher_task
+        except asyncio.CancelledError:
+            pass
+        _refresher_task = None
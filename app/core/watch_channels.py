@@ -0,0 +1,225 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+import uuid
+from collections import Counter
+
+from app.core.agenda import get_agenda_views
+from app.core.async_calendar_client import get_async_calendar_client
+from app.core.auth import aget_token, auser_ids
+from app.core.errors import CalendarAPIError
+from app.core.event_mirror import aget_event_mirror
+from app.core.read_coalescer import calendar_reads
+from app.core.state_backend import state_backend
+
+logger = logging.getLogger(__name__)
+
+# Public HTTPS address of POST /calendar/notifications; push channels are off without it
+WEBHOOK_URL = os.getenv("CALENDAR_WEBHOOK_URL")
+CHANNEL_TTL_SECONDS = int(os.getenv("CALENDAR_WATCH_TTL_SECONDS", str(7 * 24 * 3600)))
+# Channels are replaced this long before they expire
+RENEW_BEFORE_SECONDS = float(os.getenv("CALENDAR_WATCH_RENEW_BEFORE_SECONDS", "3600"))
+RENEW_CHECK_SECONDS = float(os.getenv("CALENDAR_WATCH_CHECK_SECONDS", "300"))
+# Notifications for one user arriving within this window trigger a single refresh
+REFRESH_DEBOUNCE_SECONDS = float(os.getenv("CALENDAR_WATCH_DEBOUNCE_SECONDS", "1.0"))
+
+# outcome -> count: notifications by outcome, plus the mirror refreshes they triggered
+notification_counts = Counter()
+
+# user_id -> scheduled refresh task; users notified again while it runs
+_refresh_tasks = {}
+_dirty = set()
+_renewer_task = None
+
+
+def watch_enabled() -> bool:
+    return bool(WEBHOOK_URL)
+
+
+# --- Channel records, kept in the state backend so any worker can validate a notification ---
+def load_channel(channel_id: str):
+    stored = state_backend.get("watch_channels", channel_id)
+    return json.loads(stored) if stored else None
+
+
+def user_channel(user_id: str):
+    channel_id = state_backend.get("watch_users", user_id)
+    return load_channel(channel_id) if channel_id else None
+
+
+def _save_channel(channel: dict):
+    state_backend.put("watch_channels", channel["id"], json.dumps(channel))
+    state_backend.put("watch_users", channel["user_id"], channel["id"])
+    state_backend.put("watch_expiry", channel["user_id"], str(channel["expiration"]))
+
+
+def _delete_channel(channel: dict):
+    state_backend.delete("watch_channels", channel["id"])
+    if state_backend.get("watch_users", channel["user_id"]) == channel["id"]:
+        state_backend.delete("watch_users", channel["user_id"])
+        state_backend.delete("watch_expiry", channel["user_id"])
+
+
+# --- Opening, stopping and renewing channels ---
+async def start_channel(user_id: str):
+    """
+    Open a watch channel on the user's primary calendar. Returns the stored channel, or None.
+    """
+    credentials = await aget_token(user_id)
+    if credentials is None:
+        return None
+    client = get_async_calendar_client(credentials, user_id)
+    channel_id = uuid.uuid4().hex
+    token = secrets.token_urlsafe(32)
+    response = await client.watch_events(channel_id, WEBHOOK_URL, token, CHANNEL_TTL_SECONDS)
+    channel = {
+        "id": channel_id,
+        "user_id": user_id,
+        "token": token,
+        "resource_id": response["resourceId"],
+        # Google reports expiration in epoch milliseconds
+        "expiration": int(response.get("expiration") or 0) / 1000 or time.time() + CHANNEL_TTL_SECONDS,
+    }
+    await state_backend.arun(_save_channel, channel)
+    logger.info("Opened watch channel %s for %s", channel_id, user_id)
+    return channel
+
+
+async def stop_channel(channel: dict):
+    await state_backend.arun(_delete_channel, channel)
+    credentials = await aget_token(channel["user_id"])
+    if credentials is None:
+        return
+    try:
+        await get_async_calendar_client(credentials, channel["user_id"]).stop_channel(
+            channel["id"], channel["resource_id"]
+        )
+    except CalendarAPIError as error:
+        # Already expired or stopped; nothing left to clean up
+        logger.info("Stopping watch channel %s: %s", channel["id"], error)
+
+
+async def ensure_channel(user_id: str):
+    """
+    Make sure the user has a channel that is not about to expire. A replacement is
+    opened before the old channel is stopped, so no change goes unnotified.
+    """
+    current = await state_backend.arun(user_channel, user_id)
+    if current is not None and current["expiration"] - time.time() > RENEW_BEFORE_SECONDS:
+        return current
+    channel = await start_channel(user_id)
+    if current is not None and channel is not None:
+        await stop_channel(current)
+    return channel
+
+
+async def renew_channels():
+    for user_id in await auser_ids():
+        try:
+            await ensure_channel(user_id)
+        except Exception:
+            logger.exception("Watch channel renewal failed for %s", user_id)
+
+
+async def _renew_loop():
+    while True:
+        # With several workers only the lease holder opens and renews channels
+        if await state_backend.arun(state_backend.acquire_lease, "watch_renewer", RENEW_CHECK_SECONDS * 2):
+            await renew_channels()
+        await asyncio.sleep(RENEW_CHECK_SECONDS)
+
+
+def start_watch_renewer():
+    global _renewer_task
+    if not watch_enabled():
+        return
+    if _renewer_task is None or _renewer_task.done():
+        _renewer_task = asyncio.ensure_future(_renew_loop())
+
+
+async def stop_watch_renewer():
+    global _renewer_task
+    if _renewer_task is not None:
+        _renewer_task.cancel()
+        try:
+            await _renewer_task
+        except asyncio.CancelledError:
+            pass
+        _renewer_task = None
+
+
+# --- Incoming notifications ---
+async def verify_notification(headers):
+    """
+    The stored channel a notification belongs to, or {"error": ..., "status": ...}
+    when the channel is unknown or its token or resource id does not match.
+    """
+    channel = await state_backend.arun(load_channel, headers.get("X-Goog-Channel-ID", ""))
+    if channel is None:
+        notification_counts["unknown_channel"] += 1
+        return {"error": "Unknown channel.", "status": 404}
+    token = headers.get("X-Goog-Channel-Token", "").encode()
+    if (not hmac.compare_digest(token, channel["token"].encode())
+            or headers.get("X-Goog-Resource-ID") != channel["resource_id"]):
+        notification_counts["rejected"] += 1
+        return {"error": "Invalid channel token.", "status": 403}
+    return channel
+
+
+async def handle_notification(channel: dict, resource_state: str):
+    """
+    Invalidate the user's cached calendar views and schedule a refresh of the mirror.
+    The "sync" message sent when a channel opens carries no change.
+    """
+    if resource_state == "sync":
+        notification_counts["sync"] += 1
+        return
+    notification_counts["change"] += 1
+    user_id = channel["user_id"]
+    mirror = await aget_event_mirror(user_id)
+    # Bumps the shared generation for the other workers, a backend write
+    await state_backend.arun(mirror.invalidate)
+    calendar_reads.invalidate(user_id)
+    schedule_refresh(user_id)
+
+
+def schedule_refresh(user_id: str):
+    if user_id in _refresh_tasks:
+        _dirty.add(user_id)
+        return
+    _refresh_tasks[user_id] = asyncio.ensure_future(_refresh_user(user_id))
+
+
+async def _refresh_user(user_id: str):
+    try:
+        while True:
+            await asyncio.sleep(REFRESH_DEBOUNCE_SECONDS)
+            _dirty.discard(user_id)
+            credentials = await aget_token(user_id)
+            if credentials is None:
+                return
+            mirror = await aget_event_mirror(user_id)
+            # Changes notified during the previous pass were marked fresh by it; force another delta
+            mirror.invalidate(all_workers=False)
+            try:
+                await mirror.aensure_fresh(get_async_calendar_client(credentials, user_id))
+                # Re-file the changed events now rather than on the next agenda read
+                get_agenda_views(user_id).sync(mirror)
+                notification_counts["refreshed"] += 1
+            except CalendarAPIError as error:
+                logger.warning("Refresh after change notification failed for %s: %s", user_id, error)
+            except Exception:
+                # Transport errors and the like; the mirror stays dirty, so the next read retries
+                logger.exception("Refresh after change notification failed for %s", user_id)
+            if user_id not in _dirty:
+                return
+    finally:
+        _refresh_tasks.pop(user_id, None)
+
+
+def watch_stats() -> dict:
+    return {"enabled": watch_enabled(), "notifications": dict(notification_counts)}
@@ -1,29 +1,97 @@
 import os
-from langgraph.prebuilt import create_react_agent
-from langchain_groq import ChatGroq
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
 from langchain_core.tools import StructuredTool
 
+from app.core.state_backend import state_backend
+from app.langgraph.tools.agenda_tool import agenda_tool_func
 from app.langgraph.tools.create_event_tool import create_event_tool_func
+from app.langgraph.tools.free_slots_tool import find_free_slots_tool_func
+from app.langgraph.tools.google_calendar_tools import (
+    list_events_tool_func,
+    update_event_tool_func,
+    delete_event_tool_func,
+)
+
+# Every tool is async, so tool calls from one model turn run concurrently
+# (capped per user by app.langgraph.tools.limits)
+list_events_tool_structured = StructuredTool.from_function(
+    coroutine=list_events_tool_func,
+    name="list_events",
+    description="List the user's next calendar events. Optionally takes the number of events to return.",
+)
 
-# Wrap your function in StructuredTool directly
 create_event_tool_structured = StructuredTool.from_function(
-    func=create_event_tool_func,
+    coroutine=create_event_tool_func,
     name="create_event",
     description="Create a Google Calendar event with optional title, time, location, and reminders.",
 )
 
-async def create_schedule_agent():
-    # Initialize the LLM
-    llm = ChatGroq(
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-        model_name="llama3-70b-8192"
+update_event_tool_structured = StructuredTool.from_function(
+    coroutine=update_event_tool_func,
+    name="update_event",
+    description="Update a calendar event found by its title. You can change summary, start time, and end time.",
+)
+
+delete_event_tool_structured = StructuredTool.from_function(
+    coroutine=delete_event_tool_func,
+    name="delete_event",
+    description="Delete a calendar event found by its title.",
+)
+
+find_free_slots_tool_structured = StructuredTool.from_function(
+    coroutine=find_free_slots_tool_func,
+    name="find_free_slots",
+    description=(
+        "Find free time slots of a given length (minutes) within working hours. "
+        "Optional start/end bound the search (default: the next 7 days), attendees are "
+        "email addresses whose calendars must also be free, and buffer_minutes keeps a gap around meetings."
+    ),
+)
+
+agenda_tool_structured = StructuredTool.from_function(
+    coroutine=agenda_tool_func,
+    name="get_agenda",
+    description=(
+        "The user's precomputed agenda: view is 'today', 'tomorrow', 'week' (the next 7 days) "
+        "or 'next' (the current or next event). Prefer this over list_events for these questions."
+    ),
+)
+
+# Upper bound on the (approximate) tokens of history sent with each LLM call
+HISTORY_TOKEN_BUDGET = int(os.getenv("SCHEDULE_HISTORY_TOKEN_BUDGET", "2000"))
+
+def trim_history(state):
+    """
+    Pre-model hook: keep only the most recent turns that fit the token budget.
+    The full thread stays in the checkpointer; only the LLM input is trimmed.
+    """
+    trimmed = trim_messages(
+        state["messages"],
+        strategy="last",
+        token_counter=count_tokens_approximately,
+        max_tokens=HISTORY_TOKEN_BUDGET,
+        start_on="human",
+        end_on=("human", "tool"),
     )
+    return {"llm_input_messages": trimmed}
+
+async def create_schedule_agent():
+    # Heavy imports are deferred so app startup stays fast; ScheduleService.prewarm loads them
+    from langgraph.prebuilt import create_react_agent
+    from app.langgraph.model_router import create_routed_llm
+
+    # Fast model for simple turns, large model for the rest, with failover between them
+    llm = create_routed_llm()
 
     # Define prompt
     prompt = (
         "You are a helpful AI assistant for managing Google Calendar. "
         "You can create, update, delete, and list calendar events. "
         "Use the create_event tool to create events with validation and conflict checking. "
+        "Use the find_free_slots tool when the user asks when they (or attendees) are free. "
+        "Use the get_agenda tool for what is on today, tomorrow, this week or next. "
+        "When a request involves several events (e.g. a standup every weekday), make all the "
+        "tool calls in a single turn; they run in parallel. "
         "If any field like title, time, location is missing, generate intelligently. "
         "Always respond clearly and helpfully."
     )
@@ -31,8 +99,18 @@ async def create_schedule_agent():
     # Build agent
     agent = create_react_agent(
         model=llm,
-        tools=[create_event_tool_structured],  # Only create_event tool
-        prompt=prompt
+        tools=[
+            list_events_tool_structured,
+            create_event_tool_structured,
+            update_event_tool_structured,
+            delete_event_tool_structured,
+            find_free_slots_tool_structured,
+            agenda_tool_structured,
+        ],
+        prompt=prompt,
+        pre_model_hook=trim_history,
+        # Conversation threads, one per user, live in the shared state backend
+        checkpointer=await state_backend.create_checkpointer(),
     )
 
     return agent
@@ -0,0 +1,131 @@
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+import pytz
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.event_mirror import DEFAULT_TIMEZONE
+from app.core.metrics import agent_node_seconds, tool_call_seconds
+from app.langgraph.parsers.create_event_parser import create_event_prompt, parse_create_event
+from app.langgraph.tools.create_event_tool import create_event_tool_func
+from app.langgraph.utils import parse_natural_datetime
+
+logger = logging.getLogger(__name__)
+
+# Set SCHEDULE_CREATE_EXTRACTION=0 to send every create through the agent
+CREATE_EXTRACTION = os.getenv("SCHEDULE_CREATE_EXTRACTION", "1") == "1"
+# One extraction call plus this many corrections for malformed output
+EXTRACTION_RETRIES = int(os.getenv("SCHEDULE_EXTRACTION_RETRIES", "1"))
+
+# Requests for several or repeating events need the agent's multiple tool calls
+MULTI_EVENT_PATTERN = re.compile(
+    r"\b(every|each|daily|weekly|monthly|weekdays?|recurring|repeat\w*)\b"
+    r"|\b(mon|tue|wed|thu|fri|sat|sun)\w*\s*(-|to|through)\s*(mon|tue|wed|thu|fri|sat|sun)",
+    re.IGNORECASE,
+)
+
+CORRECTION_PROMPT = (
+    "That output could not be used: {error}\n"
+    "Return ONLY the corrected JSON object, with no other text."
+)
+
+_models = None
+
+
+def get_extraction_models() -> dict:
+    """
+    model name -> chat model in JSON mode, for the fast and large models (or only the large one).
+    """
+    global _models
+    if _models is None:
+        from app.langgraph.llm import FAST_MODEL, LARGE_MODEL, create_llm
+        from app.langgraph.model_router import MODEL_ROUTING
+
+        # Same rule as create_routed_llm: one model name means routing is off
+        names = [FAST_MODEL, LARGE_MODEL] if MODEL_ROUTING and FAST_MODEL != LARGE_MODEL else [LARGE_MODEL]
+        # JSON mode keeps the answer to the object the prompt asks for
+        _models = {
+            name: create_llm(
+                name,
+                outbound_retries=len(names) == 1,
+                temperature=0,
+                model_kwargs={"response_format": {"type": "json_object"}},
+            )
+            for name in names
+        }
+    return _models
+
+
+def wants_single_event(user_query: str) -> bool:
+    return not MULTI_EVENT_PATTERN.search(user_query)
+
+
+def validate_event_input(output: str):
+    """
+    Parse the model's JSON into CreateEventInput and check its times are usable.
+    Raises ValueError with a message the model can act on.
+    """
+    event = parse_create_event(output)
+    for name in ("start_time", "end_time"):
+        value = getattr(event, name)
+        if value:
+            parse_natural_datetime(value)
+    return event
+
+
+async def extract_create_event(user_query: str):
+    """
+    Fill CreateEventInput from the user's request with one structured LLM call,
+    feeding validation errors back for up to EXTRACTION_RETRIES corrections.
+    The first attempt goes to the fast model, corrections escalate to the large one.
+    Returns None when no valid input could be extracted.
+    """
+    from app.langgraph.model_router import get_model_router
+
+    models = get_extraction_models()
+    router = get_model_router()
+    messages = [HumanMessage(content=create_event_prompt.format(
+        user_input=user_query,
+        # The user's wall clock and offset, so "tomorrow" is their tomorrow whatever the server's zone
+        now=datetime.now(pytz.timezone(DEFAULT_TIMEZONE)).strftime(f"%A %Y-%m-%dT%H:%M:%S%z ({DEFAULT_TIMEZONE})"),
+    ))]
+    for attempt in range(EXTRACTION_RETRIES + 1):
+        response = await router.ainvoke(models, messages, simple=attempt == 0)
+        try:
+            return validate_event_input(str(response.content))
+        except ValueError as error:
+            logger.info("create extraction attempt %d rejected: %s", attempt + 1, error)
+            messages += [
+                AIMessage(content=str(response.content)),
+                HumanMessage(content=CORRECTION_PROMPT.format(error=error)),
+            ]
+    return None
+
+
+async def extract_and_create_event(user_query: str):
+    """
+    Single-shot create: extract the event, call the create_event tool directly and
+    reply with its templated message: one LLM call instead of the agent loop's two.
+    Returns None when extraction fails, so the agent can take the request.
+    """
+    with agent_node_seconds.time(node="extract"):
+        event = await extract_create_event(user_query)
+    if event is None:
+        return None
+
+    arguments = event.model_dump()
+    if event.reminders is not None:
+        arguments["reminders"] = [reminder.model_dump() for reminder in event.reminders]
+    # Timed like the agent's tool calls: "error" when the tool raises
+    start = time.perf_counter()
+    try:
+        reply = await create_event_tool_func(**arguments)
+    except Exception:
+        tool_call_seconds.observe(time.perf_counter() - start, tool="create_event", outcome="error")
+        raise
+    tool_call_seconds.observe(time.perf_counter() - start, tool="create_event", outcome="ok")
+    return reply
@@ -0,0 +1,58 @@
+import logging
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.core.metrics import agent_node_seconds, tool_call_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records how long each LangGraph node and each tool call takes.
+    Create one per agent run and pass it in the run config's callbacks.
+    """
+
+    # Cheap enough to run on the event loop instead of an executor
+    run_inline = True
+
+    def __init__(self):
+        self._nodes = {}
+        self._tools = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Nested runnables inherit the node metadata; only time the node's own run
+        if node and kwargs.get("name") == node:
+            self._nodes[run_id] = (node, time.perf_counter())
+
+    def _end_node(self, run_id):
+        started = self._nodes.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            agent_node_seconds.observe(time.perf_counter() - start, node=node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._tools[run_id] = (name, time.perf_counter())
+
+    def _end_tool(self, run_id, outcome: str):
+        started = self._tools.pop(run_id, None)
+        if started is not None:
+            name, start = started
+            elapsed = time.perf_counter() - start
+            tool_call_seconds.observe(elapsed, tool=name, outcome=outcome)
+            logger.info("tool %s %s in %.1f ms", name, outcome, elapsed * 1000)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, "error")
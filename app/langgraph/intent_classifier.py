@@ -1,5 +1,9 @@
 from langchain_core.tools import Tool, StructuredTool
 
+# Verbs that open a create request; the router's one-shot create path is gated on these
+CREATE_VERBS = ("create", "schedule", "add", "book", "set up")
+CREATE_KEYWORDS = CREATE_VERBS + ("make",)
+
 # Example simple intent classifier tool
 async def intent_classifier_func(user_input: str) -> str:
     """
@@ -7,13 +11,13 @@ async def intent_classifier_func(user_input: str) -> str:
     For production, use LLM classification or ML model.
     """
     text = user_input.lower()
-    if any(k in text for k in ["create", "schedule", "set up", "make"]):
+    if any(k in text for k in CREATE_KEYWORDS):
         return "create_event"
     elif any(k in text for k in ["update", "change", "edit"]):
         return "update_event"
     elif any(k in text for k in ["delete", "remove", "cancel"]):
         return "delete_event"
-    elif any(k in text for k in ["list", "show", "what", "next", "events"]):
+    elif any(k in text for k in ["list", "show", "what", "next", "events", "agenda", "today", "tomorrow", "week"]):
         return "list_events"
     else:
         return "unknown"
@@ -0,0 +1,77 @@
+import os
+
+import groq
+from langchain_groq import ChatGroq
+
+from app.core.outbound import outbound, queued
+
+# Simple turns and extraction go to the fast model first, the rest to the large one
+FAST_MODEL = os.getenv("SCHEDULE_FAST_MODEL", "llama-3.1-8b-instant")
+LARGE_MODEL = os.getenv("SCHEDULE_LARGE_MODEL", "llama3-70b-8192")
+
+
+def groq_retry_info(error):
+    """
+    (retryable, retry_after) for a Groq API error: rate limits, timeouts and 5xx are retried.
+    """
+    if isinstance(error, groq.RateLimitError):
+        header = error.response.headers.get("retry-after")
+        try:
+            return True, float(header) if header else None
+        except ValueError:
+            return True, None
+    if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError, groq.InternalServerError)):
+        return True, None
+    return False, None
+
+
+# Builds the chat models instead of Groq when set, e.g. benchmarks/serve.py's scripted model
+_llm_factory = None
+
+
+def set_llm_factory(factory):
+    """
+    Have create_llm return factory(model_name, **kwargs) instead of a Groq model; None restores Groq.
+    """
+    global _llm_factory
+    _llm_factory = factory
+
+
+class ThrottledChatGroq(ChatGroq):
+    """
+    ChatGroq whose calls go through the shared outbound scheduler: a global cap on
+    concurrent LLM calls, the Groq token bucket, and backoff on 429s.
+    With outbound_retries off, throttling errors are raised at once so the
+    model router can fail over to another model instead of waiting.
+    """
+
+    outbound_retries: bool = True
+
+    async def _agenerate(self, *args, **kwargs):
+        async with outbound.llm_slot():
+            return await outbound.run(
+                "groq",
+                lambda: super(ThrottledChatGroq, self)._agenerate(*args, **kwargs),
+                groq_retry_info if self.outbound_retries else lambda error: (False, None),
+            )
+
+    async def _astream(self, *args, **kwargs):
+        # Streams are not retried once tokens have been emitted; they only take a slot and a token
+        async with outbound.llm_slot():
+            async with queued():
+                await outbound.bucket("groq").acquire()
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
+
+def create_llm(model_name: str, outbound_retries: bool = True, **kwargs) -> ChatGroq:
+    if _llm_factory is not None:
+        return _llm_factory(model_name, outbound_retries=outbound_retries, **kwargs)
+    return ThrottledChatGroq(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        model_name=model_name,
+        # Retries are handled by the outbound scheduler
+        max_retries=0,
+        outbound_retries=outbound_retries,
+        **kwargs,
+    )
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.core.metrics import llm_call_seconds
+from app.core.outbound import upstream_timeout
+
+logger = logging.getLogger(__name__)
+
+# Set SCHEDULE_MODEL_ROUTING=0 to send every call to the large model, as before
+MODEL_ROUTING = os.getenv("SCHEDULE_MODEL_ROUTING", "1") == "1"
+# A call (or a stream's first chunk) taking longer than this upstream fails over to the next model;
+# time spent waiting for an LLM slot or a rate-limit token does not count
+MODEL_TIMEOUT_SECONDS = float(os.getenv("SCHEDULE_MODEL_TIMEOUT_SECONDS", "20"))
+# User turns up to this long count as simple
+SIMPLE_TURN_CHARS = int(os.getenv("SCHEDULE_SIMPLE_TURN_CHARS", "160"))
+# A failing model is skipped for BASE * 2^(consecutive failures - 1) seconds, up to MAX
+COOLDOWN_BASE_SECONDS = float(os.getenv("SCHEDULE_MODEL_COOLDOWN_SECONDS", "2"))
+COOLDOWN_MAX_SECONDS = float(os.getenv("SCHEDULE_MODEL_COOLDOWN_MAX_SECONDS", "60"))
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+# Latency older than this is ignored, so a model passed over for being slow gets re-measured
+LATENCY_TTL_SECONDS = float(os.getenv("SCHEDULE_MODEL_LATENCY_TTL_SECONDS", "30"))
+
+FAILOVER_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ModelStats:
+    """
+    Moving-average latency and error rate of one model, plus its failover cooldown.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.escalations = 0
+        self.latency = None  # EWMA seconds of successful calls
+        self.latency_updated = 0.0
+        self.error_rate = 0.0  # EWMA of failed calls
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.calls += 1
+            self.latency = latency if self.latency is None else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+            self.latency_updated = time.monotonic()
+            self.error_rate *= 1 - EWMA_ALPHA
+            self.consecutive_failures = 0
+
+    def record_failure(self, retry_after: float = None):
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+            self.consecutive_failures += 1
+            cooldown = min(COOLDOWN_MAX_SECONDS, COOLDOWN_BASE_SECONDS * 2 ** (self.consecutive_failures - 1))
+            self.cooldown_until = time.monotonic() + max(cooldown, retry_after or 0)
+
+    def record_escalation(self):
+        with self._lock:
+            self.escalations += 1
+
+    def recent_latency(self):
+        if self.latency is None or time.monotonic() - self.latency_updated > LATENCY_TTL_SECONDS:
+            return None
+        return self.latency
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "escalations": self.escalations,
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "error_rate": round(self.error_rate, 3),
+                "cooling_down": not self.available(),
+            }
+
+
+def failover_info(error):
+    """
+    (fail over, retry_after) for an LLM call error: timeouts, rate limits and 5xx move on to the next model.
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return True, None
+    if getattr(error, "status_code", None) in FAILOVER_STATUS_CODES:
+        return True, None
+    try:
+        from app.langgraph.llm import groq_retry_info
+    except ImportError:
+        return False, None
+    return groq_retry_info(error)
+
+
+def is_simple_turn(messages: List[BaseMessage]) -> bool:
+    """
+    Phrasing an answer from tool results, or a short request, is left to the fast model.
+    """
+    last = messages[-1] if messages else None
+    if isinstance(last, ToolMessage):
+        return True
+    if isinstance(last, HumanMessage):
+        from app.langgraph.extraction import wants_single_event
+
+        text = str(last.content)
+        return len(text) <= SIMPLE_TURN_CHARS and wants_single_event(text)
+    return False
+
+
+def usable_response(message: AIMessage, tool_names=None) -> bool:
+    """
+    Whether a model's answer can be used as is: no malformed or unknown tool calls and not empty.
+    """
+    if getattr(message, "invalid_tool_calls", None):
+        return False
+    if tool_names is not None and any(call["name"] not in tool_names for call in message.tool_calls):
+        return False
+    return bool(message.tool_calls) or bool(str(message.content).strip())
+
+
+class ModelRouter:
+    """
+    Orders the fast and large models for each call from their recent stats, fails over
+    on timeouts, rate limits and server errors, and escalates unusable answers.
+    """
+
+    def __init__(self, fast_model: str, large_model: str):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.stats = {fast_model: ModelStats(), large_model: ModelStats()}
+
+    def candidates(self, simple: bool) -> List[str]:
+        fast = self.stats[self.fast_model].recent_latency()
+        large = self.stats[self.large_model].recent_latency()
+        order = [self.fast_model, self.large_model] if simple else [self.large_model, self.fast_model]
+        # The fast model only goes first while it actually is faster
+        if simple and fast is not None and large is not None and fast > large:
+            order.reverse()
+        # Models cooling down after failures go last (stable sort keeps the order otherwise)
+        return sorted(order, key=lambda name: not self.stats[name].available())
+
+    def _finish(self, name: str, start: float, error=None, clock=None):
+        # Queueing behind our own limits is neither the model's latency nor its failure
+        elapsed = time.perf_counter() - start - (clock.queued if clock is not None else 0.0)
+        if error is None:
+            self.stats[name].record_success(elapsed)
+            llm_call_seconds.observe(elapsed, model=name, outcome="ok")
+            return False
+        llm_call_seconds.observe(elapsed, model=name, outcome="error")
+        fail_over, retry_after = failover_info(error)
+        if fail_over:
+            self.stats[name].record_failure(retry_after)
+            logger.warning("model %s failed (%r); failing over", name, error)
+        return fail_over
+
+    def _order(self, models: dict, simple: bool) -> List[str]:
+        # With equal fast and large model names each model is still tried only once
+        order = [name for name in dict.fromkeys(self.candidates(simple)) if name in models]
+        if not order:
+            raise ValueError(f"None of the routed models ({', '.join(self.stats)}) are in {list(models)}")
+        return order
+
+    def invoke(self, models: dict, messages, simple: bool, accept=None, **kwargs) -> AIMessage:
+        """
+        Synchronous ainvoke, with the same failover and escalation order. There is no
+        MODEL_TIMEOUT_SECONDS cut-off; the models' own client timeouts apply.
+        """
+        order = self._order(models, simple)
+        for position, name in enumerate(order):
+            last = position == len(order) - 1
+            start = time.perf_counter()
+            try:
+                response = models[name].invoke(messages, **kwargs)
+            except Exception as error:
+                if self._finish(name, start, error) and not last:
+                    continue
+                raise
+            self._finish(name, start)
+            if accept is not None and not last and not accept(response):
+                self.stats[name].record_escalation()
+                logger.info("model %s answer not usable; escalating", name)
+                continue
+            return response
+
+    async def ainvoke(self, models: dict, messages, simple: bool, accept=None, **kwargs) -> AIMessage:
+        """
+        Invoke the first usable model of models (name -> runnable) in candidate order.
+        An answer rejected by accept() is escalated to the next model; the last one is kept.
+        """
+        order = self._order(models, simple)
+        for position, name in enumerate(order):
+            last = position == len(order) - 1
+            start = time.perf_counter()
+            clock = None
+            try:
+                async with upstream_timeout(MODEL_TIMEOUT_SECONDS) as clock:
+                    response = await models[name].ainvoke(messages, **kwargs)
+            except Exception as error:
+                if self._finish(name, start, error, clock) and not last:
+                    continue
+                raise
+            self._finish(name, start, clock=clock)
+            if accept is not None and not last and not accept(response):
+                self.stats[name].record_escalation()
+                logger.info("model %s answer not usable; escalating", name)
+                continue
+            return response
+
+    async def astream(self, models: dict, messages, simple: bool, **kwargs):
+        """
+        Stream from the first model that starts answering. Failover only happens before
+        the first chunk; once tokens are out the stream is committed to that model.
+        """
+        order = self._order(models, simple)
+        for position, name in enumerate(order):
+            start = time.perf_counter()
+            stream = models[name].astream(messages, **kwargs).__aiter__()
+            clock = None
+            try:
+                async with upstream_timeout(MODEL_TIMEOUT_SECONDS) as clock:
+                    first = await stream.__anext__()
+            except StopAsyncIteration:
+                self._finish(name, start, clock=clock)
+                return
+            except Exception as error:
+                if self._finish(name, start, error, clock) and position < len(order) - 1:
+                    continue
+                raise
+            yield first
+            async for chunk in stream:
+                yield chunk
+            self._finish(name, start, clock=clock)
+            return
+
+    def snapshot(self) -> dict:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    Chat model that routes each call through a ModelRouter over its per-model runnables.
+    """
+
+    router: Any
+    models: Any  # model name -> chat model, or the model with tools bound
+    tool_names: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    def bind_tools(self, tools, **kwargs):
+        names = {getattr(tool, "name", None) or getattr(tool, "__name__", None) for tool in tools}
+        return RoutedChatModel(
+            router=self.router,
+            models={name: model.bind_tools(tools, **kwargs) for name, model in self.models.items()},
+            tool_names=names,
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        message = self.router.invoke(
+            self.models,
+            messages,
+            simple=is_simple_turn(messages),
+            accept=lambda response: usable_response(response, self.tool_names),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        message = await self.router.ainvoke(
+            self.models,
+            messages,
+            simple=is_simple_turn(messages),
+            accept=lambda response: usable_response(response, self.tool_names),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs):
+        async for chunk in self.router.astream(self.models, messages, simple=is_simple_turn(messages)):
+            if not isinstance(chunk, AIMessageChunk):
+                chunk = AIMessageChunk(content=getattr(chunk, "content", ""))
+            yield ChatGenerationChunk(message=chunk)
+
+
+_router = None
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        from app.langgraph.llm import FAST_MODEL, LARGE_MODEL
+
+        _router = ModelRouter(FAST_MODEL, LARGE_MODEL)
+    return _router
+
+
+def create_routed_llm(**kwargs):
+    """
+    The fast and large models behind one chat model interface, or just the large
+    model when routing is off. kwargs go to create_llm for both models.
+    """
+    from app.langgraph.llm import FAST_MODEL, LARGE_MODEL, create_llm
+
+    if not MODEL_ROUTING or FAST_MODEL == LARGE_MODEL:
+        return create_llm(LARGE_MODEL, **kwargs)
+    return RoutedChatModel(
+        router=get_model_router(),
+        # The router fails over instead of waiting out rate-limit backoff
+        models={name: create_llm(name, outbound_retries=False, **kwargs) for name in (FAST_MODEL, LARGE_MODEL)},
+    )
+
+
+def model_stats() -> dict:
+    return _router.snapshot() if _router is not None else {}
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, ValidationError
 from typing import Optional, List
+from langchain_core.exceptions import OutputParserException
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import PromptTemplate
 
@@ -22,11 +23,12 @@ create_event_parser = PydanticOutputParser(pydantic_object=CreateEventInput)
 create_event_prompt_template = """
 You are a helpful assistant that extracts calendar event details from a user's input.
 
+Current date and time in the user's time zone: {now}
 User input: "{user_input}"
 
 Instructions:
 - Extract the event title (summary). If missing, generate a meaningful title based on the input.
-- Extract start_time and end_time in ISO 8601 format (YYYY-MM-DDTHH:MM:SS).
+- Extract start_time and end_time in ISO 8601 format (YYYY-MM-DDTHH:MM:SS), resolving relative dates against the current date. Give them as local times in the user's time zone, without an offset.
 - Extract location if available.
 - Extract or generate a brief description summarizing the event.
 - Determine the importance of the meeting and set 'color_id' accordingly:
@@ -53,12 +55,12 @@ Example output:
 """
 
 create_event_prompt = PromptTemplate(
-    input_variables=["user_input"],
+    input_variables=["user_input", "now"],
     template=create_event_prompt_template,
 )
 
 def parse_create_event(llm_output: str) -> CreateEventInput:
     try:
         return create_event_parser.parse(llm_output)
-    except ValidationError as e:
+    except (ValidationError, OutputParserException) as e:
         raise ValueError(f"Parsing failed: {e}")
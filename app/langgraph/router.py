@@ -0,0 +1,138 @@
+import logging
+import re
+from collections import Counter
+
+from app.langgraph.extraction import CREATE_EXTRACTION, extract_and_create_event, wants_single_event
+from app.langgraph.intent_classifier import CREATE_VERBS, intent_classifier_func
+from app.langgraph.tools.agenda_tool import agenda_tool_func
+from app.langgraph.tools.google_calendar_tools import list_events_tool_func, delete_event_tool_func
+
+logger = logging.getLogger(__name__)
+
+# (path, intent) -> number of queries routed that way
+route_counts = Counter()
+
+DEFAULT_LIST_COUNT = 5
+MAX_LIST_COUNT = 50
+
+# Only plain "show my next N events" style requests; anything with a date, a time
+# range or a second clause goes to the agent.
+LIST_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:show|list|what\s+are|what's|whats|get)\s+(?:me\s+)?(?:all\s+)?(?:my\s+)?"
+    r"(?:(?:next|upcoming)\s+)?(?P<count>\d{1,3}\s+)?(?:(?:next|upcoming)\s+)?"
+    r"(?:calendar\s+)?(?:events|meetings|appointments)\s*[?.!]*$",
+    re.IGNORECASE,
+)
+
+# "what's on today", "tomorrow's schedule", "show me this week", "what's next"
+AGENDA_PATTERNS = [
+    re.compile(
+        r"^(?:please\s+)?(?:(?:what'?s|whats|what\s+is|what\s+do\s+i\s+have|show(?:\s+me)?|get)\s+)?"
+        r"(?:on\s+)?(?:my\s+)?(?:(?:calendar|agenda|schedule|events|meetings)\s+)?(?:for\s+|on\s+)?"
+        r"(?P<view>today|tomorrow|this\s+week|the\s+week)\s*[?.!]*$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^(?:please\s+)?(?:(?:what'?s|whats|what\s+is|show(?:\s+me)?|get)\s+)?(?:my\s+)?"
+        r"(?P<view>today|tomorrow|this\s+week)'?s\s+(?:agenda|schedule|events|meetings)\s*[?.!]*$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^(?:(?:what'?s|whats|what\s+is)\s+)?(?:my\s+)?(?P<view>next)"
+        r"(?:\s+(?:up|event|meeting|appointment))?\s*[?.!]*$",
+        re.IGNORECASE,
+    ),
+]
+
+# Only requests that open with a create verb take the one-shot create path; the
+# classifier also says create_event for "what's on my schedule" or "make sure ..."
+CREATE_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:" + "|".join(verb.replace(" ", r"\s+") for verb in CREATE_VERBS) + r")\b",
+    re.IGNORECASE,
+)
+
+DELETE_PATTERNS = [
+    re.compile(
+        r"^(?:please\s+)?(?:delete|remove|cancel)\s+(?:the\s+)?(?:event\s+|meeting\s+)?"
+        r"[\"“'](?P<title>[^\"”']+)[\"”']\s*[.!]*$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^(?:please\s+)?(?:delete|remove|cancel)\s+(?:the\s+)?(?:event|meeting)\s+"
+        r"(?:called|titled|named)\s+(?P<title>.+?)\s*[.!]*$",
+        re.IGNORECASE,
+    ),
+]
+
+
+def extract_list_slots(text: str):
+    match = LIST_PATTERN.match(text.strip())
+    if not match:
+        return None
+    count = int(match.group("count")) if match.group("count") else DEFAULT_LIST_COUNT
+    return {"max_results": max(1, min(count, MAX_LIST_COUNT))}
+
+
+def extract_agenda_slots(text: str):
+    for pattern in AGENDA_PATTERNS:
+        match = pattern.match(text.strip())
+        if match:
+            view = match.group("view").lower()
+            return {"view": "week" if view.endswith("week") else view}
+    return None
+
+
+def is_create_request(text: str) -> bool:
+    return bool(CREATE_PATTERN.match(text.strip()))
+
+
+def extract_delete_slots(text: str):
+    for pattern in DELETE_PATTERNS:
+        match = pattern.match(text.strip())
+        if match:
+            return {"title": match.group("title").strip()}
+    return None
+
+
+# intent -> [(rule-based slot extractor, tool coroutine), ...], tried in order
+FAST_PATHS = {
+    "list_events": [(extract_list_slots, list_events_tool_func)],
+    "delete_event": [(extract_delete_slots, delete_event_tool_func)],
+}
+
+
+def record_route(path: str, intent: str, user_query: str):
+    route_counts[(path, intent)] += 1
+    logger.info("query routed via %s path (intent=%s): %r", path, intent, user_query)
+
+
+async def route_query(user_query: str):
+    """
+    Answer simple, unambiguous commands directly with the matching tool, and single
+    event creates through structured extraction.
+    Returns the tool's reply, or None when the query should go to the agent.
+    """
+    # Agenda reads often mention "schedule", which the classifier takes for a create
+    slots = extract_agenda_slots(user_query)
+    if slots is not None:
+        record_route("fast", "list_events", user_query)
+        return await agenda_tool_func(**slots)
+    intent = await intent_classifier_func(user_query)
+    for extract_slots, tool in FAST_PATHS.get(intent, []):
+        slots = extract_slots(user_query)
+        if slots is not None:
+            record_route("fast", intent, user_query)
+            return await tool(**slots)
+    # Single events are extracted with one structured LLM call instead of the agent loop
+    if (intent == "create_event" and CREATE_EXTRACTION and is_create_request(user_query)
+            and wants_single_event(user_query)):
+        reply = await extract_and_create_event(user_query)
+        if reply is not None:
+            record_route("extract", intent, user_query)
+            return reply
+    record_route("agent", intent, user_query)
+    return None
+
+
+def route_stats() -> dict:
+    return {f"{path}:{intent}": count for (path, intent), count in route_counts.items()}
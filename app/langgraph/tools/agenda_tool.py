@@ -0,0 +1,33 @@
+from app.core.agenda import get_agenda_views
+from app.core.async_calendar_client import get_async_calendar_client
+from app.core.auth import aget_token
+from app.core.errors import CalendarAPIError
+from app.core.event_mirror import aget_event_mirror
+from app.langgraph.tools.limits import per_user_limit
+
+USER_ID = "user123"  # ideally dynamic per session
+
+
+async def get_agenda(view: str = "today", user_id: str = USER_ID):
+    """
+    A precomputed agenda view (today, tomorrow, week or next) as a dict, or {"error": ...}.
+    Only touches Google when the user's mirror is due for a refresh.
+    """
+    credentials = await aget_token(user_id)
+    if not credentials:
+        return {"error": "User not authenticated."}
+
+    mirror = await aget_event_mirror(user_id)
+    try:
+        await mirror.aensure_fresh(get_async_calendar_client(credentials, user_id))
+    except CalendarAPIError as e:
+        return {"error": str(e)}
+    return get_agenda_views(user_id).view(mirror, view)
+
+
+@per_user_limit(USER_ID)
+async def agenda_tool_func(view: str = "today"):
+    agenda = await get_agenda(view.strip().lower())
+    if "error" in agenda:
+        return f"Error: {agenda['error']}"
+    return agenda["text"]
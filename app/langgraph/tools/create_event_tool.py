@@ -1,10 +1,12 @@
 from typing import Optional, List
 from pydantic import BaseModel
-from app.core.auth import get_token
-from app.core.google_calendar_crud import get_calendar_service, create_event, list_events
+from app.core.auth import aget_token
+from app.core.async_calendar_client import get_async_calendar_client
+from app.core.conflicts import format_conflict
+from app.core.event_mirror import aget_event_mirror
+from app.langgraph.tools.limits import booking_lock, per_user_limit
 from datetime import datetime, timedelta
-import asyncio
-from app.langgraph.utils import parse_natural_datetime, ensure_future_datetime, format_event_datetime, default_event_color, default_event_status
+from app.langgraph.utils import parse_natural_datetime, ensure_future_datetime, build_event_body
 from langchain_core.tools import StructuredTool
 
 USER_ID = "user123"  # ideally dynamic per session
@@ -23,6 +25,7 @@ class CreateEventInput(BaseModel):
     status: Optional[str] = None
     reminders: Optional[List[Reminder]] = None
 
+@per_user_limit(USER_ID)
 async def create_event_tool_func(
     summary: str,
     start_time: str,
@@ -33,11 +36,11 @@ async def create_event_tool_func(
     status: Optional[str] = None,
     reminders: Optional[List[dict]] = None,
 ):
-    credentials = get_token(USER_ID)
+    credentials = await aget_token(USER_ID)
     if not credentials:
         return "User not authenticated."
 
-    service = get_calendar_service(credentials)
+    client = get_async_calendar_client(credentials, USER_ID)
 
     # Parse and normalize start_time
     try:
@@ -61,72 +64,39 @@ async def create_event_tool_func(
     if start_dt < now:
         return "Cannot create events in the past."
 
-    # Conflict check - list events starting after start_time
-    events = list_events(service, max_results=20, time_min=start_dt.isoformat() + "Z")
-    if isinstance(events, dict) and "error" in events:
-        return f"Error fetching existing events: {events['error']}"
+    event_body = build_event_body(
+        summary,
+        start_dt,
+        end_dt,
+        location=location,
+        description=description,
+        color_id=color_id,
+        status=status,
+        reminders=reminders,
+    )
+
+    # Held until the insert lands, so a parallel create sees this event in its conflict check
+    async with booking_lock(USER_ID):
+        # Conflict check against the whole mirrored calendar, including long events that started earlier
+        conflicts = await client.check_conflicts([(start_dt, end_dt)])
+        if isinstance(conflicts, dict) and "error" in conflicts:
+            return f"Error fetching existing events: {conflicts['error']}"
+        if conflicts[0]:
+            mirror = await aget_event_mirror(USER_ID)
+            return format_conflict(conflicts[0][0], mirror.time_zone)
 
-    # Check overlap
-    for event in events:
-        ev_start_str = event.get("start", {}).get("dateTime") or event.get("start", {}).get("date")
-        ev_end_str = event.get("end", {}).get("dateTime") or event.get("end", {}).get("date")
-        if not ev_start_str or not ev_end_str:
-            continue
-        ev_start = datetime.fromisoformat(ev_start_str.replace("Z", "+00:00"))
-        ev_end = datetime.fromisoformat(ev_end_str.replace("Z", "+00:00"))
-        if (start_dt < ev_end) and (end_dt > ev_start):
-            conflict_summary = event.get("summary", "Untitled event")
-            conflict_start = ev_start.isoformat()
-            conflict_end = ev_end.isoformat()
-            return (
-                f"⚠️ Conflict with existing event '{conflict_summary}' "
-                f"from {conflict_start} to {conflict_end}. Please choose another time."
-            )
-
-    # Build event body
-    event_body = {
-        "summary": summary,
-        "start": {
-            "dateTime": format_event_datetime(start_dt),
-            "timeZone": "Asia/Dhaka",
-        },
-        "end": {
-            "dateTime": format_event_datetime(end_dt),
-            "timeZone": "Asia/Dhaka",
-        },
-        "status": status or default_event_status(),
-        "colorId": color_id or default_event_color("normal"),
-    }
-
-    if location:
-        event_body["location"] = location
-    if description:
-        event_body["description"] = description
-    if reminders:
-        event_body["reminders"] = {
-            "useDefault": False,
-            "overrides": [{"method": r["method"], "minutes": r["minutes"]} for r in reminders],
-        }
-    else:
-        event_body["reminders"] = {"useDefault": True}
-
-    loop = asyncio.get_event_loop()
-    try:
-        event = await loop.run_in_executor(None, lambda: create_event(service, event_body))
-    except Exception as e:
-        return f"Error creating event: {str(e)}"
+        try:
+            event = await client.create_event(event_body)
+        except Exception as e:
+            return f"Error creating event: {str(e)}"
 
     if isinstance(event, dict) and "error" in event:
         return f"Error from Google API: {event['error']}"
 
     return f"✅ Event '{summary}' created successfully from {start_dt.isoformat()} to {end_dt.isoformat()}."
 
-def create_event_tool_func_sync(**kwargs):
-    import asyncio
-    return asyncio.run(create_event_tool_func(**kwargs))
-
 CreateEventTool = StructuredTool.from_function(
-    func=create_event_tool_func_sync,
+    coroutine=create_event_tool_func,
     name="create_event",
     description="Create a Google Calendar event with title, time, location, and more. Checks for conflicts and avoids past events."
 )
\ No newline at end of file
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import pytz
+
+from app.core.async_calendar_client import get_async_calendar_client
+from app.core.auth import aget_token
+from app.core.errors import CalendarAPIError
+from app.core.free_slots import collect_busy_intervals, find_free_slots
+from app.langgraph.tools.limits import per_user_limit
+from app.langgraph.utils import parse_natural_datetime
+
+USER_ID = "user123"  # ideally dynamic per session
+
+DEFAULT_SEARCH_DAYS = 7
+# Longest window that can be searched; the finder holds one entry per minute of it
+MAX_SEARCH_DAYS = 60
+# Longest slot (and buffer) that can be searched for: one day
+MAX_SLOT_MINUTES = 24 * 60
+
+
+async def search_free_slots(
+    duration_minutes: int = 30,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    attendees: Optional[List[str]] = None,
+    work_start_hour: int = 9,
+    work_end_hour: int = 17,
+    include_weekends: bool = False,
+    buffer_minutes: int = 0,
+    max_results: int = 5,
+    user_id: str = USER_ID,
+):
+    """
+    Free slots for the user (and optional attendees) as a list of dicts, or {"error": ...}.
+    """
+    if not 0 < duration_minutes <= MAX_SLOT_MINUTES:
+        return {"error": f"duration_minutes must be between 1 and {MAX_SLOT_MINUTES}."}
+    if not 0 <= buffer_minutes <= MAX_SLOT_MINUTES:
+        return {"error": f"buffer_minutes must be between 0 and {MAX_SLOT_MINUTES}."}
+    if not 0 <= work_start_hour < work_end_hour <= 24:
+        return {"error": "Working hours must satisfy 0 <= work_start_hour < work_end_hour <= 24."}
+
+    try:
+        time_min = parse_natural_datetime(start) if start else datetime.now(pytz.utc)
+        time_max = parse_natural_datetime(end) if end else time_min + timedelta(days=DEFAULT_SEARCH_DAYS)
+    except ValueError as e:
+        return {"error": str(e)}
+    time_min = max(time_min, datetime.now(pytz.utc))
+    if time_max <= time_min:
+        return {"error": "The search window must end after it starts."}
+    if time_max - time_min > timedelta(days=MAX_SEARCH_DAYS):
+        return {"error": f"The search window can be at most {MAX_SEARCH_DAYS} days long."}
+
+    credentials = await aget_token(user_id)
+    if not credentials:
+        return {"error": "User not authenticated."}
+
+    client = get_async_calendar_client(credentials, user_id)
+    try:
+        busy, time_zone = await collect_busy_intervals(client, time_min, time_max, attendees)
+    except CalendarAPIError as error:
+        return {"error": str(error)}
+
+    weekdays = range(7) if include_weekends else range(5)
+    return find_free_slots(
+        busy, time_min, time_max, duration_minutes, time_zone,
+        work_start_hour=work_start_hour,
+        work_end_hour=work_end_hour,
+        weekdays=tuple(weekdays),
+        buffer_minutes=buffer_minutes,
+        max_results=max_results,
+    )
+
+
+@per_user_limit(USER_ID)
+async def find_free_slots_tool_func(
+    duration_minutes: int = 30,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    attendees: Optional[List[str]] = None,
+    work_start_hour: int = 9,
+    work_end_hour: int = 17,
+    include_weekends: bool = False,
+    buffer_minutes: int = 0,
+):
+    slots = await search_free_slots(
+        duration_minutes=duration_minutes,
+        start=start,
+        end=end,
+        attendees=attendees,
+        work_start_hour=work_start_hour,
+        work_end_hour=work_end_hour,
+        include_weekends=include_weekends,
+        buffer_minutes=buffer_minutes,
+    )
+    if isinstance(slots, dict) and "error" in slots:
+        return f"Error finding free slots: {slots['error']}"
+    if not slots:
+        return f"No free {duration_minutes}-minute slot found in that window."
+
+    lines = [f"- {slot['start']} (free until {slot['window_end']})" for slot in slots]
+    return f"Free {duration_minutes}-minute slots:\n" + "\n".join(lines)
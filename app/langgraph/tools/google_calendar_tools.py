@@ -1,15 +1,8 @@
-import asyncio
 from typing import Annotated, Optional
-from langchain_core.tools import Tool, StructuredTool
-from app.core.auth import get_token
-from app.core.google_calendar_crud import (
-    get_calendar_service,
-    create_event,
-    list_events,
-    update_event,
-    delete_event,
-    find_event_by_title
-)
+from langchain_core.tools import StructuredTool
+from app.core.auth import aget_token
+from app.core.async_calendar_client import get_async_calendar_client
+from app.langgraph.tools.limits import per_user_limit
 from datetime import datetime
 
 USER_ID = "user123"
@@ -25,15 +18,23 @@ def ensure_future_datetime(date_str: str, time_str: str) -> str:
     except Exception:
         return None
 
+async def not_found_message(client, title: str) -> str:
+    candidates = await client.find_events_by_title(title)
+    if isinstance(candidates, dict) or not candidates:
+        return f"No event found with title '{title}'."
+    suggestions = ", ".join(f"'{c['summary']}'" for c in candidates)
+    return f"No event found with title '{title}'. Did you mean: {suggestions}?"
+
 # Async event listing tool
+@per_user_limit(USER_ID)
 async def list_events_tool_func(max_results: int = 5):
-    credentials = get_token(USER_ID)
+    credentials = await aget_token(USER_ID)
     if not credentials:
         return "User not authenticated."
 
-    service = get_calendar_service(credentials)
+    client = get_async_calendar_client(credentials, USER_ID)
     now_iso = datetime.utcnow().isoformat() + "Z"
-    events = list_events(service, max_results=max_results, time_min=now_iso)
+    events = await client.list_events(max_results=max_results, time_min=now_iso)
     if isinstance(events, dict) and "error" in events:
         return f"Error: {events['error']}"
 
@@ -49,13 +50,14 @@ async def list_events_tool_func(max_results: int = 5):
     return "\n".join(formatted_events)
 
 # Async create event tool with timezone and datetime validation
+@per_user_limit(USER_ID)
 async def create_event_tool_func(
     summary: Annotated[str, "Title of the event."],
     start_time: Annotated[str, "Start time in ISO format (e.g., 2025-06-28T15:00:00)"],
     end_time: Annotated[str, "End time in ISO format (e.g., 2025-06-28T16:00:00)"],
     time_zone: Annotated[str, "Time zone, e.g., 'Asia/Dhaka'"] = "Asia/Dhaka"
 ):
-    credentials = get_token(USER_ID)
+    credentials = await aget_token(USER_ID)
     if not credentials:
         return "User not authenticated."
 
@@ -70,7 +72,7 @@ async def create_event_tool_func(
     except ValueError:
         return "Invalid datetime format. Please use ISO format: YYYY-MM-DDTHH:MM:SS"
 
-    service = get_calendar_service(credentials)
+    client = get_async_calendar_client(credentials, USER_ID)
 
     event_body = {
         "summary": summary,
@@ -87,39 +89,27 @@ async def create_event_tool_func(
         }
     }
 
-    event = create_event(service, event_body)
+    event = await client.create_event(event_body)
     if isinstance(event, dict) and "error" in event:
         return f"Error: {event['error']}"
 
     return f"✅ Event '{summary}' created successfully from {start_time} to {end_time} ({time_zone})."
 
-# Sync wrapper for list events
-def list_events_tool_func_sync(max_results: int = 5):
-    return asyncio.run(list_events_tool_func(max_results))
-
-# Sync wrapper for create event tool
-def create_event_tool_func_sync(
-    summary: str,
-    start_time: str,
-    end_time: str,
-    time_zone: str = "Asia/Dhaka"
-):
-    return asyncio.run(create_event_tool_func(summary, start_time, end_time, time_zone))
-
 # Define the tools
-ListEventsTool = Tool(
+ListEventsTool = StructuredTool.from_function(
+    coroutine=list_events_tool_func,
     name="list_events",
-    func=list_events_tool_func_sync,
     description="List your next calendar events. Optionally takes the number of events to return."
 )
 
 CreateEventTool = StructuredTool.from_function(
-    func=create_event_tool_func_sync,
+    coroutine=create_event_tool_func,
     name="create_event",
     description="Create a calendar event by specifying title, start time, end time, and optionally time zone."
 )
 
 # --- New: Async update event by title ---
+@per_user_limit(USER_ID)
 async def update_event_tool_func(
     title: str,
     new_summary: Optional[str] = None,
@@ -127,14 +117,14 @@ async def update_event_tool_func(
     new_end_time: Optional[str] = None,
     time_zone: str = "Asia/Dhaka"
 ):
-    credentials = get_token(USER_ID)
+    credentials = await aget_token(USER_ID)
     if not credentials:
         return "User not authenticated."
 
-    service = get_calendar_service(credentials)
-    event = find_event_by_title(service, title)
+    client = get_async_calendar_client(credentials, USER_ID)
+    event = await client.find_event_by_title(title)
     if not event:
-        return f"No event found with title '{title}'."
+        return await not_found_message(client, title)
 
     updated_event_body = event.copy()
 
@@ -145,51 +135,39 @@ async def update_event_tool_func(
     if new_end_time:
         updated_event_body["end"] = {"dateTime": new_end_time, "timeZone": time_zone}
 
-    updated_event = update_event(service, event["id"], updated_event_body)
+    updated_event = await client.update_event(event["id"], updated_event_body)
     if isinstance(updated_event, dict) and "error" in updated_event:
         return f"Error updating event: {updated_event['error']}"
 
     return f"✅ Event '{title}' updated successfully."
 
 # --- New: Async delete event by title ---
+@per_user_limit(USER_ID)
 async def delete_event_tool_func(title: str):
-    credentials = get_token(USER_ID)
+    credentials = await aget_token(USER_ID)
     if not credentials:
         return "User not authenticated."
 
-    service = get_calendar_service(credentials)
-    event = find_event_by_title(service, title)
+    client = get_async_calendar_client(credentials, USER_ID)
+    event = await client.find_event_by_title(title)
     if not event:
-        return f"No event found with title '{title}'."
+        return await not_found_message(client, title)
 
-    result = delete_event(service, event["id"])
+    result = await client.delete_event(event["id"])
     if isinstance(result, dict) and "error" in result:
         return f"Error deleting event: {result['error']}"
 
     return f"✅ Event '{title}' deleted successfully."
 
-# --- Sync wrappers ---
-def update_event_tool_func_sync(
-    title: str,
-    new_summary: Optional[str] = None,
-    new_start_time: Optional[str] = None,
-    new_end_time: Optional[str] = None,
-    time_zone: str = "Asia/Dhaka"
-):
-    return asyncio.run(update_event_tool_func(title, new_summary, new_start_time, new_end_time, time_zone))
-
-def delete_event_tool_func_sync(title: str):
-    return asyncio.run(delete_event_tool_func(title))
-
 # --- Define Tools ---
 UpdateEventTool = StructuredTool.from_function(
-    func=update_event_tool_func_sync,
+    coroutine=update_event_tool_func,
     name="update_event",
     description="Update a calendar event by title. You can change summary, start time, and end time."
 )
 
 DeleteEventTool = StructuredTool.from_function(
-    func=delete_event_tool_func_sync,
+    coroutine=delete_event_tool_func,
     name="delete_event",
     description="Delete a calendar event by title."
 )
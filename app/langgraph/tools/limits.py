@@ -0,0 +1,41 @@
+import asyncio
+import functools
+import os
+
+# Tool calls from one agent turn run concurrently; at most this many at a time per user
+TOOL_CONCURRENCY_PER_USER = int(os.getenv("TOOL_CONCURRENCY_PER_USER", "8"))
+
+# user_id -> semaphore
+_tool_slots = {}
+# user_id -> lock held from a new event's conflict check until it has been inserted
+_booking_locks = {}
+
+
+def tool_slot(user_id: str) -> asyncio.Semaphore:
+    slot = _tool_slots.get(user_id)
+    if slot is None:
+        slot = _tool_slots[user_id] = asyncio.Semaphore(TOOL_CONCURRENCY_PER_USER)
+    return slot
+
+
+def booking_lock(user_id: str) -> asyncio.Lock:
+    """
+    Serializes check-then-insert per user, so parallel tool calls cannot double-book a slot.
+    """
+    lock = _booking_locks.get(user_id)
+    if lock is None:
+        lock = _booking_locks[user_id] = asyncio.Lock()
+    return lock
+
+
+def per_user_limit(user_id: str):
+    """
+    Decorator for async tool functions: each call holds one of the user's tool slots.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with tool_slot(user_id):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
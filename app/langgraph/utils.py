@@ -1,20 +1,61 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import re
+import time
 import pytz
-import dateparser
 
-def parse_natural_datetime(text: str, default_timezone: str = "Asia/Dhaka") -> datetime:
+from app.core.metrics import datetime_parse_seconds
+
+PARSE_CACHE_SIZE = 1024
+
+# Strict ISO 8601 / RFC 3339 input, as the LLM usually sends it
+ISO_DATETIME_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+def parse_iso_datetime(text: str, default_timezone: str = "Asia/Dhaka"):
     """
-    Parses a natural language datetime string into a timezone-aware datetime object.
-    Uses dateparser for flexible parsing of human phrases.
-    Raises ValueError if parsing fails.
+    Fast path for strict ISO 8601 input. Naive values are taken as local to default_timezone.
+    Returns None if the text is not strict ISO 8601.
     """
+    if not ISO_DATETIME_PATTERN.match(text):
+        return None
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = pytz.timezone(default_timezone).localize(dt)
+    return dt
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_relative_datetime(text: str, default_timezone: str, relative_base: datetime):
+    # dateparser is slow to import, so only load it once a phrase actually needs it
+    import dateparser
+
     settings = {
         'TIMEZONE': default_timezone,
         'RETURN_AS_TIMEZONE_AWARE': True,
         'PREFER_DATES_FROM': 'future',
-        'RELATIVE_BASE': datetime.now(pytz.timezone(default_timezone))
+        'RELATIVE_BASE': relative_base
     }
-    dt = dateparser.parse(text, settings=settings)
+    return dateparser.parse(text, settings=settings)
+
+def parse_natural_datetime(text: str, default_timezone: str = "Asia/Dhaka") -> datetime:
+    """
+    Parses a natural language datetime string into a timezone-aware datetime object.
+    Strict ISO 8601 strings are parsed directly; other phrases go through dateparser,
+    cached per (text, timezone, current minute).
+    Raises ValueError if parsing fails.
+    """
+    start = time.perf_counter()
+    text = text.strip()
+    dt = parse_iso_datetime(text, default_timezone)
+    if dt is not None:
+        datetime_parse_seconds.observe(time.perf_counter() - start, path="iso")
+        return dt
+
+    relative_base = datetime.now(pytz.timezone(default_timezone)).replace(second=0, microsecond=0)
+    dt = _parse_relative_datetime(text, default_timezone, relative_base)
+    datetime_parse_seconds.observe(time.perf_counter() - start, path="natural")
     if dt is None:
         raise ValueError(f"Could not parse datetime from input: {text}")
     return dt
@@ -70,3 +111,49 @@ def default_event_status() -> str:
     Return default event status.
     """
     return "busy"
+
+def _event_time(value, time_zone: str) -> dict:
+    # Dates without a time are all-day events
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return {"date": value.isoformat()}
+    return {"dateTime": format_event_datetime(value), "timeZone": time_zone}
+
+def build_event_body(
+    summary: str,
+    start,
+    end,
+    location: str = None,
+    description: str = None,
+    color_id: str = None,
+    status: str = None,
+    reminders: list = None,
+    time_zone: str = "Asia/Dhaka",
+    recurrence: list = None,
+) -> dict:
+    """
+    Google Calendar event body, shared by the create_event tool and the ICS import.
+    start/end are datetimes, or dates for all-day events; reminders are {"method", "minutes"} dicts.
+    """
+    event_body = {
+        "summary": summary,
+        "start": _event_time(start, time_zone),
+        "end": _event_time(end, time_zone),
+        "status": status or default_event_status(),
+        "colorId": color_id or default_event_color("normal"),
+    }
+
+    if location:
+        event_body["location"] = location
+    if description:
+        event_body["description"] = description
+    if reminders:
+        event_body["reminders"] = {
+            "useDefault": False,
+            "overrides": [{"method": r["method"], "minutes": r["minutes"]} for r in reminders],
+        }
+    else:
+        event_body["reminders"] = {"useDefault": True}
+    if recurrence:
+        event_body["recurrence"] = recurrence
+    return event_body
+
@@ -0,0 +1,152 @@
+import asyncio
+import os
+from collections import Counter
+
+from app.core.google_calendar_crud import create_events_bulk, get_calendar_service, update_events_bulk
+from app.core.ics import exdate_line, iter_vevents, recurrence_stamp, vevent_fields
+from app.langgraph.utils import build_event_body
+
+DEFAULT_TIMEZONE = "Asia/Dhaka"
+# Events conflict-checked and created together; the next chunk is parsed while one is being created
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+
+def vevent_to_body(vevent: dict):
+    """
+    (fields, event body) for a parsed VEVENT, with the same body the create_event tool builds.
+    """
+    fields = vevent_fields(vevent, DEFAULT_TIMEZONE)
+    body = build_event_body(
+        fields["summary"],
+        fields["start"],
+        fields["end"],
+        location=fields["location"],
+        description=fields["description"],
+        status=fields["status"],
+        reminders=fields["reminders"],
+        time_zone=fields["time_zone"],
+        recurrence=fields["recurrence"],
+    )
+    if fields["transparent"]:
+        body["transparency"] = "transparent"
+    return fields, body
+
+
+def _outcome(index, fields, result, status="created") -> dict:
+    outcome = {"type": "event", "index": index, "uid": fields["uid"], "summary": fields["summary"]}
+    if result.get("error") == "conflict":
+        outcome.update(status="conflict", conflicts=result["conflicts"])
+    elif "error" in result:
+        outcome.update(status="error", error=result["error"])
+    else:
+        outcome.update(status=status, id=result.get("id"))
+    return outcome
+
+
+def instance_id(series_id: str, recurrence_id) -> str:
+    """
+    The Calendar id of one instance of a recurring event: the series id plus its original start.
+    """
+    return f"{series_id}_{recurrence_stamp(recurrence_id)}"
+
+
+async def import_ics(chunks, credentials, user_id: str, check_conflicts: bool = True):
+    """
+    Import the VEVENTs of an iCalendar byte stream into the user's primary calendar.
+    Yields one {"type": "event", ...} outcome per VEVENT, a {"type": "progress", ...}
+    line after each chunk and a final {"type": "done", ...} with the totals.
+    Recurring series are created last: cancelled instances (overrides with a RECURRENCE-ID)
+    become EXDATEs of their series, and changed instances update the created series' instance.
+    """
+    loop = asyncio.get_running_loop()
+    totals = Counter()
+    chunk = []  # (index, fields, body)
+    running = None  # (chunk, future) being created in the executor
+    series = {}  # UID -> (index, fields, body) of a recurring event
+    overrides = []  # (index, fields, body) of single instances of a series
+
+    def start(items):
+        bodies = [body for _, _, body in items]
+        # The service is looked up on the executor thread: httplib2 transports are per thread
+        return items, loop.run_in_executor(None, lambda: create_events_bulk(
+            get_calendar_service(credentials, user_id), bodies, user_id=user_id, check_conflicts=check_conflicts
+        ))
+
+    async def finish(job):
+        items, future = job
+        results = await future
+        outcomes = [_outcome(index, fields, result) for (index, fields, _), result in zip(items, results)]
+        totals.update(outcome["status"] for outcome in outcomes)
+        return outcomes
+
+    index = -1
+    async for vevent in iter_vevents(chunks):
+        index += 1
+        totals["parsed"] += 1
+        try:
+            fields, body = vevent_to_body(vevent)
+        except ValueError as error:
+            totals["invalid"] += 1
+            yield {"type": "event", "index": index, "status": "invalid", "error": str(error)}
+            continue
+        if fields["recurrence_id"] is not None:
+            overrides.append((index, fields, body))
+            continue
+        if fields["status"] == "cancelled":
+            totals["skipped"] += 1
+            yield {"type": "event", "index": index, "uid": fields["uid"], "status": "skipped"}
+            continue
+        if fields["recurrence"] and fields["uid"] and fields["uid"] not in series:
+            # Held back until all of its overrides have been seen
+            series[fields["uid"]] = (index, fields, body)
+            continue
+
+        chunk.append((index, fields, body))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            # Conflict checks of this chunk must see the previous chunk's events
+            if running is not None:
+                for outcome in await finish(running):
+                    yield outcome
+                yield {"type": "progress", **totals}
+            running, chunk = start(chunk), []
+
+    if running is not None:
+        for outcome in await finish(running):
+            yield outcome
+    if chunk:
+        for outcome in await finish(start(chunk)):
+            yield outcome
+
+    for _, fields, body in overrides:
+        if fields["status"] == "cancelled" and fields["uid"] in series:
+            series[fields["uid"]][2]["recurrence"].append(exdate_line(fields["recurrence_id"]))
+    created = {}  # UID -> event id of the created series
+    items = list(series.values())
+    for position in range(0, len(items), IMPORT_CHUNK_SIZE):
+        for outcome in await finish(start(items[position:position + IMPORT_CHUNK_SIZE])):
+            if outcome["status"] == "created":
+                created[outcome["uid"]] = outcome["id"]
+            yield outcome
+
+    updates = []  # (index, fields, body) of changed instances of a created series
+    for index, fields, body in overrides:
+        outcome = {"type": "event", "index": index, "uid": fields["uid"], "summary": fields["summary"]}
+        if fields["uid"] not in created:
+            outcome.update(status="error", error="The recurring event this instance belongs to was not imported.")
+        elif fields["status"] == "cancelled":
+            outcome.update(status="excluded", id=created[fields["uid"]])
+        else:
+            updates.append((index, fields, body))
+            continue
+        totals[outcome["status"]] += 1
+        yield outcome
+    if updates:
+        pairs = [(instance_id(created[fields["uid"]], fields["recurrence_id"]), body) for _, fields, body in updates]
+        results = await loop.run_in_executor(None, lambda: update_events_bulk(
+            get_calendar_service(credentials, user_id), pairs, user_id=user_id
+        ))
+        for (index, fields, _), result in zip(updates, results):
+            outcome = _outcome(index, fields, result, status="updated")
+            totals[outcome["status"]] += 1
+            yield outcome
+    yield {"type": "done", **totals}
@@ -1,16 +1,196 @@
+import asyncio
+import importlib
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.google_api import load_discovery_document
+from app.core.state_backend import held_lease, state_backend
 from app.langgraph.agent import create_schedule_agent
+from app.langgraph.instrumentation import MetricsCallbackHandler
+from app.langgraph.router import route_query
+from app.langgraph.utils import parse_natural_datetime
+
+logger = logging.getLogger(__name__)
+
+# Set SCHEDULE_STARTUP_TIMINGS=1 to log import, agent build and first-request timings
+STARTUP_TIMINGS = os.getenv("SCHEDULE_STARTUP_TIMINGS", "0") == "1"
+
+# With several workers a conversation thread is leased to the one running on it; renewed while held
+THREAD_LEASE_SECONDS = float(os.getenv("SCHEDULE_THREAD_LEASE_SECONDS", "60"))
+
+HEAVY_MODULES = [
+    "langgraph.prebuilt",
+    "app.langgraph.llm",
+    "googleapiclient.discovery",
+    "dateparser",
+]
 
 class ScheduleService:
     def __init__(self):
         self.agent = None
+        self._init_lock = asyncio.Lock()
+        # thread_id -> [lock, runs holding or waiting for it]; one agent run per
+        # conversation thread at a time, and the entry is dropped once the thread is idle
+        self._thread_locks = {}
+        self.timings = {}
 
     async def init_agent(self):
-        if self.agent is None:
-            self.agent = await create_schedule_agent()
+        if self.agent is not None:
+            return
+        # Single flight: concurrent first requests wait for one build instead of each compiling an agent
+        async with self._init_lock:
+            if self.agent is None:
+                start = time.perf_counter()
+                self.agent = await create_schedule_agent()
+                self.timings["agent_build_ms"] = (time.perf_counter() - start) * 1000
+
+    async def prewarm(self):
+        """
+        Load heavy modules, caches and the agent ahead of the first request.
+        """
+        loop = asyncio.get_running_loop()
+        for module in HEAVY_MODULES:
+            start = time.perf_counter()
+            await loop.run_in_executor(None, importlib.import_module, module)
+            self.timings[f"import_{module}_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        load_discovery_document()
+        parse_natural_datetime("tomorrow at 9am")
+        self.timings["caches_ms"] = (time.perf_counter() - start) * 1000
 
-    async def handle_query(self, user_query: str):
         await self.init_agent()
-        result = await self.agent.ainvoke({
-            "messages": [{"role": "user", "content": user_query}]
-        })
+        if STARTUP_TIMINGS:
+            logger.info("prewarm timings: %s", self._format_timings())
+
+    def _format_timings(self) -> str:
+        return ", ".join(f"{name}={value:.1f}" for name, value in self.timings.items())
+
+    def _record_first_query(self, start: float):
+        if "first_query_ms" not in self.timings:
+            self.timings["first_query_ms"] = (time.perf_counter() - start) * 1000
+            if STARTUP_TIMINGS:
+                logger.info("first query timings: %s", self._format_timings())
+
+    async def close(self):
+        # Only the SQLite checkpointer holds a connection
+        conn = getattr(self.agent.checkpointer, "conn", None) if self.agent is not None else None
+        if conn is not None:
+            await conn.close()
+
+    @staticmethod
+    def conversation_thread(user_id: str, conversation_id: str = None) -> str:
+        """
+        Checkpointer thread of a conversation: one per user unless the client names conversations.
+        Every request currently runs as the single demo user, so clients that want
+        independent concurrent conversations must pass distinct conversation ids.
+        """
+        return f"{user_id}:{conversation_id}" if conversation_id else user_id
+
+    @staticmethod
+    def thread_config(thread_id: str) -> dict:
+        return {
+            "configurable": {"thread_id": thread_id},
+            "callbacks": [MetricsCallbackHandler()],
+        }
+
+    @asynccontextmanager
+    async def thread_lock(self, thread_id: str):
+        """
+        Hold the conversation thread: concurrent runs on one thread would interleave
+        tool calls and results in its history. The lock orders runs in this worker,
+        and a lease in the shared state backend orders them across workers.
+        """
+        entry = self._thread_locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                if not state_backend.shared:
+                    yield
+                    return
+                async with held_lease(f"thread:{thread_id}", THREAD_LEASE_SECONDS):
+                    yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._thread_locks[thread_id]
+
+    async def remember_turn(self, user_query: str, reply, thread_id: str):
+        """
+        Add a turn answered without the agent (fast path or extraction) to the user's
+        thread, so a follow-up like "move it to 3pm" has its context.
+        """
+        await self.init_agent()
+        try:
+            async with self.thread_lock(thread_id):
+                await self.agent.aupdate_state(
+                    {"configurable": {"thread_id": thread_id}},
+                    {"messages": [HumanMessage(content=user_query), AIMessage(content=str(reply))]},
+                    # Recorded as the model's answer, so the thread ends on a finished turn
+                    as_node="agent",
+                )
+        except Exception:
+            # The reply was already produced; a missing history entry must not fail it
+            logger.exception("Could not add a fast-path turn to thread %s", thread_id)
+
+    async def handle_query(self, user_query: str, user_id: str, conversation_id: str = None):
+        start = time.perf_counter()
+        thread_id = self.conversation_thread(user_id, conversation_id)
+        # Simple commands are answered by the rule-based router without an LLM round trip
+        fast_result = await route_query(user_query)
+        if fast_result is not None:
+            await self.remember_turn(user_query, fast_result, thread_id)
+            self._record_first_query(start)
+            return fast_result
+
+        await self.init_agent()
+        async with self.thread_lock(thread_id):
+            result = await self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": user_query}]},
+                config=self.thread_config(thread_id),
+            )
+        self._record_first_query(start)
         return result
+
+    async def stream_query(self, user_query: str, user_id: str, conversation_id: str = None):
+        """
+        Run a query and yield (event, data) pairs as the agent works:
+        "token" for LLM output chunks, "tool_start"/"tool_end" around tool calls,
+        and a final "done" with the complete response.
+        """
+        thread_id = self.conversation_thread(user_id, conversation_id)
+        fast_result = await route_query(user_query)
+        if fast_result is not None:
+            await self.remember_turn(user_query, fast_result, thread_id)
+            yield "done", {"response": fast_result}
+            return
+
+        await self.init_agent()
+        final_text = ""
+        async with self.thread_lock(thread_id):
+            async for event in self.agent.astream_events(
+                {"messages": [{"role": "user", "content": user_query}]},
+                config=self.thread_config(thread_id),
+                version="v2",
+            ):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if isinstance(content, str) and content:
+                        yield "token", {"text": content}
+                elif kind == "on_chat_model_end":
+                    output = event["data"].get("output")
+                    content = getattr(output, "content", "")
+                    if isinstance(content, str) and content.strip():
+                        final_text = content
+                elif kind == "on_tool_start":
+                    yield "tool_start", {"tool": event["name"], "input": event["data"].get("input")}
+                elif kind == "on_tool_end":
+                    output = event["data"].get("output")
+                    yield "tool_end", {"tool": event["name"], "output": str(getattr(output, "content", output))}
+
+        yield "done", {"response": final_text or "No response content available."}
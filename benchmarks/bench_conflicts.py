@@ -0,0 +1,95 @@
+"""
+Microbenchmark for the conflict index against a linear scan.
+
+Run from the repository root:
+    python -m benchmarks.bench_conflicts
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.core.conflicts import ConflictIndex
+from app.core.event_mirror import event_bounds
+
+TIME_ZONE = "Asia/Dhaka"
+
+
+def make_events(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    tz = pytz.timezone(TIME_ZONE)
+    base = tz.localize(datetime(2025, 1, 1, 8, 0))
+    events = []
+    for i in range(count):
+        if rng.random() < 0.05:
+            day = (base + timedelta(days=rng.randrange(365))).date()
+            events.append({
+                "id": f"e{i}",
+                "summary": f"All-day {i}",
+                "start": {"date": day.isoformat()},
+                "end": {"date": (day + timedelta(days=rng.choice([1, 1, 3]))).isoformat()},
+            })
+            continue
+        start = base + timedelta(days=rng.randrange(365), minutes=rng.randrange(0, 10 * 60, 15))
+        end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 240]))
+        events.append({
+            "id": f"e{i}",
+            "summary": f"Meeting {i}",
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": end.isoformat()},
+        })
+    return events
+
+
+def make_candidates(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    tz = pytz.timezone(TIME_ZONE)
+    base = tz.localize(datetime(2025, 1, 1, 8, 0))
+    candidates = []
+    for _ in range(count):
+        start = base + timedelta(days=rng.randrange(365), minutes=rng.randrange(0, 10 * 60, 15))
+        candidates.append((start, start + timedelta(minutes=30)))
+    return candidates
+
+
+def linear_conflicts(events, start, end):
+    found = []
+    for event in events:
+        ev_start, ev_end = event_bounds(event, TIME_ZONE)
+        if start < ev_end and end > ev_start:
+            found.append(event)
+    return found
+
+
+def run(event_count: int, query_count: int = 1000):
+    events = make_events(event_count)
+    candidates = make_candidates(query_count)
+
+    t0 = time.perf_counter()
+    index = ConflictIndex(events, TIME_ZONE)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = index.find_conflicts_many(candidates)
+    indexed_time = time.perf_counter() - t0
+
+    linear_sample = candidates[:50]
+    t0 = time.perf_counter()
+    linear = [linear_conflicts(events, start, end) for start, end in linear_sample]
+    linear_time = (time.perf_counter() - t0) / len(linear_sample) * query_count
+
+    for got, expected in zip(indexed, linear):
+        assert {e["id"] for e in got} == {e["id"] for e in expected}
+
+    print(
+        f"{event_count:>7} events | build {build * 1000:8.1f} ms | "
+        f"{query_count} queries: index {indexed_time * 1000:8.2f} ms, "
+        f"linear (extrapolated) {linear_time * 1000:10.1f} ms | "
+        f"{indexed_time * 1e6 / query_count:6.1f} us/query"
+    )
+
+
+if __name__ == "__main__":
+    for n in (1_000, 10_000, 50_000):
+        run(n)
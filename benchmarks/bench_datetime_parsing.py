@@ -0,0 +1,80 @@
+"""
+Throughput of parse_natural_datetime against the previous uncached dateparser-only version.
+
+Run from the repository root:
+    python -m benchmarks.bench_datetime_parsing
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.langgraph.utils import parse_natural_datetime
+
+TIME_ZONE = "Asia/Dhaka"
+
+RELATIVE_PHRASES = [
+    "tomorrow at 3pm",
+    "tomorrow at 10am",
+    "today at 5pm",
+    "in 2 hours",
+    "in 30 minutes",
+    "monday 9am",
+    "friday at 4pm",
+    "next week",
+    "July 10 at 2pm",
+    "10 July 2026 14:30",
+    "tomorrow 11:00",
+    "in 3 days",
+]
+
+
+def legacy_parse(text: str, default_timezone: str = TIME_ZONE):
+    import dateparser
+
+    settings = {
+        'TIMEZONE': default_timezone,
+        'RETURN_AS_TIMEZONE_AWARE': True,
+        'PREFER_DATES_FROM': 'future',
+        'RELATIVE_BASE': datetime.now(pytz.timezone(default_timezone)),
+    }
+    return dateparser.parse(text, settings=settings)
+
+
+def make_corpus(size: int, iso_share: float = 0.7, seed: int = 3):
+    """
+    LLM tool calls mostly carry ISO strings; the rest are a small set of recurring phrases.
+    """
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1, 8, 0)
+    corpus = []
+    for _ in range(size):
+        if rng.random() < iso_share:
+            dt = base + timedelta(days=rng.randrange(180), minutes=rng.randrange(0, 10 * 60, 15))
+            corpus.append(dt.isoformat())
+        else:
+            corpus.append(rng.choice(RELATIVE_PHRASES))
+    return corpus
+
+
+def throughput(parse, corpus):
+    t0 = time.perf_counter()
+    for text in corpus:
+        parse(text)
+    return len(corpus) / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    import dateparser  # noqa: F401
+    print(f"dateparser import: {(time.perf_counter() - t0) * 1000:.0f} ms (now skipped for ISO-only workloads)")
+
+    for iso_share in (1.0, 0.7, 0.0):
+        corpus = make_corpus(2000, iso_share=iso_share)
+        legacy = throughput(legacy_parse, corpus)
+        current = throughput(parse_natural_datetime, corpus)
+        print(
+            f"ISO share {iso_share:.0%}: legacy {legacy:10.0f} parses/s | "
+            f"current {current:10.0f} parses/s | x{current / legacy:.1f}"
+        )
@@ -0,0 +1,464 @@
+"""
+Local stand-in for the Google Calendar v3 API, for load tests without network or OAuth.
+
+Supports events list (time bounds, ordering, paging, sync tokens, `fields` item
+masks), get, insert, update, patch, delete, freeBusy and the batch endpoint, with
+configurable latency and error injection. Authorization headers are accepted but not checked.
+events.watch and channels.stop are supported too: every write to a watched calendar
+POSTs a push notification to the channel's address, as Google does.
+
+Run from the repository root:
+    python -m benchmarks.fake_calendar --port 8099 --latency-ms 40 --error-rate 0.01
+
+and point the service at it with
+    GOOGLE_CALENDAR_BASE_URL=http://127.0.0.1:8099/calendar/v3
+"""
+import argparse
+import asyncio
+import json
+import time
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+TIME_ZONE = "Asia/Dhaka"
+DEFAULT_PAGE_SIZE = 250
+MAX_PAGE_SIZE = 2500
+# Google caps events.watch channels at a few weeks; the fake accepts any ttl up to this
+MAX_CHANNEL_TTL_SECONDS = 30 * 24 * 3600
+# Writes within this window reach a channel as one notification
+NOTIFY_DELAY_SECONDS = 0.05
+
+ERROR_BODIES = {
+    429: ("rateLimitExceeded", "Rate Limit Exceeded"),
+    403: ("userRateLimitExceeded", "User Rate Limit Exceeded"),
+    500: ("backendError", "Backend Error"),
+    503: ("backendError", "Service Unavailable"),
+}
+
+
+def api_error(status: int, reason: str, message: str) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}},
+        status_code=status,
+    )
+
+
+def parse_time(value: dict):
+    if "dateTime" in value:
+        parsed = datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(value["date"]).replace(tzinfo=timezone.utc)
+
+
+def partial_item_fields(fields: str):
+    """
+    Event fields selected by a "nextPageToken,items(id,summary,...)" partial-response mask.
+    """
+    if not fields or "items(" not in fields:
+        return None
+    return set(fields.split("items(", 1)[1].split(")", 1)[0].split(","))
+
+
+def parse_bound(value: str):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+class FakeCalendarStore:
+    """
+    In-memory calendars. Every write bumps a global sequence number; a sync token
+    is the sequence it was issued at, and deleted events are kept as cancelled
+    tombstones so incremental syncs can report them.
+    """
+
+    def __init__(self):
+        self.calendars = {}  # calendar id -> {event id: event}
+        self.updated_seq = {}  # (calendar id, event id) -> sequence of the last write
+        self.seq = 0
+        # Tokens issued before this sequence are rejected with 410 Gone
+        self.min_sync_seq = 0
+        self._lock = threading.Lock()
+
+    def _events(self, calendar_id: str) -> dict:
+        return self.calendars.setdefault(calendar_id, {})
+
+    def _write(self, calendar_id: str, event: dict) -> dict:
+        self.seq += 1
+        event["updated"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        event["etag"] = f'"{self.seq}"'
+        self._events(calendar_id)[event["id"]] = event
+        self.updated_seq[(calendar_id, event["id"])] = self.seq
+        return event
+
+    def insert(self, calendar_id: str, body: dict) -> dict:
+        event = dict(body)
+        event.setdefault("id", uuid.uuid4().hex)
+        event.setdefault("status", "confirmed")
+        event["kind"] = "calendar#event"
+        with self._lock:
+            return self._write(calendar_id, event)
+
+    def get(self, calendar_id: str, event_id: str):
+        event = self._events(calendar_id).get(event_id)
+        if event is None or event.get("status") == "cancelled":
+            return None
+        return event
+
+    def update(self, calendar_id: str, event_id: str, body: dict, patch: bool = False):
+        with self._lock:
+            existing = self.get(calendar_id, event_id)
+            if existing is None:
+                return None
+            event = {**existing, **body} if patch else {**body, "kind": "calendar#event"}
+            event["id"] = event_id
+            event.setdefault("status", "confirmed")
+            return self._write(calendar_id, event)
+
+    def delete(self, calendar_id: str, event_id: str) -> bool:
+        with self._lock:
+            if self.get(calendar_id, event_id) is None:
+                return False
+            self._write(calendar_id, {"id": event_id, "status": "cancelled"})
+            return True
+
+    def list(self, calendar_id: str, params: dict):
+        """
+        Returns (body, None) or (None, error response).
+        """
+        sync_token = params.get("syncToken")
+        with self._lock:
+            current_seq = self.seq
+            events = list(self._events(calendar_id).values())
+            seqs = {event["id"]: self.updated_seq[(calendar_id, event["id"])] for event in events}
+
+        if sync_token:
+            if any(params.get(name) for name in ("timeMin", "timeMax", "q", "orderBy")):
+                return None, api_error(400, "invalid", "syncToken cannot be combined with these parameters")
+            try:
+                token_seq = int(sync_token.removeprefix("s"))
+            except ValueError:
+                return None, api_error(400, "invalid", "Invalid sync token value.")
+            if token_seq < self.min_sync_seq:
+                return None, api_error(410, "fullSyncRequired", "Sync token is no longer valid, a full sync is required.")
+            items = [event for event in events if seqs[event["id"]] > token_seq]
+        else:
+            show_deleted = params.get("showDeleted") == "true"
+            time_min = parse_bound(params.get("timeMin"))
+            time_max = parse_bound(params.get("timeMax"))
+            query = (params.get("q") or "").lower()
+            items = []
+            for event in events:
+                if event.get("status") == "cancelled":
+                    if show_deleted:
+                        items.append(event)
+                    continue
+                start, end = parse_time(event["start"]), parse_time(event["end"])
+                if time_min and end <= time_min:
+                    continue
+                if time_max and start >= time_max:
+                    continue
+                if query and query not in event.get("summary", "").lower():
+                    continue
+                items.append(event)
+            if params.get("orderBy") == "startTime":
+                items.sort(key=lambda event: parse_time(event["start"]))
+
+        page_size = min(int(params.get("maxResults", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        offset = int(params.get("pageToken") or 0)
+        body = {
+            "kind": "calendar#events",
+            "summary": calendar_id,
+            "timeZone": TIME_ZONE,
+            "items": items[offset:offset + page_size],
+        }
+        item_fields = partial_item_fields(params.get("fields"))
+        if item_fields:
+            body["items"] = [{k: v for k, v in event.items() if k in item_fields} for event in body["items"]]
+        if offset + page_size < len(items):
+            body["nextPageToken"] = str(offset + page_size)
+        elif not any(params.get(name) for name in ("timeMax", "q", "orderBy")):
+            body["nextSyncToken"] = f"s{current_seq}"
+        return body, None
+
+    def freebusy(self, body: dict) -> dict:
+        time_min, time_max = parse_bound(body["timeMin"]), parse_bound(body["timeMax"])
+        calendars = {}
+        for item in body.get("items", []):
+            busy = []
+            for event in list(self._events(item["id"]).values()):
+                if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+                    continue
+                start, end = parse_time(event["start"]), parse_time(event["end"])
+                if start < time_max and end > time_min:
+                    busy.append({"start": start.isoformat(), "end": end.isoformat()})
+            busy.sort(key=lambda period: period["start"])
+            calendars[item["id"]] = {"busy": busy}
+        return {"kind": "calendar#freeBusy", "timeMin": body["timeMin"], "timeMax": body["timeMax"], "calendars": calendars}
+
+    def seed(self, calendar_id: str, count: int, seed: int = 7):
+        rng = random.Random(seed)
+        base = datetime.now(timezone(timedelta(hours=6))).replace(hour=9, minute=0, second=0, microsecond=0)
+        for i in range(count):
+            start = base + timedelta(days=rng.randrange(-7, 60), minutes=rng.randrange(0, 9 * 60, 15))
+            end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 90]))
+            self.insert(calendar_id, {
+                "summary": f"Seeded meeting {i}",
+                "start": {"dateTime": start.isoformat(), "timeZone": TIME_ZONE},
+                "end": {"dateTime": end.isoformat(), "timeZone": TIME_ZONE},
+            })
+
+
+class WatchHub:
+    """
+    events.watch channels and the push notifications sent for them.
+    """
+
+    def __init__(self):
+        self.channels = {}  # channel id -> channel
+        self.sent = 0
+        self.failed = 0
+        self._pending = set()  # channel ids with a notification scheduled
+        self._http = None
+
+    def watch(self, calendar_id: str, body: dict) -> dict:
+        ttl = min(int((body.get("params") or {}).get("ttl", 604800)), MAX_CHANNEL_TTL_SECONDS)
+        channel = {
+            "kind": "api#channel",
+            "id": body["id"],
+            "resourceId": uuid.uuid5(uuid.NAMESPACE_URL, calendar_id).hex,
+            "resourceUri": f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
+            "token": body.get("token"),
+            "expiration": str(int((time.time() + ttl) * 1000)),
+        }
+        self.channels[body["id"]] = {**channel, "address": body["address"], "calendar_id": calendar_id, "message": 0}
+        self._schedule(body["id"], "sync", delay=0)
+        return channel
+
+    def stop(self, body: dict) -> bool:
+        channel = self.channels.get(body.get("id"))
+        if channel is None or channel["resourceId"] != body.get("resourceId"):
+            return False
+        del self.channels[body["id"]]
+        return True
+
+    def notify(self, calendar_id: str):
+        now_ms = time.time() * 1000
+        for channel_id, channel in list(self.channels.items()):
+            if channel["calendar_id"] != calendar_id:
+                continue
+            if int(channel["expiration"]) <= now_ms:
+                del self.channels[channel_id]
+                continue
+            if channel_id not in self._pending:
+                self._schedule(channel_id, "exists", delay=NOTIFY_DELAY_SECONDS)
+
+    def _schedule(self, channel_id: str, state: str, delay: float):
+        self._pending.add(channel_id)
+        asyncio.get_running_loop().create_task(self._send(channel_id, state, delay))
+
+    async def _send(self, channel_id: str, state: str, delay: float):
+        await asyncio.sleep(delay)
+        self._pending.discard(channel_id)
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            return
+        channel["message"] += 1
+        headers = {
+            "X-Goog-Channel-ID": channel_id,
+            "X-Goog-Message-Number": str(channel["message"]),
+            "X-Goog-Resource-ID": channel["resourceId"],
+            "X-Goog-Resource-State": state,
+            "X-Goog-Resource-URI": channel["resourceUri"],
+            "X-Goog-Channel-Expiration": time.strftime(
+                "%a, %d %b %Y %H:%M:%S GMT", time.gmtime(int(channel["expiration"]) / 1000)
+            ),
+        }
+        if channel["token"]:
+            headers["X-Goog-Channel-Token"] = channel["token"]
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10.0)
+        try:
+            response = await self._http.post(channel["address"], headers=headers)
+            ok = response.status_code < 300
+        except httpx.HTTPError:
+            ok = False
+        self.sent += ok
+        self.failed += not ok
+
+
+class FaultConfig:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 429, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+
+    async def delay(self):
+        latency = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    def injected_error(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            reason, message = ERROR_BODIES.get(self.error_status, ("backendError", "Injected error"))
+            return api_error(self.error_status, reason, message)
+        return None
+
+
+def create_app(store: FakeCalendarStore = None, faults: FaultConfig = None) -> FastAPI:
+    store = store or FakeCalendarStore()
+    faults = faults or FaultConfig()
+    stats = {"requests": 0, "batch_items": 0, "injected_errors": 0}
+    watches = WatchHub()
+    app = FastAPI(title="Fake Google Calendar v3")
+    app.state.store = store
+    app.state.faults = faults
+    app.state.watches = watches
+
+    def dispatch(method: str, path: str, params: dict, body):
+        """
+        Handle one API call; shared by the REST routes and the batch endpoint.
+        """
+        injected = faults.injected_error()
+        if injected is not None:
+            stats["injected_errors"] += 1
+            return injected
+
+        parts = path.removeprefix("/calendar/v3/").strip("/").split("/")
+        if parts == ["freeBusy"] and method == "POST":
+            return JSONResponse(store.freebusy(body or {}))
+        if parts == ["channels", "stop"] and method == "POST":
+            return Response(status_code=204) if watches.stop(body or {}) else api_error(404, "notFound", "Channel not found")
+        if len(parts) < 3 or parts[0] != "calendars" or parts[2] != "events":
+            return api_error(404, "notFound", "Not Found")
+        calendar_id = parts[1]
+
+        if len(parts) == 3:
+            if method == "GET":
+                result, error = store.list(calendar_id, params)
+                return error or JSONResponse(result)
+            if method == "POST":
+                if not body or "start" not in body or "end" not in body:
+                    return api_error(400, "required", "Missing start or end time.")
+                event = store.insert(calendar_id, body)
+                watches.notify(calendar_id)
+                return JSONResponse(event)
+            return api_error(405, "methodNotAllowed", "Method Not Allowed")
+
+        if parts[3] == "watch" and method == "POST":
+            if not body or not body.get("id") or not body.get("address"):
+                return api_error(400, "required", "Missing channel id or address.")
+            return JSONResponse(watches.watch(calendar_id, body))
+
+        event_id = parts[3]
+        if method == "GET":
+            event = store.get(calendar_id, event_id)
+        elif method in ("PUT", "PATCH"):
+            event = store.update(calendar_id, event_id, body or {}, patch=method == "PATCH")
+        elif method == "DELETE":
+            if not store.delete(calendar_id, event_id):
+                return api_error(410, "deleted", "Resource has been deleted")
+            watches.notify(calendar_id)
+            return Response(status_code=204)
+        else:
+            return api_error(405, "methodNotAllowed", "Method Not Allowed")
+        if event is not None and method != "GET":
+            watches.notify(calendar_id)
+        return JSONResponse(event) if event is not None else api_error(404, "notFound", "Not Found")
+
+    @app.api_route("/calendar/v3/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    async def calendar_api(request: Request, path: str):
+        stats["requests"] += 1
+        await faults.delay()
+        raw = await request.body()
+        body = json.loads(raw) if raw else None
+        return dispatch(request.method, request.url.path, dict(request.query_params), body)
+
+    @app.post("/batch/calendar/v3")
+    async def batch(request: Request):
+        stats["requests"] += 1
+        await faults.delay()
+        content_type = request.headers["content-type"]
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + await request.body()
+        )
+        boundary = uuid.uuid4().hex
+        chunks = []
+        for part in message.iter_parts():
+            stats["batch_items"] += 1
+            inner = part.get_payload(decode=True).decode()
+            head, _, inner_body = inner.replace("\r\n", "\n").partition("\n\n")
+            method, target, _ = head.split("\n", 1)[0].split(" ", 2)
+            url = urlsplit(target)
+            response = dispatch(method, url.path, dict(parse_qsl(url.query)), json.loads(inner_body) if inner_body.strip() else None)
+            status_line = f"HTTP/1.1 {response.status_code} {'OK' if response.status_code < 300 else 'Error'}"
+            content_id = part["Content-ID"].strip()
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"{status_line}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{response.body.decode()}\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n")
+        return Response("".join(chunks), media_type=f"multipart/mixed; boundary={boundary}")
+
+    # --- Control endpoints for test harnesses ---
+    @app.get("/_fake/stats")
+    async def fake_stats():
+        return {
+            **stats,
+            "events": sum(len(events) for events in store.calendars.values()),
+            "seq": store.seq,
+            "channels": len(watches.channels),
+            "notifications_sent": watches.sent,
+            "notifications_failed": watches.failed,
+        }
+
+    @app.post("/_fake/config")
+    async def fake_config(request: Request):
+        for name, value in (await request.json()).items():
+            if hasattr(faults, name) and name != "rng":
+                setattr(faults, name, value)
+        return {"latency_ms": faults.latency_ms, "jitter_ms": faults.jitter_ms,
+                "error_rate": faults.error_rate, "error_status": faults.error_status}
+
+    @app.post("/_fake/expire-sync-tokens")
+    async def expire_sync_tokens():
+        store.min_sync_seq = store.seq + 1
+        return {"min_sync_seq": store.min_sync_seq}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=429, choices=sorted(ERROR_BODIES))
+    parser.add_argument("--seed-events", type=int, default=200, help="events pre-loaded into the primary calendar")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    store = FakeCalendarStore()
+    store.seed("primary", args.seed_events, args.seed)
+    faults = FaultConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.seed)
+    uvicorn.run(create_app(store, faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
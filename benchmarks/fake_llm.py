@@ -0,0 +1,172 @@
+"""
+Scripted stand-in for the Groq chat model, for load tests without an API key.
+
+A user turn that matches one of SCRIPT's patterns is answered with the matching
+tool call; a tool result is answered with a short summary of it; a structured
+extraction prompt (app/langgraph/extraction.py) is answered with the event as
+JSON; anything else gets a canned reply. Tool call arguments and ids come from a per-model counter,
+so a run is deterministic for a given query sequence.
+
+Installed in the service by benchmarks/serve.py through app.langgraph.llm.set_llm_factory.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+
+def create_event_args(turn: int, text: str) -> dict:
+    # Spread events over working hours on the following days so most creates don't conflict
+    day = datetime.now() + timedelta(days=1 + turn // 8)
+    start = day.replace(hour=9 + turn % 8, minute=0, second=0, microsecond=0)
+    return {"summary": f"Load test event {turn}", "start_time": start.isoformat(timespec="seconds")}
+
+
+def free_slots_args(turn: int, text: str) -> dict:
+    return {"duration_minutes": 30 + 15 * (turn % 3)}
+
+
+def weekday_standup_args(turn: int, text: str) -> list:
+    # One create per weekday of a future week: several tool calls in a single turn
+    today = datetime.now()
+    monday = (today + timedelta(days=7 * (1 + turn % 50) - today.weekday())).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    return [
+        {"summary": f"Standup {turn}", "start_time": (monday + timedelta(days=day)).isoformat(timespec="seconds")}
+        for day in range(5)
+    ]
+
+
+# The request quoted in the create_event extraction prompt
+EXTRACTION_INPUT = re.compile(r'^User input: "(?P<text>.*)"$', re.MULTILINE)
+
+
+def extraction_json(turn: int, text: str) -> str:
+    args = create_event_args(turn, text)
+    return json.dumps({**args, "end_time": None, "location": None, "description": None,
+                       "color_id": "5", "status": "busy", "reminders": None})
+
+
+# (pattern on the user's message, tool name, argument builder returning one args dict or a list of them)
+SCRIPT = [
+    (re.compile(r"\bstandups?\b.*\b(mon|weekday)", re.IGNORECASE), "create_event", weekday_standup_args),
+    (re.compile(r"\b(create|schedule|book|set up)\b", re.IGNORECASE), "create_event", create_event_args),
+    (re.compile(r"\b(free|available|availability)\b", re.IGNORECASE), "find_free_slots", free_slots_args),
+]
+
+
+class FakeRateLimitError(Exception):
+    """
+    Stand-in for a provider 429; the model router treats it like groq.RateLimitError.
+    """
+
+    status_code = 429
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that replays SCRIPT instead of calling an API.
+    latency_ms is slept on every call to stand in for model time; a fraction
+    error_rate of calls fail with FakeRateLimitError after that delay.
+    """
+
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    _turns: Any = PrivateAttr(default_factory=itertools.count)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _rng: Any = PrivateAttr(default=None)
+
+    def _maybe_fail(self):
+        if not self.error_rate:
+            return
+        with self._lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            failed = self._rng.random() < self.error_rate
+        if failed:
+            raise FakeRateLimitError("scripted rate limit")
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas are irrelevant to the script
+        return self
+
+    def _next_turn(self) -> int:
+        with self._lock:
+            return next(self._turns)
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        turn = self._next_turn()
+        last = messages[-1] if messages else None
+        if isinstance(last, ToolMessage):
+            # Summarize every tool result of the last turn
+            results = []
+            for message in reversed(messages):
+                if not isinstance(message, ToolMessage):
+                    break
+                results.append(str(message.content)[:200])
+            return AIMessage(content="Done: " + " | ".join(reversed(results)))
+        if isinstance(last, HumanMessage):
+            text = str(last.content)
+            # Extraction prompts (and their correction turns) quote the request in the first message
+            extraction = EXTRACTION_INPUT.search(str(messages[0].content))
+            if extraction:
+                return AIMessage(content=extraction_json(turn, extraction.group("text")))
+            for pattern, tool, build_args in SCRIPT:
+                if pattern.search(text):
+                    args = build_args(turn, text)
+                    calls = args if isinstance(args, list) else [args]
+                    return AIMessage(
+                        content="",
+                        tool_calls=[
+                            {"name": tool, "args": call_args, "id": f"call_{turn}_{i}", "type": "tool_call"}
+                            for i, call_args in enumerate(calls)
+                        ],
+                    )
+        return AIMessage(content="I can create events, find free time and list your calendar.")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+def scripted_llm_factory(latency_ms: float = 0.0, fast_model: str = None,
+                         fast_latency_ms: float = None, fast_error_rate: float = 0.0):
+    """
+    A create_llm factory for app.langgraph.llm.set_llm_factory that builds scripted models.
+    fast_model gets its own latency and error rate so routing can be exercised offline.
+    """
+    def factory(model_name: str, **kwargs):
+        if model_name == fast_model:
+            return ScriptedChatModel(
+                latency_ms=latency_ms if fast_latency_ms is None else fast_latency_ms,
+                error_rate=fast_error_rate,
+            )
+        return ScriptedChatModel(latency_ms=latency_ms)
+
+    return factory
@@ -0,0 +1,153 @@
+"""
+Load generator for POST /schedule/query.
+
+By default it starts the fake Calendar server and the service (benchmarks.serve)
+as subprocesses, drives the service at a fixed concurrency with a deterministic
+mix of queries, and reports throughput and p50/p95/p99 latency overall and per
+query kind. Pass --url to load an already running service instead.
+
+Run from the repository root:
+    python -m benchmarks.load_test --concurrency 16 --requests 500 --calendar-latency-ms 40
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+# (kind, query); cycled in order so runs are comparable
+QUERY_MIX = [
+    ("list_fast_path", "show my next 5 events"),
+    ("create", "schedule a sync with the design team"),
+    ("list_fast_path", "list my upcoming meetings"),
+    ("free_slots", "when am I free this week?"),
+    ("chat", "hello there"),
+    ("create", "book a focus block"),
+    ("create_many", "schedule standups Mon-Fri at 10"),
+    ("agenda", "what's on today?"),
+]
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(label: str, latencies, errors: int, elapsed: float = None) -> str:
+    values = sorted(latencies)
+    line = (
+        f"{label:<16} n={len(values):<6} errors={errors:<4} "
+        f"p50={percentile(values, 0.50) * 1000:8.1f}ms "
+        f"p95={percentile(values, 0.95) * 1000:8.1f}ms "
+        f"p99={percentile(values, 0.99) * 1000:8.1f}ms"
+    )
+    if elapsed:
+        line += f"  throughput={len(values) / elapsed:.1f} req/s"
+    return line
+
+
+async def run_load(url: str, concurrency: int, total: int, warmup: int, timeout: float):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    counter = iter(range(warmup + total))
+
+    async def worker(client: httpx.AsyncClient, conversation_id: str):
+        for i in counter:
+            kind, query = QUERY_MIX[i % len(QUERY_MIX)]
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/schedule/query", json={"query": query, "conversation_id": conversation_id})
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if i < warmup:
+                continue
+            latencies[kind].append(elapsed)
+            if not ok:
+                errors[kind] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        # Each worker is one client with its own conversation, as separate users would be
+        await asyncio.gather(*(worker(client, f"client-{n}") for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    # Warmup requests are excluded from the latencies but not from the wall time
+    elapsed *= total / (warmup + total)
+    print(summarize("all", all_latencies, sum(errors.values()), elapsed))
+    for kind in sorted(latencies):
+        print(summarize(kind, latencies[kind], errors[kind]))
+
+
+def wait_until_up(url: str, deadline_seconds: float = 60.0):
+    deadline = time.monotonic() + deadline_seconds
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {deadline_seconds:.0f}s")
+
+
+def start_stack(args):
+    calendar = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_calendar",
+        "--port", str(args.calendar_port),
+        "--latency-ms", str(args.calendar_latency_ms),
+        "--jitter-ms", str(args.calendar_jitter_ms),
+        "--error-rate", str(args.calendar_error_rate),
+        "--seed-events", str(args.seed_events),
+    ])
+    wait_until_up(f"http://127.0.0.1:{args.calendar_port}/_fake/stats")
+    service = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.serve",
+        "--port", str(args.port),
+        "--calendar-url", f"http://127.0.0.1:{args.calendar_port}/calendar/v3",
+        "--llm-latency-ms", str(args.llm_latency_ms),
+        "--fast-llm-latency-ms", str(args.fast_llm_latency_ms),
+        "--fast-llm-error-rate", str(args.fast_llm_error_rate),
+    ])
+    wait_until_up(f"http://127.0.0.1:{args.port}/schedule/stats")
+    return [service, calendar]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="load this running service instead of starting the local stack")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--calendar-port", type=int, default=8099)
+    parser.add_argument("--calendar-latency-ms", type=float, default=40.0)
+    parser.add_argument("--calendar-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--calendar-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--fast-llm-latency-ms", type=float, default=80.0)
+    parser.add_argument("--fast-llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed-events", type=int, default=200)
+    args = parser.parse_args()
+
+    processes = [] if args.url else start_stack(args)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        print(f"{args.requests} requests at concurrency {args.concurrency} against {url}")
+        asyncio.run(run_load(url, args.concurrency, args.requests, args.warmup, args.timeout))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Run the service against the local stand-ins: Calendar calls go to
+benchmarks/fake_calendar.py, the agent uses the scripted model from
+benchmarks/fake_llm.py, and the demo user gets placeholder credentials.
+
+Run from the repository root (with the fake Calendar server already up):
+    python -m benchmarks.serve --port 8000 --calendar-url http://127.0.0.1:8099/calendar/v3
+"""
+import argparse
+import os
+import tempfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--calendar-url", default="http://127.0.0.1:8099/calendar/v3")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--fast-llm-latency-ms", type=float, help="fast model latency (default: --llm-latency-ms)")
+    parser.add_argument("--watch", action="store_true", help="open a push channel so Calendar changes are notified")
+    parser.add_argument("--fast-llm-error-rate", type=float, default=0.0, help="fraction of fast model calls failing with 429")
+    args = parser.parse_args()
+
+    # Must be set before the app modules read them at import time
+    os.environ["GOOGLE_CALENDAR_BASE_URL"] = args.calendar_url
+    if args.watch:
+        os.environ["CALENDAR_WEBHOOK_URL"] = f"http://{args.host}:{args.port}/calendar/notifications"
+    os.environ.setdefault("STATE_BACKEND", "memory")
+    os.environ.setdefault("SCHEDULE_CHECKPOINT_DB", os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite"))
+
+    import uvicorn
+    from google.oauth2.credentials import Credentials
+
+    from app.api.routes import USER_ID
+    from app.core.auth import save_token
+    from app.langgraph.llm import FAST_MODEL, set_llm_factory
+    from benchmarks.fake_llm import scripted_llm_factory
+    from main import app
+
+    # Installed before startup, so the prewarmed agent is built on the scripted model
+    set_llm_factory(scripted_llm_factory(
+        latency_ms=args.llm_latency_ms,
+        fast_model=FAST_MODEL,
+        fast_latency_ms=args.fast_llm_latency_ms,
+        fast_error_rate=args.fast_llm_error_rate,
+    ))
+    # No refresh token and no expiry: never refreshed, always valid
+    save_token(USER_ID, Credentials(token="fake-token"))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,37 @@
 import os
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"  # Allow OAuth2 on HTTP for local development
 
-from fastapi import FastAPI
+import time
+import uuid
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router
+from fastapi.responses import PlainTextResponse
+from app.api.routes import router, schedule_service
+from app.core.async_calendar_client import close_http_client
+from app.core.metrics import registry, http_request_seconds, trace_id_var, TraceIdFilter
+from app.core.read_coalescer import calendar_reads
+from app.core.token_refresher import start_token_refresher, stop_token_refresher
+from app.core.watch_channels import notification_counts, start_watch_renewer, stop_watch_renewer
+from app.langgraph.router import route_counts
 import logging
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s")
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceIdFilter())
+
+registry.counter_source(
+    "schedule_calendar_reads_total", "Calendar read coalescer outcomes.", ("outcome",),
+    lambda: {(outcome,): count for outcome, count in calendar_reads.stats().items()},
+)
+registry.counter_source(
+    "schedule_query_routes_total", "Queries by routing path and intent.", ("path", "intent"),
+    lambda: dict(route_counts),
+)
+registry.counter_source(
+    "schedule_watch_notifications_total", "Calendar push notifications by outcome.", ("outcome",),
+    lambda: {(outcome,): count for outcome, count in notification_counts.items()},
+)
+
 app = FastAPI(
     title="Schedule AI Manager",
     description="AI assistant for managing Google Calendar via LangGraph",
@@ -22,12 +48,76 @@ app.add_middleware(
 
 app.include_router(router)
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    token = trace_id_var.set(trace_id)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        http_request_seconds.observe(
+            elapsed,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+        logging.info("%s %s -> %s in %.1f ms", request.method, request.url.path, status, elapsed * 1000)
+        trace_id_var.reset(token)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
+    if os.getenv("SCHEDULE_PREWARM", "1") == "1":
+        try:
+            await schedule_service.prewarm()
+        except Exception:
+            # Not fatal: the agent is built lazily on the first request instead
+            logging.exception("Prewarm failed")
+    start_token_refresher()
+    start_watch_renewer()
     logging.info("✅ Schedule AI Manager started.")
     for route in app.routes:
-        logging.info(f"📡 Route: {route.path} → {route.name}")
+        logging.info(f"📡 Route: {getattr(route, 'path', '?')} → {getattr(route, 'name', '?')}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_token_refresher()
+    await stop_watch_renewer()
+    await schedule_service.close()
+    await close_http_client()
+
+def worker_count(value: str) -> int:
+    return (os.cpu_count() or 1) if value == "auto" else int(value)
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    from app.core.state_backend import state_backend
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=worker_count, default=os.getenv("WEB_CONCURRENCY", "1"),
+        help='worker processes, or "auto" for one per CPU core',
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Workers share credentials, conversation threads and mirrors through the state backend,
+        # and lease a conversation thread while running on it (see ScheduleService.thread_lock)
+        if not state_backend.shared:
+            raise SystemExit("Multiple workers need a shared state backend (STATE_BACKEND=sqlite)")
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
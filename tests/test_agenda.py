@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytz
+
+from app.core.agenda import AgendaViews
+from app.core.event_mirror import EventMirror
+
+NOW = datetime(2030, 1, 7, 8, 0, tzinfo=pytz.utc)  # Monday
+
+
+def timed(event_id: str, summary: str, start: str, end: str) -> dict:
+    return {"id": event_id, "summary": summary, "start": {"dateTime": start}, "end": {"dateTime": end}}
+
+
+def make_mirror(*events) -> EventMirror:
+    mirror = EventMirror("agenda-test")
+    mirror._apply(list(events))
+    mirror._mark_synced("token", "UTC")
+    return mirror
+
+
+def summaries(view: dict):
+    return [entry["summary"] for entry in view["events"]]
+
+
+def test_sync_files_events_by_local_day():
+    mirror = make_mirror(
+        timed("b", "Lunch", "2030-01-07T12:00:00Z", "2030-01-07T13:00:00Z"),
+        timed("a", "Standup", "2030-01-07T09:00:00Z", "2030-01-07T09:15:00Z"),
+        timed("c", "Review", "2030-01-08T10:00:00Z", "2030-01-08T11:00:00Z"),
+    )
+    agenda = AgendaViews("agenda-test")
+    assert summaries(agenda.view(mirror, "today", NOW)) == ["Standup", "Lunch"]
+    assert summaries(agenda.view(mirror, "tomorrow", NOW)) == ["Review"]
+    assert agenda.view(mirror, "today", NOW)["text"].splitlines()[1] == "- 09:00-09:15 Standup"
+
+
+def test_sync_is_a_no_op_while_the_mirror_version_is_unchanged(monkeypatch):
+    mirror = make_mirror(timed("a", "Standup", "2030-01-07T09:00:00Z", "2030-01-07T09:15:00Z"))
+    agenda = AgendaViews("agenda-test")
+    agenda.sync(mirror)
+
+    def fail():
+        raise AssertionError("versioned_events called without a change")
+
+    monkeypatch.setattr(mirror, "versioned_events", fail)
+    agenda.sync(mirror)
+
+
+def test_sync_refiles_changed_and_removed_events():
+    mirror = make_mirror(
+        timed("a", "Standup", "2030-01-07T09:00:00Z", "2030-01-07T09:15:00Z"),
+        timed("b", "Lunch", "2030-01-07T12:00:00Z", "2030-01-07T13:00:00Z"),
+    )
+    agenda = AgendaViews("agenda-test")
+    before = agenda.view(mirror, "today", NOW)
+    assert agenda.view(mirror, "today", NOW) is before  # cached until something changes
+
+    mirror._apply([timed("b", "Lunch", "2030-01-08T12:00:00Z", "2030-01-08T13:00:00Z")])
+    mirror._drop("a")
+    assert summaries(agenda.view(mirror, "today", NOW)) == []
+    assert summaries(agenda.view(mirror, "tomorrow", NOW)) == ["Lunch"]
+    assert set(agenda._filed) == {"b"}
+
+
+def test_a_time_zone_change_refiles_every_event():
+    # 20:00 UTC on Monday is already Tuesday in Dhaka
+    mirror = make_mirror(timed("a", "Late call", "2030-01-07T20:00:00Z", "2030-01-07T21:00:00Z"))
+    agenda = AgendaViews("agenda-test")
+    assert summaries(agenda.view(mirror, "today", NOW)) == ["Late call"]
+
+    mirror._mark_synced("token", "Asia/Dhaka")
+    assert summaries(agenda.view(mirror, "today", NOW)) == []
+    assert summaries(agenda.view(mirror, "tomorrow", NOW)) == ["Late call"]
+
+
+def test_multi_day_events_and_the_week_view():
+    mirror = make_mirror(
+        {"id": "trip", "summary": "Trip", "start": {"date": "2030-01-08"}, "end": {"date": "2030-01-10"}},
+        timed("late", "Deploy", "2030-01-07T23:00:00Z", "2030-01-08T01:00:00Z"),
+    )
+    week = AgendaViews("agenda-test").view(mirror, "week", NOW)
+    days = {day["date"]: [entry["summary"] for entry in day["events"]] for day in week["days"]}
+    assert days["2030-01-07"] == ["Deploy"]
+    assert days["2030-01-08"] == ["Deploy", "Trip"]
+    assert days["2030-01-09"] == ["Trip"]
+    assert days["2030-01-10"] == []
+
+
+def test_next_view():
+    mirror = make_mirror(
+        timed("a", "Standup", "2030-01-07T07:30:00Z", "2030-01-07T08:30:00Z"),
+        timed("b", "Lunch", "2030-01-07T12:00:00Z", "2030-01-07T13:00:00Z"),
+    )
+    agenda = AgendaViews("agenda-test")
+    current = agenda.view(mirror, "next", NOW)
+    assert (current["event"]["summary"], current["in_progress"]) == ("Standup", True)
+    later = agenda.view(mirror, "next", datetime(2030, 1, 7, 9, tzinfo=pytz.utc))
+    assert later["text"] == "Next: 12:00-13:00 Lunch"
+
+
+def test_unknown_view():
+    assert "error" in AgendaViews("agenda-test").view(make_mirror(), "month", NOW)
@@ -0,0 +1,71 @@
+import asyncio
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.core import google_calendar_crud, outbound
+from app.core.async_calendar_client import AsyncCalendarClient
+from app.core.errors import CalendarAPIError
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeDelete:
+    """
+    A delete request that fails with the given statuses in turn, then succeeds.
+    """
+
+    methodId = "calendar.events.delete"
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.statuses:
+            raise http_error(self.statuses.pop(0))
+        return ""
+
+
+class FakeService:
+    def __init__(self, request):
+        self.request = request
+
+    def events(self):
+        return self
+
+    def delete(self, calendarId, eventId):
+        return self.request
+
+
+def test_a_retried_delete_that_finds_the_event_gone_succeeded(monkeypatch):
+    monkeypatch.setattr(outbound, "retry_delay", lambda attempt, retry_after=None: 0)
+    request = FakeDelete(503, 410)
+    assert google_calendar_crud.delete_event(FakeService(request), "event") == {"status": "deleted"}
+    assert request.calls == 2
+
+
+def test_a_delete_of_a_missing_event_is_still_an_error():
+    result = google_calendar_crud.delete_event(FakeService(FakeDelete(404)), "event")
+    assert "error" in result
+
+
+def test_async_deletes_treat_gone_after_a_retry_as_deleted(monkeypatch):
+    monkeypatch.setattr(outbound, "retry_delay", lambda attempt, retry_after=None: 0)
+    client = AsyncCalendarClient(credentials=None, http_client=object())
+
+    def sending(*statuses):
+        statuses = list(statuses)
+
+        async def send(method, path, params=None, json=None, timeout=None):
+            raise CalendarAPIError(statuses.pop(0), "failed")
+
+        return send
+
+    client._send = sending(503, 404)
+    assert asyncio.run(client.delete_event("event")) == {"status": "deleted"}
+    client._send = sending(404)
+    assert "error" in asyncio.run(client.delete_event("event"))
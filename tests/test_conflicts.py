@@ -0,0 +1,96 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.core import conflicts
+from app.core.conflicts import ConflictIndex, aget_conflict_index, get_conflict_index
+from app.core.event_mirror import get_event_mirror
+
+BASE = datetime(2030, 1, 7, tzinfo=pytz.utc)
+
+
+def timed(event_id: str, start_hour: float, end_hour: float, **fields) -> dict:
+    start = BASE + timedelta(hours=start_hour)
+    end = BASE + timedelta(hours=end_hour)
+    return {"id": event_id, "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}, **fields}
+
+
+def ids(events):
+    return [event["id"] for event in events]
+
+
+def test_overlaps_are_found_in_start_order():
+    index = ConflictIndex([timed("c", 12, 13), timed("a", 9, 10), timed("b", 9.5, 11)], "UTC")
+    assert ids(index.find_conflicts(BASE + timedelta(hours=9.75), BASE + timedelta(hours=12.5))) == ["a", "b", "c"]
+
+
+def test_touching_intervals_do_not_conflict():
+    index = ConflictIndex([timed("a", 9, 10)], "UTC")
+    assert index.find_conflicts(BASE + timedelta(hours=10), BASE + timedelta(hours=11)) == []
+    assert index.find_conflicts(BASE + timedelta(hours=8), BASE + timedelta(hours=9)) == []
+
+
+def test_transparent_and_untimed_events_are_ignored():
+    index = ConflictIndex([timed("free", 9, 10, transparency="transparent"), {"id": "no-times"}], "UTC")
+    assert len(index) == 0
+    assert index.find_conflicts(BASE, BASE + timedelta(days=1)) == []
+
+
+def test_all_day_events_block_the_day_in_the_calendar_time_zone():
+    event = {"id": "holiday", "start": {"date": "2030-01-07"}, "end": {"date": "2030-01-08"}}
+    index = ConflictIndex([event], "Asia/Dhaka")
+    # 20:00 UTC on the 6th is 02:00 on the 7th in Dhaka
+    assert ids(index.find_conflicts(BASE - timedelta(hours=4), BASE - timedelta(hours=3))) == ["holiday"]
+
+
+def test_matches_a_linear_scan():
+    rng = random.Random(7)
+    events = []
+    for number in range(300):
+        start = rng.uniform(0, 24 * 14)
+        events.append(timed(str(number), start, start + rng.choice([0.25, 0.5, 1, 3, 30])))
+    index = ConflictIndex(events, "UTC")
+    candidates = []
+    for _ in range(100):
+        start = rng.uniform(0, 24 * 14)
+        candidates.append((BASE + timedelta(hours=start), BASE + timedelta(hours=start + rng.uniform(0.25, 6))))
+
+    for (start, end), found in zip(candidates, index.find_conflicts_many(candidates)):
+        expected = {
+            event["id"] for event in events
+            if datetime.fromisoformat(event["start"]["dateTime"]) < end
+            and datetime.fromisoformat(event["end"]["dateTime"]) > start
+        }
+        assert set(ids(found)) == expected
+
+
+def test_changes_are_applied_on_top_of_the_arrays():
+    index = ConflictIndex([timed("a", 9, 10), timed("b", 11, 12)], "UTC")
+    changed = index.with_changes({"a": None, "b": timed("b", 15, 16), "c": timed("c", 13, 14)})
+    assert ids(changed.find_conflicts(BASE, BASE + timedelta(days=1))) == ["c", "b"]
+    assert len(changed) == 2
+    # The original is left as it was
+    assert ids(index.find_conflicts(BASE, BASE + timedelta(days=1))) == ["a", "b"]
+
+
+def test_mirror_writes_update_the_index_without_a_rebuild(monkeypatch):
+    mirror = get_event_mirror("conflict-test")
+    mirror._commit_full(None, [timed("a", 9, 10), timed("b", 11, 12)], "t1", "UTC", None, mirror.version)
+    assert ids(get_conflict_index("conflict-test").find_conflicts(BASE, BASE + timedelta(days=1))) == ["a", "b"]
+
+    rebuilds = []
+    rebuild = conflicts._rebuild
+    monkeypatch.setattr(conflicts, "_rebuild", lambda *args: rebuilds.append(args) or rebuild(*args))
+    mirror.upsert(timed("c", 13, 14))
+    mirror.remove("a")
+    mirror.upsert(timed("b", 15, 16))
+    assert ids(get_conflict_index("conflict-test").find_conflicts(BASE, BASE + timedelta(days=1))) == ["c", "b"]
+    assert rebuilds == []
+
+    # A full sync replaces the events wholesale, so the next lookup rebuilds, off the event loop
+    mirror._commit_full(None, [timed("d", 9, 10)], "t2", "UTC", None, mirror.version)
+    index = asyncio.run(aget_conflict_index("conflict-test"))
+    assert ids(index.find_conflicts(BASE, BASE + timedelta(days=1))) == ["d"]
+    assert len(rebuilds) == 1
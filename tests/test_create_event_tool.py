@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.langgraph.tools import create_event_tool
+
+START = (datetime.now(pytz.timezone("Asia/Dhaka")) + timedelta(days=2)).replace(hour=15, minute=0, second=0, microsecond=0)
+
+
+class SlowClient:
+    """
+    Sees only the events it created; the conflict check and the insert each take a while.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    async def check_conflicts(self, intervals):
+        await asyncio.sleep(0.01)
+        return [
+            [event for event in self.events if event["start"] < end and start < event["end"]]
+            for start, end in intervals
+        ]
+
+    async def create_event(self, body):
+        await asyncio.sleep(0.01)
+        event = {
+            "id": str(len(self.events)),
+            "summary": body["summary"],
+            "start": datetime.fromisoformat(body["start"]["dateTime"]),
+            "end": datetime.fromisoformat(body["end"]["dateTime"]),
+        }
+        self.events.append(event)
+        return event
+
+
+def test_parallel_creates_do_not_double_book(monkeypatch):
+    client = SlowClient()
+
+    async def aget_token(user_id):
+        return object()
+
+    monkeypatch.setattr(create_event_tool, "aget_token", aget_token)
+    monkeypatch.setattr(create_event_tool, "get_async_calendar_client", lambda credentials, user_id: client)
+    monkeypatch.setattr(create_event_tool, "format_conflict", lambda event, time_zone: f"conflict with {event['summary']}")
+
+    async def aget_event_mirror(user_id):
+        return type("Mirror", (), {"time_zone": "Asia/Dhaka"})
+
+    monkeypatch.setattr(create_event_tool, "aget_event_mirror", aget_event_mirror)
+
+    async def main():
+        return await asyncio.gather(*(
+            create_event_tool.create_event_tool_func(summary, START.isoformat())
+            for summary in ("Dentist", "Gym")
+        ))
+
+    results = asyncio.run(main())
+    assert len(client.events) == 1
+    assert sum(result.startswith("✅") for result in results) == 1
+    assert f"conflict with {client.events[0]['summary']}" in results
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+from app.core.event_mirror import EventMirror
+
+
+def timed(event_id: str, summary: str = "Event", start: str = "2030-01-07T09:00:00Z",
+          end: str = "2030-01-07T10:00:00Z", **fields) -> dict:
+    return {"id": event_id, "summary": summary, "start": {"dateTime": start}, "end": {"dateTime": end}, **fields}
+
+
+class FakeClient:
+    """
+    Answers list_events_page with the queued responses, optionally waiting on a gate first.
+    """
+
+    def __init__(self, *responses, gate: asyncio.Event = None):
+        self.responses = list(responses)
+        self.gate = gate
+        self.started = asyncio.Event()
+        self.user_id = "mirror-test"
+
+    async def list_events_page(self, params):
+        self.started.set()
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.responses.pop(0)
+
+
+def test_full_sync_then_delta():
+    mirror = EventMirror("mirror-test")
+
+    async def main():
+        await mirror.aensure_fresh(FakeClient({"items": [timed("a"), timed("b")], "nextSyncToken": "t1"}))
+        assert mirror.sync_token == "t1" and not mirror.is_stale()
+        mirror.invalidate()
+        await mirror.aensure_fresh(FakeClient({
+            "items": [timed("a", "Renamed"), {"id": "b", "status": "cancelled"}],
+            "nextSyncToken": "t2",
+        }))
+
+    asyncio.run(main())
+    assert set(mirror.events) == {"a"}
+    assert mirror.titles.search("renamed")[0][0] == "a"
+    assert mirror.sync_token == "t2" and not mirror.is_stale()
+
+
+def test_the_mirror_lock_is_free_while_listing():
+    mirror = EventMirror("mirror-test")
+
+    async def main():
+        client = FakeClient({"items": [timed("a")], "nextSyncToken": "t1"}, gate=asyncio.Event())
+        sync = asyncio.create_task(mirror.aensure_fresh(client))
+        await client.started.wait()
+        # Another thread can take the lock, e.g. a write-through from an executor
+        def write_through():
+            with mirror._lock:
+                return True
+
+        assert await asyncio.wait_for(asyncio.to_thread(write_through), 1)
+        client.gate.set()
+        await sync
+
+    asyncio.run(main())
+    assert set(mirror.events) == {"a"}
+
+
+def test_writes_during_a_listing_leave_the_mirror_dirty():
+    mirror = EventMirror("mirror-test")
+
+    async def main():
+        client = FakeClient({"items": [timed("a")], "nextSyncToken": "t1"}, gate=asyncio.Event())
+        sync = asyncio.create_task(mirror.aensure_fresh(client))
+        await client.started.wait()
+        await mirror.aupsert(timed("new"))
+        client.gate.set()
+        await sync
+
+    asyncio.run(main())
+    # The full listing replaced the write, but the next read pulls a delta that has it
+    assert mirror.is_stale()
+
+
+def test_notifications_during_a_listing_are_not_lost():
+    mirror = EventMirror("mirror-test")
+
+    async def main():
+        client = FakeClient({"items": [], "nextSyncToken": "t1"}, gate=asyncio.Event())
+        sync = asyncio.create_task(mirror.aensure_fresh(client))
+        await client.started.wait()
+        mirror.invalidate()
+        client.gate.set()
+        await sync
+
+    asyncio.run(main())
+    assert mirror.is_stale()
+
+
+def test_a_failed_listing_is_retried():
+    mirror = EventMirror("mirror-test")
+
+    class FailingClient(FakeClient):
+        async def list_events_page(self, params):
+            raise RuntimeError("network down")
+
+    async def main():
+        await mirror.aensure_fresh(FakeClient({"items": [], "nextSyncToken": "t1"}))
+        mirror.invalidate()
+        try:
+            await mirror.aensure_fresh(FailingClient())
+        except RuntimeError:
+            pass
+
+    asyncio.run(main())
+    assert mirror.is_stale()
+
+
+def test_sync_refresh_from_a_thread():
+    mirror = EventMirror("mirror-test")
+    listed = threading.Event()
+    release = threading.Event()
+
+    def fetch_all(service, params):
+        listed.set()
+        release.wait(5)
+        return [timed("a")], "t1", "UTC"
+
+    mirror._fetch_all = fetch_all
+    worker = threading.Thread(target=mirror.ensure_fresh, args=(None,))
+    worker.start()
+    assert listed.wait(5)
+    # Reads on the event loop do not wait for the listing
+    assert mirror.snapshot() == []
+    release.set()
+    worker.join()
+    assert set(mirror.events) == {"a"} and mirror.time_zone == "UTC"
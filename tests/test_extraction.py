@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+
+from app.langgraph import extraction, model_router
+
+
+class RecordingRouter:
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    async def ainvoke(self, models, messages, simple):
+        self.prompts.append([str(message.content) for message in messages])
+        return AIMessage(content=self.answers.pop(0))
+
+
+def extract(monkeypatch, *answers):
+    router = RecordingRouter(*answers)
+    monkeypatch.setattr(extraction, "get_extraction_models", lambda: {})
+    monkeypatch.setattr(model_router, "get_model_router", lambda: router)
+    return asyncio.run(extraction.extract_create_event("add lunch tomorrow at 1")), router
+
+
+def test_the_prompt_gives_the_users_time_zone(monkeypatch):
+    answer = json.dumps({"summary": "Lunch", "start_time": "2030-01-08T13:00:00"})
+    event, router = extract(monkeypatch, answer)
+    assert event.summary == "Lunch"
+    assert "+0600 (Asia/Dhaka)" in router.prompts[0][0]
+
+
+def test_malformed_output_is_corrected_once(monkeypatch):
+    answer = json.dumps({"summary": "Lunch", "start_time": "2030-01-08T13:00:00"})
+    event, router = extract(monkeypatch, "not json", answer)
+    assert event.start_time == "2030-01-08T13:00:00"
+    assert len(router.prompts[1]) == 3  # prompt, bad answer, correction
+
+
+def test_gives_up_after_the_retries(monkeypatch):
+    event, _ = extract(monkeypatch, "not json", "still not json")
+    assert event is None
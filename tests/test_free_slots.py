@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from app.core.free_slots import busy_bitmap, find_free_slots, free_runs
+from app.langgraph.tools import free_slots_tool
+
+UTC = pytz.utc
+MONDAY = datetime(2030, 1, 7, tzinfo=UTC)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def starts(slots):
+    return [slot["start"] for slot in slots]
+
+
+def test_busy_bitmap_rounds_outwards_and_applies_buffers():
+    busy = busy_bitmap([(at(0, 0, 10) + timedelta(seconds=30), at(0, 0, 20))], MONDAY, 60, buffer_minutes=5)
+    assert np.flatnonzero(busy).tolist() == list(range(5, 25))
+
+
+def test_free_runs_keeps_long_enough_runs():
+    runs = free_runs(np.array([1, 1, 0, 1, 1, 1, 0, 1], dtype=bool), 2)
+    assert [run.tolist() for run in runs] == [[0, 3], [2, 6]]
+
+
+def test_slots_fall_between_busy_events_inside_working_hours():
+    busy = [(at(0, 9), at(0, 10)), (at(0, 11), at(0, 16, 30))]
+    slots = find_free_slots(busy, at(0, 0), at(1, 0), 60, "UTC")
+    assert slots == [{
+        "start": at(0, 10).isoformat(),
+        "end": at(0, 11).isoformat(),
+        "window_end": at(0, 11).isoformat(),
+    }]
+
+
+def test_weekends_are_skipped_unless_allowed():
+    window = (at(5, 0), at(7, 0))  # Saturday and Sunday
+    assert find_free_slots([], *window, 30, "UTC") == []
+    weekend = find_free_slots([], *window, 30, "UTC", weekdays=range(7))
+    assert starts(weekend) == [at(5, 9).isoformat(), at(6, 9).isoformat()]
+
+
+def test_working_hours_follow_the_time_zone():
+    # 09:00 in Dhaka is 03:00 UTC
+    slots = find_free_slots([], at(0, 0), at(1, 0), 30, "Asia/Dhaka")
+    assert datetime.fromisoformat(slots[0]["start"]) == at(0, 3)
+
+
+def test_working_hours_stay_put_across_dst_changes():
+    new_york = pytz.timezone("America/New_York")
+    start = new_york.localize(datetime(2026, 10, 30))
+    slots = find_free_slots([], start, start + timedelta(days=5), 60, "America/New_York", weekdays=range(7))
+    local = [(datetime.fromisoformat(slot["start"]), datetime.fromisoformat(slot["window_end"])) for slot in slots]
+    # Clocks go back on Sunday Nov 1; every day is still 09:00-17:00 local
+    assert [(slot_start.hour, slot_end.hour) for slot_start, slot_end in local] == [(9, 17)] * 5
+    assert [slot_start.utcoffset() for slot_start, _ in local] == [timedelta(hours=-4)] * 2 + [timedelta(hours=-5)] * 3
+
+
+def test_window_start_is_rounded_up_to_the_minute():
+    slots = find_free_slots([], at(0, 9) + timedelta(seconds=1), at(0, 17), 30, "UTC")
+    assert slots[0]["start"] == at(0, 9, 1).isoformat()
+
+
+def test_empty_window_and_max_results():
+    assert find_free_slots([], at(0, 10), at(0, 9), 30, "UTC") == []
+    assert len(find_free_slots([], at(0, 0), at(14, 0), 30, "UTC", max_results=3)) == 3
+
+
+def test_search_rejects_invalid_arguments():
+    def search(**arguments):
+        return asyncio.run(free_slots_tool.search_free_slots(**arguments))
+
+    assert "duration_minutes" in search(duration_minutes=0)["error"]
+    assert "buffer_minutes" in search(buffer_minutes=-1)["error"]
+    assert "Working hours" in search(work_start_hour=17, work_end_hour=9)["error"]
+    assert "at most 60 days" in search(start="2030-01-01T00:00:00Z", end="2030-06-01T00:00:00Z")["error"]
@@ -0,0 +1,44 @@
+import threading
+
+from google.oauth2.credentials import Credentials
+
+from app.core import google_api
+from app.core.google_api import get_calendar_service, invalidate_calendar_service
+
+
+def on_other_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_services_are_reused_per_user_and_thread():
+    credentials = Credentials(token="token")
+    service = get_calendar_service(credentials, "cache-user")
+    assert get_calendar_service(credentials, "cache-user") is service
+    assert get_calendar_service(credentials) is not service
+    assert on_other_thread(lambda: get_calendar_service(credentials, "cache-user")) is not service
+
+
+def test_new_or_invalidated_credentials_rebuild_the_service():
+    credentials = Credentials(token="token")
+    service = get_calendar_service(credentials, "cache-user-2")
+    assert get_calendar_service(Credentials(token="other"), "cache-user-2") is not service
+
+    service = get_calendar_service(credentials, "cache-user-2")
+    invalidate_calendar_service("cache-user-2")
+    assert get_calendar_service(credentials, "cache-user-2") is not service
+
+
+def test_the_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(google_api, "SERVICE_CACHE_SIZE", 2)
+    credentials = Credentials(token="token")
+
+    def fill():
+        for user_id in ("a", "b", "c"):
+            get_calendar_service(credentials, user_id)
+        return list(google_api._thread_services.cache)
+
+    assert on_other_thread(fill) == ["b", "c"]
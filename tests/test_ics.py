@@ -0,0 +1,153 @@
+import asyncio
+from datetime import date, datetime
+
+import pytz
+
+from app.core.ics import ICS_FOOTER, ICS_HEADER, event_to_vevent, iter_vevents, vevent_fields
+from app.services import import_service
+from app.services.import_service import import_ics, vevent_to_body
+
+SERIES = {
+    "id": "series1",
+    "summary": "Standup; daily, with the team",
+    "start": {"dateTime": "2030-01-07T09:00:00+06:00", "timeZone": "Asia/Dhaka"},
+    "end": {"dateTime": "2030-01-07T09:15:00+06:00", "timeZone": "Asia/Dhaka"},
+    "location": "Room 4",
+    "description": "Line one\nLine two",
+    "status": "confirmed",
+    "recurrence": ["RRULE:FREQ=DAILY;COUNT=5"],
+}
+MOVED = {
+    "id": "series1_20300108T030000Z",
+    "recurringEventId": "series1",
+    "originalStartTime": {"dateTime": "2030-01-08T09:00:00+06:00"},
+    "summary": "Standup (moved)",
+    "start": {"dateTime": "2030-01-08T10:00:00+06:00"},
+    "end": {"dateTime": "2030-01-08T10:15:00+06:00"},
+    "status": "confirmed",
+}
+CANCELLED = {
+    "id": "series1_20300109T030000Z",
+    "recurringEventId": "series1",
+    "originalStartTime": {"dateTime": "2030-01-09T09:00:00+06:00"},
+    "status": "cancelled",
+}
+ALL_DAY = {"id": "trip", "summary": "Trip", "start": {"date": "2030-02-01"}, "end": {"date": "2030-02-04"}}
+LONG = {
+    "id": "long",
+    "summary": "Réunion trimestrielle — " * 6,
+    "start": {"dateTime": "2030-03-01T12:00:00Z"},
+    "end": {"dateTime": "2030-03-01T13:00:00Z"},
+}
+
+
+def export(*events) -> bytes:
+    return (ICS_HEADER + "".join(event_to_vevent(event) for event in events) + ICS_FOOTER).encode()
+
+
+def parse(data: bytes, chunk_size: int = 7):
+    async def chunks():
+        for position in range(0, len(data), chunk_size):
+            yield data[position:position + chunk_size]
+
+    async def collect():
+        return [vevent async for vevent in iter_vevents(chunks())]
+
+    return asyncio.run(collect())
+
+
+def import_events(monkeypatch, data: bytes):
+    """
+    Runs import_ics against fake bulk calls; returns the outcomes, created bodies and updates.
+    """
+    created, updated = [], []
+
+    def create_events_bulk(service, bodies, user_id=None, check_conflicts=True):
+        created.extend(bodies)
+        return [dict(body, id=f"new{len(created) - len(bodies) + i}") for i, body in enumerate(bodies)]
+
+    def update_events_bulk(service, updates, user_id=None):
+        updated.extend(updates)
+        return [dict(body, id=event_id) for event_id, body in updates]
+
+    monkeypatch.setattr(import_service, "create_events_bulk", create_events_bulk)
+    monkeypatch.setattr(import_service, "update_events_bulk", update_events_bulk)
+    monkeypatch.setattr(import_service, "get_calendar_service", lambda credentials, user_id=None: None)
+
+    async def chunks():
+        yield data
+
+    async def collect():
+        return [outcome async for outcome in import_ics(chunks(), None, "ics-test")]
+
+    return asyncio.run(collect()), created, updated
+
+
+def fields(vevent) -> dict:
+    return vevent_fields(vevent, "Asia/Dhaka")
+
+
+def test_lines_are_folded_at_75_octets():
+    for line in event_to_vevent(LONG).split("\r\n"):
+        assert len(line.encode()) <= 75
+
+
+def test_round_trip_keeps_event_fields():
+    series, all_day, long = (fields(vevent) for vevent in parse(export(SERIES, ALL_DAY, LONG)))
+
+    assert series["uid"] == "series1@google.com"
+    assert series["summary"] == SERIES["summary"]
+    assert series["description"] == SERIES["description"]
+    assert series["location"] == "Room 4"
+    assert series["status"] == "confirmed"
+    assert series["start"] == datetime(2030, 1, 7, 3, tzinfo=pytz.utc)
+    assert series["end"] == datetime(2030, 1, 7, 3, 15, tzinfo=pytz.utc)
+    assert series["recurrence"] == ["RRULE:FREQ=DAILY;COUNT=5"]
+
+    assert (all_day["start"], all_day["end"]) == (date(2030, 2, 1), date(2030, 2, 4))
+    assert long["summary"] == LONG["summary"]
+
+
+def test_round_trip_builds_the_same_event_body():
+    _, body = vevent_to_body(parse(export(SERIES))[0])
+    assert body["summary"] == SERIES["summary"]
+    assert body["recurrence"] == SERIES["recurrence"]
+    assert datetime.fromisoformat(body["start"]["dateTime"]) == datetime.fromisoformat(SERIES["start"]["dateTime"])
+
+
+def test_instance_exceptions_are_overrides_of_their_series():
+    series, moved, cancelled = parse(export(SERIES, MOVED, CANCELLED))
+
+    for vevent in (moved, cancelled):
+        assert fields(vevent)["uid"] == "series1@google.com"
+    assert moved["props"]["RECURRENCE-ID"][0][1] == "20300108T030000Z"
+    assert fields(moved)["summary"] == "Standup (moved)"
+    assert fields(moved)["start"] == datetime(2030, 1, 8, 4, tzinfo=pytz.utc)
+
+    assert cancelled["props"]["RECURRENCE-ID"][0][1] == "20300109T030000Z"
+    assert fields(cancelled)["status"] == "cancelled"
+    assert "SUMMARY" not in cancelled["props"]
+    assert "RECURRENCE-ID" not in series["props"]
+
+
+def test_import_applies_overrides_to_their_series(monkeypatch):
+    # Overrides may come before their series
+    outcomes, created, updated = import_events(monkeypatch, export(MOVED, ALL_DAY, SERIES, CANCELLED))
+
+    assert [body["summary"] for body in created] == ["Trip", SERIES["summary"]]
+    assert created[1]["recurrence"] == ["RRULE:FREQ=DAILY;COUNT=5", "EXDATE:20300109T030000Z"]
+    assert [event_id for event_id, _ in updated] == ["new1_20300108T030000Z"]
+    moved = updated[0][1]
+    assert moved["summary"] == "Standup (moved)"
+    assert datetime.fromisoformat(moved["start"]["dateTime"]) == datetime.fromisoformat(MOVED["start"]["dateTime"])
+
+    statuses = {outcome["index"]: outcome["status"] for outcome in outcomes if outcome["type"] == "event"}
+    assert statuses == {0: "updated", 1: "created", 2: "created", 3: "excluded"}
+    assert outcomes[-1] == {"type": "done", "parsed": 4, "created": 2, "updated": 1, "excluded": 1}
+
+
+def test_overrides_without_their_series_are_rejected(monkeypatch):
+    outcomes, created, updated = import_events(monkeypatch, export(MOVED, CANCELLED))
+    assert created == [] and updated == []
+    assert [outcome["status"] for outcome in outcomes[:-1]] == ["error", "error"]
+    assert "not imported" in outcomes[0]["error"]
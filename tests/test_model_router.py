@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.core.outbound import OutboundScheduler
+from app.langgraph import model_router
+from app.langgraph.model_router import ModelRouter, RoutedChatModel, is_simple_turn
+
+SHORT = [HumanMessage(content="what's on tomorrow?")]
+LONG = [HumanMessage(content="plan my week " * 40)]
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class FakeModel:
+    """
+    Returns a fixed answer, or raises the given error, and counts its calls.
+    """
+
+    def __init__(self, answer: str = "ok", error: Exception = None, delay: float = 0):
+        self.answer, self.error, self.delay = answer, error, delay
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return AIMessage(content=self.answer)
+
+    async def ainvoke(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self.invoke(messages, **kwargs)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_simple_turns():
+    assert is_simple_turn(SHORT)
+    assert not is_simple_turn(LONG)
+    assert not is_simple_turn([HumanMessage(content="add standup every weekday at 9")])
+    assert is_simple_turn([ToolMessage(content="done", tool_call_id="1")])
+
+
+def test_simple_turns_go_to_the_fast_model_first():
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel("fast"), "large": FakeModel("large")}
+    assert run(router.ainvoke(models, SHORT, simple=True)).content == "fast"
+    assert run(router.ainvoke(models, LONG, simple=False)).content == "large"
+
+
+def test_server_errors_fail_over_and_cool_the_model_down():
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel(error=ServerError()), "large": FakeModel("large")}
+    assert run(router.ainvoke(models, SHORT, simple=True)).content == "large"
+    assert not router.stats["fast"].available()
+    # While it cools down the failed model is tried last
+    assert router.candidates(simple=True) == ["large", "fast"]
+    run(router.ainvoke(models, SHORT, simple=True))
+    assert models["fast"].calls == 1
+
+
+def test_timeouts_fail_over(monkeypatch):
+    monkeypatch.setattr(model_router, "MODEL_TIMEOUT_SECONDS", 0.01)
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel("fast", delay=1), "large": FakeModel("large")}
+    assert run(router.ainvoke(models, SHORT, simple=True)).content == "large"
+
+
+def test_waiting_for_a_slot_is_not_a_timeout(monkeypatch):
+    monkeypatch.setattr(model_router, "MODEL_TIMEOUT_SECONDS", 0.05)
+    scheduler = OutboundScheduler()
+
+    class QueuedModel(FakeModel):
+        async def ainvoke(self, messages, **kwargs):
+            async with scheduler.llm_slot():
+                return self.invoke(messages, **kwargs)
+
+    router = ModelRouter("fast", "large")
+    models = {"fast": QueuedModel("fast"), "large": FakeModel("large")}
+
+    async def main():
+        scheduler._llm_slots = asyncio.Semaphore(1)
+        async with scheduler.llm_slot():
+            call = asyncio.create_task(router.ainvoke(models, SHORT, simple=True))
+            await asyncio.sleep(0.2)
+        return await call
+
+    assert run(main()).content == "fast"
+    assert router.stats["fast"].errors == 0
+    assert router.stats["fast"].latency < 0.05
+
+
+def test_other_errors_are_raised():
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel(error=ValueError("bad request")), "large": FakeModel("large")}
+    with pytest.raises(ValueError):
+        run(router.ainvoke(models, SHORT, simple=True))
+    assert models["large"].calls == 0
+
+
+def test_the_last_model_error_is_raised():
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel(error=ServerError()), "large": FakeModel(error=ServerError())}
+    with pytest.raises(ServerError):
+        run(router.ainvoke(models, SHORT, simple=True))
+
+
+def test_unusable_answers_escalate():
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel(""), "large": FakeModel("large")}
+    accept = lambda response: bool(response.content)
+    assert run(router.ainvoke(models, SHORT, simple=True, accept=accept)).content == "large"
+    assert router.stats["fast"].escalations == 1
+
+
+def test_a_slower_fast_model_loses_its_place():
+    router = ModelRouter("fast", "large")
+    router.stats["fast"].record_success(2.0)
+    router.stats["large"].record_success(0.5)
+    assert router.candidates(simple=True) == ["large", "fast"]
+
+
+def test_no_routable_model_is_an_error():
+    router = ModelRouter("fast", "large")
+    with pytest.raises(ValueError):
+        run(router.ainvoke({"other": FakeModel()}, SHORT, simple=True))
+    with pytest.raises(ValueError):
+        router.invoke({}, SHORT, simple=True)
+
+
+def test_equal_model_names_are_tried_once():
+    router = ModelRouter("same", "same")
+    model = FakeModel(error=ServerError())
+    with pytest.raises(ServerError):
+        run(router.ainvoke({"same": model}, SHORT, simple=True))
+    assert model.calls == 1
+
+
+def test_sync_calls_fail_over_in_the_same_order():
+    router = ModelRouter("fast", "large")
+    models = {"fast": FakeModel(error=ServerError()), "large": FakeModel("large")}
+    chat = RoutedChatModel(router=router, models=models)
+    assert chat.invoke(SHORT).content == "large"
+    assert models["fast"].calls == 1
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.read_coalescer import ReadCoalescer, read_key
+
+KEY = read_key("user", "events.list", {"maxResults": 10})
+
+
+def test_read_key_ignores_parameter_order():
+    assert read_key("user", "op", {"a": 1, "b": 2}) == read_key("user", "op", {"b": 2, "a": 1})
+
+
+def test_concurrent_threads_share_one_fetch():
+    reads = ReadCoalescer()
+    release = threading.Event()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return "events"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reads.read(KEY, fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while reads.counters["coalesced"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["events"] * 5
+    assert len(fetches) == 1
+    assert reads.stats() == {"hits": 0, "misses": 1, "coalesced": 4}
+
+
+def test_results_are_cached_until_the_ttl_passes():
+    reads = ReadCoalescer(ttl_seconds=0.05)
+    values = iter(["first", "second"])
+    assert reads.read(KEY, lambda: next(values)) == "first"
+    assert reads.read(KEY, lambda: next(values)) == "first"
+    time.sleep(0.06)
+    assert reads.read(KEY, lambda: next(values)) == "second"
+
+
+def test_invalidate_only_drops_that_users_reads():
+    reads = ReadCoalescer()
+    other = read_key("other", "events.list", {})
+    reads.read(KEY, lambda: "old")
+    reads.read(other, lambda: "theirs")
+    reads.invalidate("user")
+    assert reads.read(KEY, lambda: "new") == "new"
+    assert reads.read(other, lambda: "changed") == "theirs"
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    reads = ReadCoalescer()
+
+    async def main():
+        started = asyncio.Event()
+
+        async def failing():
+            started.set()
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        leader = asyncio.create_task(reads.aread(KEY, failing))
+        await started.wait()
+        follower = asyncio.create_task(reads.aread(KEY, failing))
+        for task in (leader, follower):
+            with pytest.raises(RuntimeError):
+                await task
+
+        async def succeeding():
+            return "events"
+
+        assert await reads.aread(KEY, succeeding) == "events"
+
+    asyncio.run(main())
+
+
+def test_a_write_during_a_read_keeps_its_result_out_of_the_cache():
+    reads = ReadCoalescer()
+
+    async def main():
+        async def fetch():
+            reads.invalidate("user")  # a write lands while the read is in flight
+            return "stale"
+
+        async def fresh():
+            return "fresh"
+
+        assert await reads.aread(KEY, fetch) == "stale"
+        assert await reads.aread(KEY, fresh) == "fresh"
+
+    asyncio.run(main())
+
+
+def test_concurrent_tasks_share_one_await():
+    reads = ReadCoalescer()
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        await asyncio.sleep(0.01)
+        return "events"
+
+    async def main():
+        return await asyncio.gather(*(reads.aread(KEY, fetch) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["events"] * 10
+    assert len(fetches) == 1
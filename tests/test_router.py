@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.langgraph import router
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """
+    Stub out every tool route_query can reach; returns the (path, arguments) calls made.
+    """
+    made = []
+
+    def stub(path):
+        async def tool(*args, **kwargs):
+            made.append((path, kwargs or args))
+            return f"{path} reply"
+        return tool
+
+    monkeypatch.setattr(router, "agenda_tool_func", stub("agenda"))
+    monkeypatch.setitem(router.FAST_PATHS, "list_events", [(router.extract_list_slots, stub("list"))])
+    monkeypatch.setitem(router.FAST_PATHS, "delete_event", [(router.extract_delete_slots, stub("delete"))])
+    monkeypatch.setattr(router, "extract_and_create_event", stub("extract"))
+    monkeypatch.setattr(router, "CREATE_EXTRACTION", True)
+    return made
+
+
+def route(query: str):
+    return asyncio.run(router.route_query(query))
+
+
+@pytest.mark.parametrize("query", [
+    "create a meeting with Sam tomorrow at 3pm",
+    "Please schedule lunch on Friday at noon",
+    "book a dentist appointment next Monday 10am",
+    "set up a call with the team at 4pm",
+    "add lunch tomorrow at 1",
+])
+def test_create_requests_take_the_extraction_path(calls, query):
+    assert route(query) == "extract reply"
+    assert [path for path, _ in calls] == ["extract"]
+
+
+@pytest.mark.parametrize("query", [
+    "what's on my schedule today?",
+    "show my schedule for this week",
+    "cancel the meeting I scheduled for friday",
+    "make sure nothing is booked friday",
+])
+def test_schedule_mentions_are_not_creates(calls, query):
+    route(query)
+    assert "extract" not in [path for path, _ in calls]
+
+
+@pytest.mark.parametrize("query, view", [
+    ("what's on today", "today"),
+    ("tomorrow's schedule", "tomorrow"),
+    ("show me this week", "week"),
+    ("what's next", "next"),
+    ("what's on my schedule today", "today"),
+    ("what's on my schedule today?", "today"),
+    ("show my schedule for this week", "week"),
+])
+def test_agenda_reads_take_the_agenda_path(calls, query, view):
+    assert route(query) == "agenda reply"
+    assert calls == [("agenda", {"view": view})]
+
+
+def test_recurring_creates_go_to_the_agent(calls):
+    assert route("schedule standup every weekday at 9am") is None
+    assert calls == []
+
+
+def test_list_fast_path(calls):
+    assert route("show my next 3 events") == "list reply"
+    assert calls == [("list", {"max_results": 3})]
+
+
+def test_delete_fast_path(calls):
+    assert route('delete "Team sync"') == "delete reply"
+    assert calls == [("delete", {"title": "Team sync"})]
+
+
+def test_unmatched_queries_go_to_the_agent(calls):
+    assert route("move my 3pm to 4pm") is None
+    assert calls == []
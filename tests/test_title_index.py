@@ -0,0 +1,52 @@
+from app.core.title_index import TitleIndex, normalize_title
+
+
+def make_index(**titles) -> TitleIndex:
+    index = TitleIndex()
+    for event_id, title in titles.items():
+        index.add(event_id, title)
+    return index
+
+
+def test_normalize_title():
+    assert normalize_title("  Team   Sync!! ") == "team sync"
+    assert normalize_title("ＰＬＡＮＮＩＮＧ") == "planning"
+
+
+def test_exact_match_ignores_case_and_punctuation():
+    index = make_index(a="Team Sync", b="Team Sync (old)", c="Lunch")
+    assert index.search("team sync!")[0] == ("a", 1.0, "exact")
+
+
+def test_prefix_matches_rank_after_exact():
+    index = make_index(a="Design review", b="Design review follow-up", c="Lunch")
+    results = index.search("design review")
+    assert [(event_id, match) for event_id, _, match in results[:2]] == [("a", "exact"), ("b", "prefix")]
+
+
+def test_fuzzy_match_tolerates_typos():
+    index = make_index(a="Quarterly planning", b="Dentist")
+    event_id, score, match = index.search("quartrly planing")[0]
+    assert (event_id, match) == ("a", "fuzzy")
+    assert 0.3 <= score < 1.0
+
+
+def test_unrelated_titles_do_not_match():
+    assert make_index(a="Dentist").search("board meeting") == []
+
+
+def test_limit():
+    index = make_index(**{f"e{number}": f"Standup {number}" for number in range(10)})
+    assert len(index.search("standup", limit=3)) == 3
+
+
+def test_readding_and_removing_keep_the_index_consistent():
+    index = make_index(a="Standup", b="Standup")
+    index.add("a", "Retro")
+    assert {event_id for event_id, _, _ in index.search("standup")} == {"b"}
+    index.remove("b")
+    index.remove("missing")
+    assert index.search("standup") == []
+    assert len(index) == 1
+    assert index.sorted_titles == ["retro"]
+    assert all(ids == {"a"} for ids in index.grams.values())